@@ -0,0 +1,245 @@
+"""
+Columnar, day-partitioned store for analytics events.
+`compact` turns closed analytics.jsonl segments into one .npz file per day
+(columns: seconds since midnight, user id, difficulty and action codes) and
+keeps a JSON manifest indexing the partitions by date. History queries load
+only the partitions in range and aggregate them with NumPy, so DAU/WAU
+trends, difficulty mix and hour-of-day histograms over millions of events
+take milliseconds instead of a json.loads per line.
+"""
+import gzip
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from event_log import EventLogWriter
+from config import ANALYTICS_PARTITIONS_DIR, DEFAULT_DIFFICULTY
+
+COLUMNS = ("seconds", "user", "difficulty", "action")
+DTYPES = {"seconds": np.int32, "user": np.int64, "difficulty": np.uint8, "action": np.uint8}
+
+# Compactions rewrite manifest.json and share <day>.npz.tmp.npz names, so only one runs at a time
+_compaction_lock = threading.Lock()
+
+
+class AnalyticsStore:
+    """Day partitions of analytics events plus their manifest."""
+
+    def __init__(self, root: str = ANALYTICS_PARTITIONS_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        if not os.path.exists(root):
+            os.makedirs(root)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict:
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        return {"version": 1, "difficulties": [], "actions": [], "partitions": {}, "compacted": []}
+
+    def _save_manifest(self):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _code(self, vocabulary: str, value: str) -> int:
+        """Stable small-integer code for a category value (vocabularies are append-only)."""
+        names = self.manifest[vocabulary]
+        if value not in names:
+            if len(names) >= 255:
+                raise ValueError(f"Too many distinct {vocabulary} for a uint8 column")
+            names.append(value)
+        return names.index(value)
+
+    def _partition_path(self, day: str) -> str:
+        return os.path.join(self.root, f"{day}.npz")
+
+    # Compaction
+
+    def compact(self, log: EventLogWriter) -> Dict[str, int]:
+        """
+        Fold every closed, not yet compacted segment of `log` into the day
+        partitions. Returns rows added per day. Each partition records the
+        segments it contains, so re-running after a crash never double counts.
+        A segment that cannot be read is logged and left for the next run.
+        The analytics log calls this before pruning, so segments are only
+        deleted once they are compacted.
+        """
+        added: Dict[str, int] = {}
+        with _compaction_lock:
+            for path, _, _ in log.segments():
+                # Named without .gz: a segment is briefly present in both forms while being compressed
+                source = os.path.basename(path)
+                if source.endswith(".gz"):
+                    source = source[:-len(".gz")]
+                if source in self.manifest["compacted"]:
+                    continue
+                try:
+                    days = self._read_segment(path)
+                except OSError as e:
+                    print(f"[WARN] Skipping segment {os.path.basename(path)}: {e}")
+                    continue
+                for day, rows in days.items():
+                    if self._merge(day, source, rows):
+                        added[day] = added.get(day, 0) + len(rows["user"])
+                self.manifest["compacted"].append(source)
+                self._save_manifest()
+        return added
+
+    def _read_segment(self, path: str) -> Dict[str, Dict[str, List[int]]]:
+        """Parse one JSONL (or .jsonl.gz) segment into per-day column lists."""
+        opener = gzip.open if path.endswith(".gz") else open
+        days: Dict[str, Dict[str, List[int]]] = defaultdict(lambda: {column: [] for column in COLUMNS})
+        skipped = 0
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                    ts = datetime.fromisoformat(event["timestamp"])
+                    user = int(event["user_id"])
+                except (ValueError, KeyError, TypeError):
+                    skipped += 1
+                    continue
+                rows = days[ts.date().isoformat()]
+                rows["seconds"].append(ts.hour * 3600 + ts.minute * 60 + ts.second)
+                rows["user"].append(user)
+                rows["difficulty"].append(self._code("difficulties", event.get("difficulty") or DEFAULT_DIFFICULTY))
+                rows["action"].append(self._code("actions", event.get("action") or "unknown"))
+        if skipped:
+            print(f"[WARN] {os.path.basename(path)}: skipped {skipped} unreadable events")
+        return days
+
+    def _merge(self, day: str, source: str, rows: Dict[str, List[int]]) -> bool:
+        """Append rows to a day's partition (atomically); False if `source` is already in it."""
+        path = self._partition_path(day)
+        columns = {column: np.asarray(rows[column], dtype=DTYPES[column]) for column in COLUMNS}
+        sources = [source]
+        if os.path.exists(path):
+            with np.load(path) as existing:
+                if source in existing["sources"]:
+                    return False
+                sources = list(existing["sources"]) + sources
+                columns = {column: np.concatenate([existing[column], columns[column]]) for column in COLUMNS}
+
+        # Sorted by time of day so partitions read back in event order
+        order = np.argsort(columns["seconds"], kind="stable")
+        columns = {column: values[order] for column, values in columns.items()}
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, sources=np.array(sources), **columns)
+        os.replace(tmp_path, path)
+        self.manifest["partitions"][day] = {"rows": int(len(order))}
+        return True
+
+    # Queries
+
+    def days(self) -> List[str]:
+        with _compaction_lock:
+            return sorted(self.manifest["partitions"])
+
+    def load(self, start: date, end: date) -> Dict[str, np.ndarray]:
+        """Columns for [start, end], plus `day` (days since `start`) per event."""
+        parts = []
+        day = start
+        while day <= end:
+            path = self._partition_path(day.isoformat())
+            if day.isoformat() in self.manifest["partitions"] and os.path.exists(path):
+                with np.load(path) as partition:
+                    columns = {column: partition[column] for column in COLUMNS}
+                columns["day"] = np.full(len(columns["user"]), (day - start).days, dtype=np.int32)
+                parts.append(columns)
+            day += timedelta(days=1)
+        if not parts:
+            return {column: np.array([], dtype=DTYPES.get(column, np.int32)) for column in COLUMNS + ("day",)}
+        return {column: np.concatenate([part[column] for part in parts]) for column in COLUMNS + ("day",)}
+
+    @staticmethod
+    def _distinct(keys: np.ndarray) -> np.ndarray:
+        """Sorted distinct values (sort-based; faster than np.unique on large int64 keys)."""
+        keys = np.sort(keys)
+        if len(keys) == 0:
+            return keys
+        return keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+
+    def history(self, start: date, end: date) -> Dict:
+        """
+        DAU and trailing-7-day WAU per day, DAU per difficulty, difficulty mix
+        (events) and hour-of-day histogram for [start, end].
+        """
+        n_days = (end - start).days + 1
+        # WAU needs the six days before the range too; day 6 below is `start`
+        events = self.load(start - timedelta(days=6), end)
+        total_days = n_days + 6
+        day = events["day"].astype(np.int64)
+        in_range = day >= 6
+
+        # Telegram user ids fit comfortably in int64 alongside a day and difficulty code
+        user = events["user"].astype(np.int64)
+
+        # Distinct (user, day) activity, user-major so each user's days are consecutive
+        active = self._distinct(user * total_days + day)
+        active_user, active_day = active // total_days, active % total_days
+        dau = np.bincount(active_day, minlength=total_days)[6:]
+
+        # Each active day covers the WAU of days d..d+6; ranges from a user's earlier
+        # active day are clipped off so a user is counted once per window
+        same_user = np.concatenate(([False], active_user[1:] == active_user[:-1]))
+        previous_day = np.concatenate(([0], active_day[:-1]))
+        first = np.where(same_user, np.maximum(active_day, previous_day + 7), active_day)
+        last = active_day + 6
+        covered = first <= last
+        delta = (np.bincount(first[covered], minlength=total_days + 7)
+                 - np.bincount(last[covered] + 1, minlength=total_days + 7))
+        wau = np.cumsum(delta)[6:total_days]
+
+        names = self.manifest["difficulties"]
+        difficulty = events["difficulty"].astype(np.int64)
+        mix = np.bincount(difficulty[in_range], minlength=len(names))
+        slot = difficulty * total_days + day  # (difficulty, day) cell
+        n_slots = max(len(names), 1) * total_days
+        by_difficulty = self._distinct((user * n_slots + slot)[in_range])
+        per_difficulty_day = np.bincount(by_difficulty % n_slots, minlength=n_slots)
+        per_difficulty_day = per_difficulty_day.reshape(-1, total_days)[:, 6:]
+
+        hours = np.bincount(events["seconds"][in_range] // 3600, minlength=24)[:24]
+        return {
+            "days": [(start + timedelta(days=i)).isoformat() for i in range(n_days)],
+            "events": int(in_range.sum()),
+            "dau": dau.tolist(),
+            "wau": wau.tolist(),
+            "dau_by_difficulty": {name: per_difficulty_day[code].tolist() for code, name in enumerate(names)},
+            "difficulty_mix": {name: int(count) for name, count in zip(names, mix)},
+            "hours": hours.tolist(),
+        }
+
+
+def run_compaction(data_dir: str = "data") -> Dict[str, int]:
+    """Entry point for `python main.py compact`."""
+    log = EventLogWriter(os.path.join(data_dir, "analytics.jsonl"))
+    store = AnalyticsStore()
+    added = store.compact(log)
+    total = sum(added.values())
+    print(f"[OK] Compacted {total} events into {len(added)} day partitions "
+          f"({len(store.days())} days in {store.root})")
+    return added
+
+
+def history_summary(days: int, store: Optional[AnalyticsStore] = None,
+                    end: Optional[date] = None) -> Tuple[Dict, float]:
+    """
+    history() over the last `days` days, with the query time in ms. By default
+    the range ends at the latest compacted day: today's events are still in
+    the active log file.
+    """
+    store = store or AnalyticsStore()
+    if end is None:
+        compacted = store.days()
+        end = min(date.fromisoformat(compacted[-1]), date.today()) if compacted else date.today()
+    started = time.perf_counter()
+    result = store.history(end - timedelta(days=days - 1), end)
+    return result, (time.perf_counter() - started) * 1000
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Cold-start benchmark.
+Each scenario runs in a fresh interpreter and reports how long the import
+takes and how long until the entry point is ready to work. Run with
+`python bench_startup.py [runs]`; results are medians in milliseconds.
+Scenarios run in a scratch directory (with a copy of .env, if any), so the
+data/ files they create never land in the checkout.
+"""
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# name -> (import statement, code that makes the entry point ready)
+SCENARIOS = {
+    "config": ("import config", "pass"),
+    "rc_generator": ("import rc_generator", "rc_generator.get_generator()"),
+    "send_rc": ("import send_rc", "from scheduler import RCScheduler; RCScheduler()"),
+    "scheduler": ("import scheduler", "scheduler.RCScheduler()"),
+    "bot": ("import bot", "bot.RCBot()"),
+    "main": ("import main", "pass"),
+}
+
+_PROBE = """
+import json, time
+t0 = time.perf_counter()
+{imports}
+t1 = time.perf_counter()
+{ready}
+t2 = time.perf_counter()
+print(json.dumps({{"import": (t1 - t0) * 1000, "ready": (t2 - t0) * 1000}}))
+"""
+
+
+def measure(imports: str, ready: str, cwd: str) -> dict:
+    """One cold run in `cwd`: import and import+ready times in ms."""
+    code = _PROBE.format(imports=imports, ready=ready)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (REPO_DIR, env.get("PYTHONPATH")) if p)
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=cwd, env=env,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'scenario':<14}{'import ms':>12}{'ready ms':>12}   (median of {runs} cold runs)")
+    for name, (imports, ready) in SCENARIOS.items():
+        try:
+            samples = []
+            for _ in range(runs):
+                # A fresh directory per run keeps every run cold (no data/ left by the last one)
+                with tempfile.TemporaryDirectory(prefix="rc_bench_") as scratch:
+                    if os.path.exists(os.path.join(REPO_DIR, ".env")):
+                        shutil.copy(os.path.join(REPO_DIR, ".env"), scratch)
+                    samples.append(measure(imports, ready, scratch))
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<14}{'failed':>12}   {e.stderr.strip().splitlines()[-1]}")
+            continue
+        import_ms = statistics.median(s["import"] for s in samples)
+        ready_ms = statistics.median(s["ready"] for s in samples)
+        print(f"{name:<14}{import_ms:>12.0f}{ready_ms:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
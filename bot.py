@@ -1,11 +1,13 @@
 """
 Telegram bot implementation for RC practice.
 """
+import asyncio
 import json
 import os
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import TelegramError
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -14,12 +16,21 @@ from telegram.ext import (
     filters,
     MessageHandler
 )
-from rc_generator import RCGenerator
-from config import TELEGRAM_TOKEN, DEBUG_MODE, ADMIN_USER_IDS, DIFFICULTY_LEVELS, DEFAULT_DIFFICULTY
-
-# Global RC state
-current_rc = None
-rc_generator = RCGenerator()
+from rc_generator import get_generator
+from rc_pool import RCPool
+from cpu_pool import get_cpu_pool
+from rc_archive import RCArchive
+from singleflight import SingleFlight
+from user_store import open_user_store
+from user_aggregates import UserAggregates
+from event_log import EventLogWriter
+from analytics_store import AnalyticsStore, history_summary
+from dedup import signature_similarity
+from passage_stats import PassageStats
+from config import (
+    TELEGRAM_TOKEN, DEBUG_MODE, ADMIN_USER_IDS, DIFFICULTY_LEVELS, DEFAULT_DIFFICULTY,
+    TODAY_DEADLINE_SECONDS, TODAY_UPGRADE_EDIT, DEDUP_THRESHOLD, DEDUP_MAX_ATTEMPTS
+)
 
 
 class UserAnalytics:
@@ -27,38 +38,35 @@ class UserAnalytics:
 
     def __init__(self, data_dir="data"):
         self.data_dir = data_dir
-        self.users_file = f"{data_dir}/users.json"
-        self.analytics_file = f"{data_dir}/analytics.jsonl"
+        # Segments are compacted into day partitions before the log prunes them
+        self.partitions = AnalyticsStore()
+        self.events = EventLogWriter(f"{data_dir}/analytics.jsonl", on_prune=self.partitions.compact)
         self._ensure_data_dir()
-        self._load_users()
+        self.store = open_user_store(data_dir)
+        self.aggregates = UserAggregates.from_users(self.store.items())
 
     def _ensure_data_dir(self):
         """Ensure data directory exists."""
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
 
-    def _load_users(self):
-        """Load users database."""
-        if not os.path.exists(self.users_file):
-            self.users = {}
-        else:
-            try:
-                with open(self.users_file, "r") as f:
-                    self.users = json.load(f)
-            except:
-                self.users = {}
+    async def start(self):
+        """Start the store's background flushing, if any."""
+        await self.store.start()
 
-    def _save_users(self):
-        """Save users database."""
-        with open(self.users_file, "w") as f:
-            json.dump(self.users, f, indent=2)
+    def close(self):
+        """Flush and release the user store and event log."""
+        self.store.close()
+        self.events.close()
 
     def track_user(self, user_id: int, user_name: str, difficulty: str = None):
         """Track user and log activity."""
         user_id_str = str(user_id)
 
-        if user_id_str not in self.users:
-            self.users[user_id_str] = {
+        user = self.store.get(user_id_str)
+        is_new = user is None
+        if is_new:
+            user = {
                 "user_id": user_id,
                 "user_name": user_name,
                 "first_seen": datetime.now().isoformat(),
@@ -69,7 +77,6 @@ class UserAnalytics:
                 "last_activity_date": None
             }
 
-        user = self.users[user_id_str]
         user["last_seen"] = datetime.now().isoformat()
         user["total_rcs"] += 1
 
@@ -81,6 +88,7 @@ class UserAnalytics:
 
         # Track streak
         today = datetime.now().date().isoformat()
+        previous_day = user["last_activity_date"]
         if user["last_activity_date"] != today:
             if user["last_activity_date"]:
                 yesterday = (datetime.now().date() - timedelta(days=1)).isoformat()
@@ -92,51 +100,40 @@ class UserAnalytics:
                 user["streak"] = 1
             user["last_activity_date"] = today
 
-        self._save_users()
+        self.store.put(user_id_str, user)
+        self.aggregates.record(user_id_str, user, is_new, previous_day)
 
         # Log analytics
-        with open(self.analytics_file, "a") as f:
-            f.write(json.dumps({
-                "timestamp": datetime.now().isoformat(),
-                "user_id": user_id,
-                "user_name": user_name,
-                "action": "view_rc",
-                "difficulty": difficulty or DEFAULT_DIFFICULTY
-            }) + "\n")
+        self.events.write({
+            "timestamp": datetime.now().isoformat(),
+            "user_id": user_id,
+            "user_name": user_name,
+            "action": "view_rc",
+            "difficulty": difficulty or DEFAULT_DIFFICULTY
+        })
 
     def get_user_stats(self, user_id: int) -> Optional[Dict]:
         """Get user statistics."""
         user_id_str = str(user_id)
-        return self.users.get(user_id_str)
+        return self.store.get(user_id_str)
 
     def get_all_users_count(self) -> int:
         """Get total count of users."""
-        return len(self.users)
+        return self.aggregates.total_users
 
     def get_daily_active_users(self) -> int:
         """Get count of users active today."""
         today = datetime.now().date().isoformat()
-        count = 0
-        for user in self.users.values():
-            if user.get("last_activity_date") == today:
-                count += 1
-        return count
+        return self.aggregates.active_on(today)
 
     def get_total_interactions(self) -> int:
         """Get total number of RC interactions."""
-        total = 0
-        for user in self.users.values():
-            total += user.get("total_rcs", 0)
-        return total
+        return self.aggregates.total_rcs
 
     def get_top_users(self, limit=5) -> list:
         """Get top users by RC attempts."""
-        sorted_users = sorted(
-            self.users.values(),
-            key=lambda x: x.get("total_rcs", 0),
-            reverse=True
-        )
-        return sorted_users[:limit]
+        top = self.aggregates.top(limit)
+        return top if top is not None else self.store.top(limit)
 
     def get_stats_summary(self) -> Dict:
         """Get overall analytics summary."""
@@ -148,24 +145,89 @@ class UserAnalytics:
         }
 
 
+class LivePassageMessage:
+    """Streams a partially generated passage into one Telegram message."""
+
+    # Telegram caps messages at 4096 characters; show the tail of long drafts
+    PREVIEW_CHARS = 3500
+
+    def __init__(self, update: Update):
+        self.update = update
+        self.message = None
+        self.closed = False
+
+    async def show(self, text: str) -> None:
+        """Send the preview on first call, then edit it in place."""
+        if self.closed:
+            return
+        preview = f"✍️ Generating passage...\n\n{text[-self.PREVIEW_CHARS:]}"
+        try:
+            if self.message is None:
+                self.message = await self.update.message.reply_text(preview)
+                if self.closed:  # Closed while the first send was in flight
+                    await self.discard()
+            else:
+                await self.message.edit_text(preview)
+        except TelegramError as e:
+            if DEBUG_MODE:
+                print(f"[DEBUG] Live preview update failed: {e}")
+
+    async def discard(self) -> None:
+        """Remove the preview once the formatted RC has been sent."""
+        if self.message is None:
+            return
+        try:
+            await self.message.delete()
+        except TelegramError:
+            pass
+        self.message = None
+
+    async def close(self) -> None:
+        """Discard the preview and ignore further progress (generation carries on)."""
+        self.closed = True
+        await self.discard()
+
+
 class RCBot:
     """Telegram bot for daily RC practice."""
 
     def __init__(self):
         self.token = TELEGRAM_TOKEN
-        self.generator = RCGenerator()
+        print(f"[INFO] Admin users loaded: {ADMIN_USER_IDS}")
+        self.generator = get_generator()
         self.analytics = UserAnalytics()
+        self.pool = RCPool(self.generator)
+        self.archive = RCArchive()
+        self.today_flight = SingleFlight()
+        self._upgrades = set()  # Background tasks finishing /today after a provisional RC
         self.current_rc = None
         self.today_date = None
         self.user_difficulty = {}
         self.data_dir = "data"
         self._ensure_data_dir()
+        # Feedback is kept indefinitely; only the size budget prunes it
+        self.feedback_log = EventLogWriter(f"{self.data_dir}/feedback.jsonl", retention_days=None)
 
     def _ensure_data_dir(self):
         """Ensure data directory exists."""
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
 
+    async def startup(self) -> None:
+        """Start background tasks. Call once the event loop is running."""
+        await get_cpu_pool().start()
+        await self.pool.start()
+        await self.analytics.start()
+
+    async def shutdown(self) -> None:
+        """Stop background tasks and persist state."""
+        for task in list(self._upgrades):
+            task.cancel()
+        await self.pool.stop()
+        await get_cpu_pool().stop()
+        self.analytics.close()
+        self.feedback_log.close()
+
     def _is_admin(self, user_id: int) -> bool:
         """Check if user is admin."""
         is_admin = user_id in ADMIN_USER_IDS
@@ -221,6 +283,9 @@ YOUR STATISTICS:
 ADMIN ONLY:
 /verify_admin - Check if you have admin access
 /adminstats - View overall analytics dashboard
+/adminstats history [days] - DAU/WAU trends, difficulty mix, busiest hours
+/apistatus - LLM provider health and cache stats
+/llmstats [hours|export] - LLM tokens, latency and outcomes
 
 OTHERS:
 /feedback - Send feedback
@@ -321,34 +386,28 @@ Happy practicing! 🎯"""
             # Track user activity
             self.analytics.track_user(user_id, user_name, difficulty)
 
-            # Check if already sent today
-            today = datetime.now().date().isoformat()
-            rc_file = f"{self.data_dir}/today_rc_{difficulty}.json"
-
-            if os.path.exists(rc_file):
-                with open(rc_file, "r") as f:
-                    data = json.load(f)
-                    if data.get("date", "").startswith(today):
-                        self.current_rc = data
-                        await self._send_rc(update, difficulty)
-                        return
-
-            # Generate new RC for today
-            self.current_rc = self.generator.generate_daily_rc(difficulty)
-
-            # Validate
-            is_valid, message = self.generator.validate_rc(self.current_rc)
-            if not is_valid:
+            live = LivePassageMessage(update)
+            flight = asyncio.ensure_future(self._get_today_rc(difficulty, on_progress=live.show))
+            try:
+                # shield: on timeout, generation carries on for the upgrade and other callers
+                rc, message = await asyncio.wait_for(asyncio.shield(flight), TODAY_DEADLINE_SECONDS or None)
+            except asyncio.TimeoutError:
+                print(f"[INFO] /today missed its {TODAY_DEADLINE_SECONDS:g}s deadline")
+                provisional = await self._provisional_rc(difficulty)
+                if provisional:
+                    await live.close()
+                    await self._send_provisional_rc(update, difficulty, provisional, flight)
+                    return
+                # No valid stand-in: keep waiting for today's RC
+                rc, message = await flight
+            await live.discard()
+            if not rc:
                 await update.message.reply_text(
                     f"⚠️ RC generation failed: {message}\nPlease try again."
                 )
                 return
 
-            # Save for today
-            self.current_rc["date"] = datetime.now().isoformat()
-            with open(rc_file, "w") as f:
-                json.dump(self.current_rc, f, indent=2)
-
+            self.current_rc = rc
             await self._send_rc(update, difficulty)
 
         except Exception as e:
@@ -357,46 +416,163 @@ Happy practicing! 🎯"""
                 print(error_msg)
             await update.message.reply_text(error_msg)
 
-    async def _send_rc(self, update: Update, difficulty: str) -> None:
-        """Format and send the RC passage and questions."""
-        if not self.current_rc:
-            await update.message.reply_text("No RC loaded. Use /today first.")
+    def _load_today_rc(self, difficulty: str, today: str) -> Optional[Dict]:
+        """Return the saved RC for this difficulty if it was generated today."""
+        rc_file = f"{self.data_dir}/today_rc_{difficulty}.json"
+        if not os.path.exists(rc_file):
+            return None
+
+        with open(rc_file, "r") as f:
+            data = json.load(f)
+        if data.get("date", "").startswith(today):
+            return data
+        return None
+
+    async def _get_today_rc(self, difficulty: str, on_progress=None) -> Tuple[Optional[Dict], str]:
+        """
+        Get today's RC for a difficulty, generating it at most once.
+        Concurrent callers for the same (date, difficulty) share one generation;
+        only the caller that starts it receives streaming progress.
+        """
+        today = datetime.now().date().isoformat()
+        rc = self._load_today_rc(difficulty, today) or self.archive.get(today, difficulty)
+        if rc:
+            return rc, "Valid RC"
+
+        return await self.today_flight.do(
+            (today, difficulty),
+            lambda: self._generate_today_rc(difficulty, today, on_progress)
+        )
+
+    async def _generate_today_rc(self, difficulty: str, today: str,
+                                 on_progress=None) -> Tuple[Optional[Dict], str]:
+        """Generate, validate and save today's RC for a difficulty."""
+        # A previous flight may have finished between the caller's check and now
+        rc = self._load_today_rc(difficulty, today)
+        if rc:
+            return rc, "Valid RC"
+
+        rc = await self.generator.agenerate_daily_rc(difficulty, on_progress=on_progress)
+
+        is_valid, message = self.generator.validate_rc(rc)
+        if not is_valid:
+            return None, message
+
+        # Save for today (write-then-rename so readers never see a partial file)
+        rc["date"] = datetime.now().isoformat()
+        rc_file = f"{self.data_dir}/today_rc_{difficulty}.json"
+        tmp_file = f"{rc_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(rc, f, indent=2)
+        os.replace(tmp_file, rc_file)
+
+        return rc, message
+
+    async def _provisional_rc(self, difficulty: str) -> Optional[Dict]:
+        """A stand-in RC (pooled, else from the offline corpus), or None if it fails validation."""
+        pooled = self.pool.take(difficulty)
+        rc = pooled[0] if pooled else await self.generator.afallback_rc(difficulty)
+        is_valid, message = self.generator.validate_rc(rc)
+        if not is_valid:
+            print(f"[WARN] Provisional RC rejected ({message}), waiting for today's RC")
+            return None
+        return rc
+
+    async def _send_provisional_rc(self, update: Update, difficulty: str, rc: Dict,
+                                   flight: asyncio.Future) -> None:
+        """
+        Send the stand-in `rc` now and upgrade to today's RC in the
+        background once `flight` finishes.
+        """
+        print("[INFO] Sending a provisional RC")
+        rc["provisional"] = True
+        self.current_rc = rc
+        sent = await self._send_rc(update, difficulty)
+
+        task = asyncio.create_task(self._upgrade_provisional(rc, difficulty, flight, sent))
+        self._upgrades.add(task)
+        task.add_done_callback(self._upgrades.discard)
+
+    async def _upgrade_provisional(self, provisional: Dict, difficulty: str, flight: asyncio.Future,
+                                   sent: Optional[Dict]) -> None:
+        """Wait for today's RC and edit the provisional messages into it."""
+        try:
+            rc, message = await flight
+        except Exception as e:
+            print(f"[ERROR] Background generation of today's RC failed: {e}")
+            return
+        if not rc:
+            print(f"[WARN] Background generation of today's RC failed: {message}")
+            return
+        # rc is saved as today's, so later /today calls are served from it either way
+        if not TODAY_UPGRADE_EDIT or not sent:
             return
 
-        passage = self.current_rc["passage"]
-        topic = self.current_rc["topic"]
-        questions = self.current_rc["questions"]
+        if self.current_rc is provisional:
+            self.current_rc = rc
+        try:
+            await sent["passage"].edit_text(self._format_passage(rc, difficulty), parse_mode="Markdown")
+            for i, (msg, q) in enumerate(zip(sent["questions"], rc["questions"]), 1):
+                await msg.edit_text(self._format_question(i, q), parse_mode="Markdown")
+        except TelegramError as e:
+            print(f"[WARN] Could not upgrade provisional RC: {e}")
+
+    def _format_passage(self, rc: Dict, difficulty: str) -> str:
+        """Passage message for /today."""
         difficulty_name = DIFFICULTY_LEVELS[difficulty]["name"]
+        if not rc.get("provisional"):
+            notice = ""
+        elif TODAY_UPGRADE_EDIT:
+            notice = "\n⏳ _Today's RC is still being generated; this practice RC will update in place._\n"
+        else:
+            notice = "\n⏳ _Today's RC is still being generated; here is a practice RC. Try /today again shortly._\n"
 
-        # Format passage message
-        passage_msg = f"""
+        return f"""
 🎯 *Today's RC Challenge*
-
-📌 *Topic:* {topic}
+{notice}
+📌 *Topic:* {rc["topic"]}
 🔥 *Level:* {difficulty_name}
 
 ━━━━━━━━━━━━━━━━━━━━━
-*PASSAGE* ({len(passage.split())} words)
+*PASSAGE* ({PassageStats.from_rc(rc).word_count} words)
 ━━━━━━━━━━━━━━━━━━━━━
 
-{passage}
+{rc["passage"]}
 
 ━━━━━━━━━━━━━━━━━━━━━
 *QUESTIONS*
 ━━━━━━━━━━━━━━━━━━━━━
         """
-        await update.message.reply_text(passage_msg, parse_mode="Markdown")
 
-        # Send each question with answer buttons
-        for i, q in enumerate(questions, 1):
-            question_msg = f"""
+    def _format_question(self, i: int, q: Dict) -> str:
+        return f"""
 *Q{i}. {q['type'].upper()}*
 
 {q['question']}
 
 {chr(10).join(q['options'])}
             """
-            await update.message.reply_text(question_msg, parse_mode="Markdown")
+
+    async def _send_rc(self, update: Update, difficulty: str) -> Optional[Dict]:
+        """
+        Format and send the RC passage and questions.
+        Returns the sent messages ({"passage": msg, "questions": [msg, ...]}).
+        """
+        if not self.current_rc:
+            await update.message.reply_text("No RC loaded. Use /today first.")
+            return None
+
+        questions = self.current_rc["questions"]
+        passage_message = await update.message.reply_text(
+            self._format_passage(self.current_rc, difficulty), parse_mode="Markdown"
+        )
+
+        # Send each question with answer buttons
+        question_messages: List = []
+        for i, q in enumerate(questions, 1):
+            question_messages.append(
+                await update.message.reply_text(self._format_question(i, q), parse_mode="Markdown")
+            )
 
             # Create 2x2 answer button layout
             answer_keys = ['A', 'B', 'C', 'D']
@@ -416,6 +592,9 @@ Happy practicing! 🎯"""
             reply_markup = InlineKeyboardMarkup(keyboard)
             await update.message.reply_text("*Select your answer:*", reply_markup=reply_markup, parse_mode="Markdown")
 
+        await self.generator.amark_served(self.current_rc)
+        return {"passage": passage_message, "questions": question_messages}
+
     async def show_answers(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /answer command - show answers with explanations."""
         if not self.current_rc:
@@ -550,7 +729,6 @@ Use /today to begin your first challenge! 🚀
     async def quiz_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /quiz command - practice 3 RCs in a row."""
         user_id = update.message.from_user.id
-        user_name = update.message.from_user.full_name
         difficulty = self.user_difficulty.get(user_id, DEFAULT_DIFFICULTY)
 
         quiz_msg = """
@@ -563,34 +741,120 @@ Generating RCs...
         """
         await update.message.reply_text(quiz_msg, parse_mode="Markdown")
 
-        # Generate 3 RCs
-        for i in range(3):
-            try:
-                # Track user
-                self.analytics.track_user(user_id, user_name, difficulty)
-
-                # Generate RC
-                rc_data = self.generator.generate_daily_rc(difficulty)
-                is_valid, message = self.generator.validate_rc(rc_data)
+        # Serve from the pre-generated pool while the rest generate concurrently,
+        # and send each generated RC as soon as it is ready
+        pooled = self.pool.take(difficulty, 3)
+        ready: asyncio.Queue = asyncio.Queue()
+        producer = None
+        if len(pooled) < 3:
+            producer = asyncio.create_task(self._generate_quiz_rcs(3 - len(pooled), difficulty, ready))
+
+        # Signatures of the RCs in this quiz: concurrent candidates are only
+        # checked against served passages, not against each other
+        chosen = []
+        repeats = 0
+        rounds = 1
+        delivered = 0
+        try:
+            for rc_data in pooled:
+                if await self._repeats_quiz_rc(rc_data, chosen):
+                    repeats += 1
+                    continue
+                delivered += 1
+                await self._send_quiz_rc(update, rc_data, delivered, difficulty, chosen[-1])
+
+            while True:
+                if producer is None:
+                    # Round finished (pooled or generated): replace repeated passages,
+                    # a bounded number of times
+                    if not (repeats and delivered < 3 and rounds < DEDUP_MAX_ATTEMPTS):
+                        break
+                    rounds += 1
+                    producer = asyncio.create_task(
+                        self._generate_quiz_rcs(min(repeats, 3 - delivered), difficulty, ready)
+                    )
+                    repeats = 0
+
+                item = await ready.get()
+                if item is None:
+                    producer = None
+                    continue
+                if isinstance(item, Exception):
+                    await update.message.reply_text(f"❌ Error generating RC {delivered + 1}: {str(item)}")
+                    continue
 
+                is_valid, message = self.generator.validate_rc(item)
                 if not is_valid:
-                    await update.message.reply_text(f"⚠️ Error generating RC {i+1}: {message}")
+                    await update.message.reply_text(f"⚠️ Error generating RC: {message}")
+                    continue
+                if await self._repeats_quiz_rc(item, chosen):
+                    repeats += 1
                     continue
 
-                passage = rc_data["passage"]
-                topic = rc_data["topic"]
-                questions = rc_data["questions"]
-                difficulty_name = DIFFICULTY_LEVELS[difficulty]["name"]
+                delivered += 1
+                await self._send_quiz_rc(update, item, delivered, difficulty, chosen[-1])
+        finally:
+            if producer:
+                producer.cancel()
+
+        if delivered < 3:
+            await update.message.reply_text(f"⚠️ Only {delivered} of 3 RCs could be prepared for this quiz.")
+
+        # Completion message
+        completion_msg = """
+✅ *Quiz Complete!*
+
+Use /answer to check answers for today's main RC.
+Use /mystats to see your progress.
+
+Great job completing the quiz! 🎉
+        """
+        await update.message.reply_text(completion_msg, parse_mode="Markdown")
+
+    async def _generate_quiz_rcs(self, count: int, difficulty: str, ready: asyncio.Queue):
+        """Put `count` generated RCs (or the error that stopped them) on `ready`, then None."""
+        try:
+            async for rc_data in self.generator.agenerate_many(count, difficulty):
+                await ready.put(rc_data)
+        except Exception as e:
+            await ready.put(e)
+        finally:
+            ready.put_nowait(None)
+
+    async def _repeats_quiz_rc(self, rc_data: Dict, chosen: List) -> bool:
+        """
+        True if the RC's passage is too similar to one already in this quiz;
+        otherwise its signature is appended to `chosen`.
+        """
+        signature = await self.generator.asignature(rc_data["passage"])
+        if any(signature_similarity(signature, other) >= DEDUP_THRESHOLD for other in chosen):
+            print("[WARN] Quiz RC repeats a passage already in this quiz, skipping")
+            return True
+        chosen.append(signature)
+        return False
+
+    async def _send_quiz_rc(self, update: Update, rc_data: Dict, index: int, difficulty: str,
+                            signature=None) -> None:
+        """Send one quiz RC (passage and questions), track the attempt and record it as served."""
+        try:
+            # Track user
+            user = update.message.from_user
+            self.analytics.track_user(user.id, user.full_name, difficulty)
 
-                # Send passage
-                passage_msg = f"""
-🎯 *RC {i+1}/3*
+            passage = rc_data["passage"]
+            topic = rc_data["topic"]
+            questions = rc_data["questions"]
+            difficulty_name = DIFFICULTY_LEVELS[difficulty]["name"]
+
+            # Send passage
+            passage_msg = f"""
+🎯 *RC {index}/3*
 
 📌 *Topic:* {topic}
 🔥 *Level:* {difficulty_name}
 
 ━━━━━━━━━━━━━━━━━━━━━
-*PASSAGE* ({len(passage.split())} words)
+*PASSAGE* ({PassageStats.from_rc(rc_data).word_count} words)
 ━━━━━━━━━━━━━━━━━━━━━
 
 {passage}
@@ -598,33 +862,23 @@ Generating RCs...
 ━━━━━━━━━━━━━━━━━━━━━
 *QUESTIONS*
 ━━━━━━━━━━━━━━━━━━━━━
-                """
-                await update.message.reply_text(passage_msg, parse_mode="Markdown")
+            """
+            await update.message.reply_text(passage_msg, parse_mode="Markdown")
 
-                # Send each question
-                for j, q in enumerate(questions, 1):
-                    question_msg = f"""
+            # Send each question
+            for j, q in enumerate(questions, 1):
+                question_msg = f"""
 *Q{j}. {q['type'].upper()}*
 
 {q['question']}
 
 {chr(10).join(q['options'])}
-                    """
-                    await update.message.reply_text(question_msg, parse_mode="Markdown")
-
-            except Exception as e:
-                await update.message.reply_text(f"❌ Error generating RC {i+1}: {str(e)}")
-
-        # Completion message
-        completion_msg = """
-✅ *Quiz Complete!*
-
-Use /answer to check answers for today's main RC.
-Use /mystats to see your progress.
+                """
+                await update.message.reply_text(question_msg, parse_mode="Markdown")
 
-Great job completing the quiz! 🎉
-        """
-        await update.message.reply_text(completion_msg, parse_mode="Markdown")
+            await self.generator.amark_served(rc_data, signature)
+        except Exception as e:
+            await update.message.reply_text(f"❌ Error sending RC {index}: {str(e)}")
 
     async def admin_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /adminstats command - admin only."""
@@ -634,6 +888,10 @@ Great job completing the quiz! 🎉
             await update.message.reply_text("❌ You don't have admin access.")
             return
 
+        if context.args and context.args[0].lower() == "history":
+            await self._admin_history(update, context.args[1:])
+            return
+
         stats = self.analytics.get_stats_summary()
 
         # Format top users
@@ -641,6 +899,12 @@ Great job completing the quiz! 🎉
         for i, user in enumerate(stats["top_users"], 1):
             top_users_text += f"{i}. {user.get('user_name', 'Unknown')} - {user.get('total_rcs', 0)} RCs\n"
 
+        logs_text = ""
+        for name, log in (("analytics", self.analytics.events), ("feedback", self.feedback_log)):
+            log_stats = log.stats()
+            logs_text += (f"{name}: {log_stats['written']} written, {log_stats['dropped']} dropped, "
+                          f"{log_stats['queued']} queued, {log_stats['disk_bytes'] / 1024 / 1024:.1f} MB\n")
+
         admin_msg = f"""
 📊 *ADMIN ANALYTICS DASHBOARD*
 
@@ -653,12 +917,189 @@ Great job completing the quiz! 🎉
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 *Top 5 Most Active Users:*
 {top_users_text}
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+*Event Logs:*
+{logs_text}
 
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         """
         await update.message.reply_text(admin_msg, parse_mode="Markdown")
 
+    def _analytics_history(self, days: int) -> Tuple[Dict, float]:
+        """Compact any newly closed log segments, then query the last `days` days."""
+        self.analytics.partitions.compact(self.analytics.events)
+        return history_summary(days, self.analytics.partitions)
+
+    async def _admin_history(self, update: Update, args: List[str]) -> None:
+        """/adminstats history [days]: trends from the compacted analytics store."""
+        try:
+            days = int(args[0]) if args else 30
+        except ValueError:
+            await update.message.reply_text("Usage: /adminstats history [days]")
+            return
+        days = min(max(days, 1), 365)
+
+        # Compaction and loading touch disk; keep them off the event loop
+        history, elapsed_ms = await asyncio.to_thread(self._analytics_history, days)
+        if not history["events"]:
+            await update.message.reply_text(
+                f"No compacted analytics for the last {days} days yet. "
+                "Events are compacted once their log segment is rotated (daily)."
+            )
+            return
+
+        def sparkline(values: List[int]) -> str:
+            peak = max(values) or 1
+            return "".join("▁▂▃▄▅▆▇█"[value * 7 // peak] for value in values)
+
+        dau, wau = history["dau"], history["wau"]
+        recent = "\n".join(
+            f"{day[5:]}  DAU {d:>5}  WAU {w:>5}"
+            for day, d, w in list(zip(history["days"], dau, wau))[-7:]
+        )
+        total = sum(history["difficulty_mix"].values()) or 1
+        mix = "\n".join(
+            f"{DIFFICULTY_LEVELS.get(name, {}).get('name', name)}: {count / total:.0%} of RCs, "
+            f"avg DAU {sum(history['dau_by_difficulty'][name]) / len(dau):.1f}"
+            for name, count in sorted(history["difficulty_mix"].items(), key=lambda item: -item[1]) if count
+        )
+        hours = history["hours"]
+        busiest = ", ".join(f"{hour:02d}:00" for hour in sorted(range(24), key=lambda h: -hours[h])[:3])
+
+        history_msg = f"""
+📈 *ANALYTICS HISTORY* ({days} days to {history['days'][-1]})
+
+*Daily active users:* avg {sum(dau) / len(dau):.1f}, peak {max(dau)}
+`{sparkline(dau)}`
+*Weekly active users (latest):* {wau[-1]}
+
+```
+{recent}
+```
+*Difficulty mix:*
+{mix}
+
+*Hour of day* (busiest {busiest}):
+`{sparkline(hours)}`
+`00    06    12    18   23`
+
+_{history['events']} events, queried in {elapsed_ms:.0f} ms_
+        """
+        await update.message.reply_text(history_msg, parse_mode="Markdown")
+
+    async def api_status(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle /apistatus command - admin only."""
+        user_id = update.message.from_user.id
+
+        if not self._is_admin(user_id):
+            await update.message.reply_text("❌ You don't have admin access.")
+            return
+
+        status = self.generator.get_api_status()
+        breaker = status["breaker"]
+        state_icon = {"closed": "🟢", "half_open": "🟡", "open": "🔴"}.get(breaker["state"], "⚪")
+
+        cache = status["cache"]
+        cache_text = "Disabled"
+        if cache:
+            cache_text = (
+                f"{cache['entries']} entries, {cache['hits']} hits / {cache['misses']} misses "
+                f"({cache['hit_rate']:.0%}), {cache['evictions']} evicted"
+            )
+
+        today = datetime.now().date().isoformat()
+        generating = [DIFFICULTY_LEVELS[d]["name"] for d in DIFFICULTY_LEVELS
+                      if self.today_flight.in_flight((today, d))]
+
+        router = status["router"]
+        router_text = ""
+        for target in router["targets"]:
+            latency = f"{target['ewma_latency']:.1f}s" if target["ewma_latency"] is not None else "n/a"
+            p95 = f"{target['p95']:.1f}s" if target["p95"] is not None else "n/a"
+            cooling = " (cooling down)" if target["cooling_down"] else ""
+            router_text += (
+                f"{target['rank'] + 1}. {target['target']}{cooling}\n"
+                f"   EWMA {latency}, p95 {p95}, errors {target['ewma_error']:.0%}, "
+                f"{target['calls']} calls\n"
+            )
+
+        status_msg = f"""
+🩺 API STATUS
+
+Model: {status['model']}
+API enabled: {'Yes' if status['use_api'] else 'No (fallback only)'}
+
+Circuit: {state_icon} {breaker['state']}
+Consecutive failures: {breaker['consecutive_failures']}
+Calls: {breaker['calls']} (✅ {breaker['successes']} / ❌ {breaker['failures']})
+Rejected while open: {breaker['rejections']}
+Times opened: {breaker['times_opened']}
+Next probe in: {breaker['retry_in']:.0f}s
+Last error: {breaker['last_error'] or 'None'}
+
+Targets:
+{router_text}Hedged requests: {router['hedges']} ({router['hedge_wins']} won){'' if router['hedge_enabled'] else ' - hedging off'}
+
+Response cache: {cache_text}
+Generating today's RC: {', '.join(generating) or 'None'}
+        """
+        # Plain text: error messages can contain Markdown control characters
+        await update.message.reply_text(status_msg)
+
+    async def llm_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle /llmstats [hours] and /llmstats export [hours] - admin only."""
+        user_id = update.message.from_user.id
+
+        if not self._is_admin(user_id):
+            await update.message.reply_text("❌ You don't have admin access.")
+            return
+
+        metrics = self.generator.metrics
+        if not metrics:
+            await update.message.reply_text("LLM metrics are only recorded when the API is enabled.")
+            return
+
+        args = list(context.args or [])
+        export = bool(args) and args[0].lower() == "export"
+        if export:
+            args = args[1:]
+        try:
+            hours = float(args[0]) if args else None
+        except ValueError:
+            await update.message.reply_text("Usage: /llmstats [hours] or /llmstats export [hours]")
+            return
+
+        if export:
+            await update.message.reply_document(
+                document=metrics.export_csv(hours).encode("utf-8"),
+                filename=f"llm_metrics_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+            )
+            return
+
+        def fmt(value, spec):
+            return format(value, spec) if value is not None else "n/a"
+
+        sections = ""
+        for name, group in metrics.summary(hours).items():
+            outcomes = ", ".join(f"{k} {v}" for k, v in sorted(group["outcomes"].items())) or "none"
+            sections += (
+                f"\n{name.upper()}: {group['calls']} calls ({group['cached']} cached)\n"
+                f"   Outcomes: {outcomes}\n"
+                f"   RCs from cache: {group['cached_rcs']}\n"
+                f"   Latency p50 {fmt(group['latency_p50'], '.1f')}s, p95 {fmt(group['latency_p95'], '.1f')}s\n"
+                f"   Tokens/RC: {fmt(group['prompt_tokens_per_rc'], '.0f')} prompt, "
+                f"{fmt(group['completion_tokens_per_rc'], '.0f')} completion\n"
+            )
+
+        window = f"last {hours:g}h" if hours else f"last {metrics.max_rows} calls"
+        stats_msg = f"""
+📈 LLM USAGE ({window})
+{sections}
+Tokens/RC counts every attempt (including rejected and duplicate ones) against accepted and truncated RCs; cached RCs cost no tokens and are not counted.
+        """
+        await update.message.reply_text(stats_msg)
+
     async def verify_admin(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /verify_admin command - debug admin access."""
         user_id = update.message.from_user.id
@@ -706,14 +1147,12 @@ Your input helps us improve the bot. Thank you! 🙏
         user_name = update.message.from_user.full_name
 
         # Save feedback
-        feedback_log = f"{self.data_dir}/feedback.jsonl"
-        with open(feedback_log, "a") as f:
-            f.write(json.dumps({
-                "timestamp": timestamp,
-                "user_id": user_id,
-                "user_name": user_name,
-                "feedback": feedback_text
-            }) + "\n")
+        self.feedback_log.write({
+            "timestamp": timestamp,
+            "user_id": user_id,
+            "user_name": user_name,
+            "feedback": feedback_text
+        })
 
         await update.message.reply_text(
             "✅ Thank you for your feedback! We'll review it to improve the bot."
@@ -721,7 +1160,13 @@ Your input helps us improve the bot. Thank you! 🙏
 
     def get_application(self) -> Application:
         """Create and configure the Telegram bot application."""
-        app = Application.builder().token(self.token).build()
+        app = (
+            Application.builder()
+            .token(self.token)
+            .post_init(lambda _app: self.startup())
+            .post_shutdown(lambda _app: self.shutdown())
+            .build()
+        )
 
         # Command handlers
         app.add_handler(CommandHandler("start", self.start))
@@ -733,6 +1178,8 @@ Your input helps us improve the bot. Thank you! 🙏
         app.add_handler(CommandHandler("mystats", self.mystats_command))
         app.add_handler(CommandHandler("quiz", self.quiz_command))
         app.add_handler(CommandHandler("adminstats", self.admin_stats))
+        app.add_handler(CommandHandler("apistatus", self.api_status))
+        app.add_handler(CommandHandler("llmstats", self.llm_stats))
         app.add_handler(CommandHandler("verify_admin", self.verify_admin))
         app.add_handler(CommandHandler("feedback", self.feedback_command))
 
@@ -18,11 +18,49 @@ HF_MODEL = os.getenv("HF_MODEL", "mistralai/Mistral-7B-Instruct-v0.2")
 # - "NousResearch/Nous-Hermes-2-Mistral-7B-DPO"
 # - "meta-llama/Llama-2-7b-chat-hf" (requires access request)
 # - "HuggingFaceH4/zephyr-7b-beta"
+HF_PROVIDER = os.getenv("HF_PROVIDER", "featherless-ai")
+# Ranked "model:provider" targets, comma-separated; calls go to the fastest healthy one
+HF_TARGETS = os.getenv("HF_TARGETS", f"{HF_MODEL}:{HF_PROVIDER}")
+HF_HEDGE_ENABLED = os.getenv("HF_HEDGE_ENABLED", "False").lower() == "true"  # Race a 2nd target past p95
+HF_HEDGE_DEFAULT_DELAY = 15.0  # Seconds before hedging while a target has too few samples for a p95
+ROUTER_EWMA_ALPHA = 0.3
+ROUTER_FAILURE_THRESHOLD = 3  # Consecutive failures before a target cools down
+ROUTER_COOLDOWN_SECONDS = 30.0
+HF_BASE_URL = os.getenv("HF_BASE_URL", "https://router.huggingface.co/v1")
+HF_TIMEOUT = float(os.getenv("HF_TIMEOUT", "60"))  # Seconds per API call
+# Stream completions and stop at the difficulty's max word count (saves tokens, shows live progress)
+HF_STREAMING = os.getenv("HF_STREAMING", "False").lower() == "true"
+HF_STREAM_UPDATE_INTERVAL = 1.5  # Seconds between live Telegram message edits
+# Ask for passage + questions + explanations as one JSON response (takes precedence over streaming)
+HF_STRUCTURED_OUTPUT = os.getenv("HF_STRUCTURED_OUTPUT", "False").lower() == "true"
+HF_PASSAGE_MAX_TOKENS = 800
+# Ask for N passage candidates in one call and keep the best-scoring one (non-streaming passage path)
+HF_BEST_OF = int(os.getenv("HF_BEST_OF", "1"))
+# Retries with jittered exponential backoff, bounded by an overall budget per generation
+HF_MAX_RETRIES = int(os.getenv("HF_MAX_RETRIES", "2"))
+HF_RETRY_BASE_DELAY = 1.0  # Seconds
+HF_RETRY_MAX_DELAY = 8.0  # Seconds
+HF_LATENCY_BUDGET = float(os.getenv("HF_LATENCY_BUDGET", "90"))  # Seconds across all API calls of one generation
+# Circuit breaker: skip the API (use fallback passages) after repeated failures, probe again later
+HF_BREAKER_FAILURE_THRESHOLD = int(os.getenv("HF_BREAKER_FAILURE_THRESHOLD", "5"))
+HF_BREAKER_RESET_SECONDS = float(os.getenv("HF_BREAKER_RESET_SECONDS", "60"))
+HF_STRUCTURED_MAX_TOKENS = 2000
+
+# LLM response cache (data/llm_cache.sqlite3)
+# "reuse" serves cached responses, "refresh" always calls the API but stores results, "off" disables
+LLM_CACHE_POLICY = os.getenv("LLM_CACHE_POLICY", "reuse").lower()
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "24"))
+
+# Per-call token/latency/outcome accounting (rolling window of the most recent calls)
+LLM_METRICS_MAX_ROWS = int(os.getenv("LLM_METRICS_MAX_ROWS", "5000"))
 
 # RC Generation Parameters
 RC_PASSGE_WORD_COUNT = (420, 520)  # Min, Max
 RC_NUM_QUESTIONS = 4
 RC_OPTIONS_PER_QUESTION = 4
+# Build passage-specific questions locally (TF-IDF) when the LLM doesn't supply them
+LOCAL_QUESTIONS = os.getenv("LOCAL_QUESTIONS", "True").lower() == "true"
 
 # Topics rotation
 RC_TOPICS = [
@@ -45,27 +83,90 @@ DIFFICULTY_LEVELS = {
     "gmat": {
         "name": "GMAT 700+",
         "word_range": (420, 520),
-        "description": "Ultra-dense abstract prose with complex nested sentences"
+        "description": "Ultra-dense abstract prose with complex nested sentences",
+        # Style spec used to score best-of-N candidates (mirrors the prompt's rules)
+        "sentence_words": (15, 25),
+        "lexical_density": 0.6,
+        "paragraphs": 4
     },
     "cat": {
         "name": "CAT Advanced",
         "word_range": (380, 480),
-        "description": "Dense academic content with implicit author stance"
+        "description": "Dense academic content with implicit author stance",
+        # Style spec used to score best-of-N candidates (mirrors the prompt's rules)
+        "sentence_words": (12, 18),
+        "lexical_density": 0.55,
+        "paragraphs": 4
     },
     "sbi": {
         "name": "SBI/IBPS PO",
         "word_range": (250, 350),
-        "description": "Moderate difficulty with clear structure and business/HR topics"
+        "description": "Moderate difficulty with clear structure and business/HR topics",
+        # Style spec used to score best-of-N candidates (mirrors the prompt's rules)
+        "sentence_words": (10, 15),
+        "lexical_density": 0.5,
+        "paragraphs": 4
     }
 }
 
+# Offline passages used when the API is unavailable (JSONL: difficulty, topic, passage)
+FALLBACK_CORPUS_PATH = os.getenv(
+    "FALLBACK_CORPUS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "fallback_passages.jsonl")
+)
+
+# Near-duplicate rejection (MinHash similarity against every passage already served)
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.5"))  # Estimated Jaccard similarity
+DEDUP_MAX_ATTEMPTS = 3  # Candidates to try before serving the least similar one
+
 # Default difficulty
 DEFAULT_DIFFICULTY = "gmat"
 
+# /today latency budget: past this many seconds a provisional RC (pool or offline corpus)
+# is sent while generation finishes in the background; 0 waits indefinitely
+TODAY_DEADLINE_SECONDS = float(os.getenv("TODAY_DEADLINE_SECONDS", "8"))
+# Edit the provisional messages in place once the real RC is ready
+TODAY_UPGRADE_EDIT = os.getenv("TODAY_UPGRADE_EDIT", "True").lower() == "true"
+
+# Pre-generated RC pool (serves /quiz without waiting on the LLM)
+RC_POOL_HIGH_WATERMARK = int(os.getenv("RC_POOL_HIGH_WATERMARK", "6"))  # Fill up to this many per difficulty
+RC_POOL_LOW_WATERMARK = int(os.getenv("RC_POOL_LOW_WATERMARK", "3"))  # Start refilling below this
+RC_POOL_REFILL_INTERVAL = 300  # Seconds between idle refill checks
+
+# Maximum concurrent LLM generations for batch requests (/quiz, pool refills)
+RC_MAX_CONCURRENCY = int(os.getenv("RC_MAX_CONCURRENCY", "3"))
+
+# Worker processes for CPU-bound generation stages (scoring, dedup, local questions); 0 = inline
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+
+# Offline bulk pre-generation (python main.py pregen)
+PREGEN_DAYS = 30
+PREGEN_WORKERS = int(os.getenv("PREGEN_WORKERS", "2"))  # Processes for validation, scoring and dedup
+PREGEN_CANDIDATES = max(1, int(os.getenv("PREGEN_CANDIDATES", "2")))  # Novel RCs per slot; highest quality kept
+PREGEN_CHECKPOINT_PATH = "data/pregen_checkpoint.jsonl"
+RC_ARCHIVE_PATH = os.getenv("RC_ARCHIVE_PATH", "data/rc_archive.json.gz")  # Served by /today when present
+
 # Scheduling
 DAILY_SEND_TIME = "08:00"  # 8 AM in the user's timezone (HH:MM format in UTC)
 TIMEZONE = "UTC"
 
+# User analytics storage: "sqlite" (per-row upserts, imports users.json on first use) or "json"
+USER_STORE_BACKEND = os.getenv("USER_STORE_BACKEND", "sqlite").lower()
+# JSON backend write-behind: flush users.json every N seconds, or sooner past this many dirty users
+USER_FLUSH_INTERVAL = float(os.getenv("USER_FLUSH_INTERVAL", "5"))
+USER_FLUSH_THRESHOLD = int(os.getenv("USER_FLUSH_THRESHOLD", "500"))
+
+# Event logs (analytics.jsonl, feedback.jsonl): batched background writes, rotated by day or size
+EVENT_LOG_ROTATE_MB = float(os.getenv("EVENT_LOG_ROTATE_MB", "50"))
+EVENT_LOG_RETENTION_DAYS = int(os.getenv("EVENT_LOG_RETENTION_DAYS", "90"))  # Analytics segments only
+EVENT_LOG_MAX_MB = float(os.getenv("EVENT_LOG_MAX_MB", "500"))  # Per log, oldest segments go first
+EVENT_LOG_COMPRESS = os.getenv("EVENT_LOG_COMPRESS", "True").lower() == "true"
+EVENT_LOG_QUEUE_SIZE = int(os.getenv("EVENT_LOG_QUEUE_SIZE", "10000"))  # Events dropped past this backlog
+EVENT_LOG_FLUSH_INTERVAL = 1.0  # Seconds the writer waits for more events before idling
+
+# Day-partitioned NumPy copy of closed analytics segments (python main.py compact, /adminstats history)
+ANALYTICS_PARTITIONS_DIR = os.getenv("ANALYTICS_PARTITIONS_DIR", "data/analytics_parts")
+
 # Admin access
 admin_ids_str = os.getenv("ADMIN_USER_IDS", "").strip()
 if admin_ids_str:
@@ -77,7 +178,5 @@ if admin_ids_str:
 else:
     ADMIN_USER_IDS = []
 
-print(f"[INFO] Admin users loaded: {ADMIN_USER_IDS}")
-
 # Logging
 DEBUG_MODE = os.getenv("DEBUG_MODE", "False").lower() == "true"
@@ -0,0 +1,86 @@
+"""
+Process pool for CPU-bound text work: candidate scoring, MinHash signatures,
+local question generation and fallback retrieval. The event loop serving
+Telegram only awaits results, so update handling stays responsive while
+generation uses every core. Workers are spawned and warmed up front.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, TypeVar
+from config import CPU_POOL_WORKERS
+
+T = TypeVar("T")
+
+
+def _warm_worker():
+    """Worker initializer: pay imports and corpus indexing once, not per task."""
+    import local_questions  # noqa: F401  (numpy, quality)
+    from fallback_corpus import get_corpus
+    try:
+        len(get_corpus())  # Maps and indexes the corpus, TF-IDF matrix included
+    except (OSError, ValueError) as e:
+        print(f"[WARN] CPU worker could not preload fallback corpus: {e}")
+
+
+def _ready() -> bool:
+    return True
+
+
+class CPUPool:
+    """ProcessPoolExecutor wrapper; runs tasks inline when disabled or not started."""
+
+    def __init__(self, workers: int = CPU_POOL_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    async def start(self, workers: Optional[int] = None):
+        """Spawn and warm the workers. With 0 workers, tasks run inline."""
+        if workers is not None:
+            self.workers = workers
+        if self._executor or self.workers <= 0:
+            return
+        # spawn, not fork: the parent has live threads (SQLite, asyncio) that fork would copy mid-state
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker,
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _ready) for _ in range(self.workers)))
+        print(f"[OK] CPU pool started with {self.workers} workers")
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """Run fn(*args) in a worker (inline if the pool is off). `fn` and args must pickle."""
+        if self._executor is None:
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); don't take generation down with it
+            print("[WARN] CPU pool broken, running inline until restarted")
+            self._executor = None
+            return fn(*args)
+
+    async def stop(self):
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[CPUPool] = None
+
+
+def get_cpu_pool() -> CPUPool:
+    """Process-wide pool shared by the generator, bot and pregen."""
+    global _pool
+    if _pool is None:
+        _pool = CPUPool()
+    return _pool
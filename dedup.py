@@ -0,0 +1,174 @@
+"""
+Near-duplicate passage detection with MinHash signatures and an LSH index.
+Signatures are appended to a flat binary file, so the index persists across
+restarts, loads with a single read and costs 4 bytes per hash per passage.
+"""
+import os
+import re
+import threading
+import zlib
+from typing import Dict, List, Set, Tuple
+import numpy as np
+
+_WORD = re.compile(r"[a-z0-9']+")
+_PRIME = np.uint64(4294967311)  # Smallest prime above 2**32
+_MASK = np.uint64(0xFFFFFFFF)
+_LOW16 = np.uint64(0xFFFF)
+_SHIFT16 = np.uint64(16)
+
+
+def _mulmod(a: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    (a * x) % _PRIME for uint64 operands below _PRIME, without uint64
+    wraparound: a is split into 16-bit halves so no partial product or sum
+    exceeds 2**50.
+    """
+    high = ((a >> _SHIFT16) * x) % _PRIME
+    return ((high << _SHIFT16) + (a & _LOW16) * x) % _PRIME
+
+
+class MinHasher:
+    """MinHash signatures over lower-cased word shingles."""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Fixed seed: signatures must stay comparable across processes and restarts
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> Set[str]:
+        """Lower-cased word shingles, the sets whose Jaccard similarity signatures estimate."""
+        words = _WORD.findall(text.lower())
+        n = self.shingle_size
+        return {" ".join(words[i:i + n]) for i in range(max(1, len(words) - n + 1))}
+
+    def signature(self, text: str) -> np.ndarray:
+        shingles = self.shingles(text)
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        # (num_perm, num_shingles) universal hashes, min over shingles
+        permuted = (_mulmod(self._a[:, None], hashes[None, :]) + self._b[:, None]) % _PRIME
+        return (permuted.min(axis=1) & _MASK).astype(np.uint32)
+
+
+def signature_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two passages from their signatures."""
+    return float((a == b).mean())
+
+
+class PassageIndex:
+    """MinHash/LSH index over every passage the bot has generated."""
+
+    def __init__(self, path: str = "data/passage_index.bin", num_perm: int = 64,
+                 bands: int = 16, shingle_size: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.path = path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._count = 0
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        raw = np.fromfile(self.path, dtype=np.uint32)
+        usable = len(raw) - len(raw) % self.num_perm  # Ignore a torn final write
+        signatures = raw[:usable].reshape(-1, self.num_perm)
+        self._signatures = np.array(signatures)
+        self._count = len(signatures)
+        for i, signature in enumerate(signatures):
+            self._index(i, signature)
+
+    def _index(self, i: int, signature: np.ndarray):
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, []).append(i)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[b * self.rows:(b + 1) * self.rows].tobytes() for b in range(self.bands)]
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature over lower-cased word shingles."""
+        return self.hasher.signature(text)
+
+    def most_similar(self, text: str) -> Tuple[float, int]:
+        """Estimated Jaccard similarity to the closest indexed passage, and its index (-1 if none)."""
+        return self.match(self.signature(text))
+
+    def match(self, signature: np.ndarray) -> Tuple[float, int]:
+        """most_similar for a precomputed signature (e.g. from a worker process)."""
+        with self._lock:
+            return self._match(signature)
+
+    def _match(self, signature: np.ndarray) -> Tuple[float, int]:
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(key, ()))
+        if not candidates:
+            return 0.0, -1
+
+        ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarities = (self._signatures[ids] == signature).mean(axis=1)
+        best = int(similarities.argmax())
+        return float(similarities[best]), int(ids[best])
+
+    def similarity(self, text: str) -> float:
+        return self.most_similar(text)[0]
+
+    def add(self, text: str) -> bool:
+        """
+        Index a passage and append its signature to disk. A signature that is
+        already indexed is skipped (returns False), so re-serving a passage
+        never grows the index.
+        """
+        return self.add_signature(self.signature(text))
+
+    def add_signature(self, signature: np.ndarray) -> bool:
+        """add for a precomputed signature."""
+        with self._lock:
+            if self._match(signature)[0] >= 1.0:
+                return False
+            self._append(signature)
+        return True
+
+    def add_if_novel(self, signature: np.ndarray, threshold: float) -> Tuple[bool, float]:
+        """
+        Add `signature` unless an indexed passage is at least `threshold`
+        similar; returns (added, similarity). The check and the add share one
+        lock, so two concurrent near-duplicates cannot both pass a stale match.
+        """
+        with self._lock:
+            similarity = self._match(signature)[0]
+            if similarity >= threshold:
+                return False, similarity
+            self._append(signature)
+        return True, similarity
+
+    def _append(self, signature: np.ndarray):
+        """Index and persist a signature; the caller holds the lock."""
+        if self._count == len(self._signatures):
+            # Grow geometrically so adds stay amortised O(1)
+            grown = np.empty((max(64, 2 * self._count), self.num_perm), dtype=np.uint32)
+            grown[:self._count] = self._signatures[:self._count]
+            self._signatures = grown
+        self._signatures[self._count] = signature
+        self._index(self._count, signature)
+        self._count += 1
+
+        index_dir = os.path.dirname(self.path)
+        if index_dir and not os.path.exists(index_dir):
+            os.makedirs(index_dir)
+        with open(self.path, "ab") as f:
+            f.write(signature.tobytes())
+
+    def __len__(self) -> int:
+        return self._count
@@ -0,0 +1,268 @@
+"""
+Buffered JSONL event log with rotation.
+Handlers hand events to an in-memory queue and return at once; a background
+thread writes them in batches. The active file keeps its plain name
+(e.g. analytics.jsonl) and is rotated into dated segments by day or size.
+Closed segments are optionally gzipped and pruned by age and total size.
+"""
+import atexit
+import glob
+import gzip
+import json
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+from config import (
+    EVENT_LOG_ROTATE_MB, EVENT_LOG_RETENTION_DAYS, EVENT_LOG_MAX_MB, EVENT_LOG_COMPRESS,
+    EVENT_LOG_QUEUE_SIZE, EVENT_LOG_FLUSH_INTERVAL
+)
+
+# Largest number of events written per batch
+BATCH_SIZE = 1000
+
+
+class _FlushRequest:
+    """Queue marker: set once every event queued before it is on disk."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class EventLogWriter:
+    """
+    Non-blocking appender for one JSONL log.
+    `write` never blocks: when the queue is full the event is dropped and
+    counted, so a slow disk shows up in stats() instead of stalling handlers.
+    `retention_days=None` keeps segments forever (subject to `max_mb`).
+    `on_prune(writer)` runs on the writer thread before segments are pruned,
+    e.g. to compact them elsewhere; if it raises, nothing is pruned that time.
+    """
+
+    def __init__(self, path: str, rotate_mb: float = EVENT_LOG_ROTATE_MB,
+                 retention_days: Optional[int] = EVENT_LOG_RETENTION_DAYS,
+                 max_mb: Optional[float] = EVENT_LOG_MAX_MB, compress: bool = EVENT_LOG_COMPRESS,
+                 queue_size: int = EVENT_LOG_QUEUE_SIZE, flush_interval: float = EVENT_LOG_FLUSH_INTERVAL,
+                 on_prune: Optional[Callable[["EventLogWriter"], object]] = None):
+        self.path = path
+        self.rotate_bytes = int(rotate_mb * 1024 * 1024)
+        self.retention_days = retention_days
+        self.max_bytes = int(max_mb * 1024 * 1024) if max_mb else None
+        self.compress = compress
+        self.flush_interval = flush_interval
+        self.on_prune = on_prune
+
+        self._stem, self._ext = os.path.splitext(path)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._file = None
+        self._segment_day: Optional[str] = None
+
+        # Metrics
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.rotations = 0
+        self.max_queue_depth = 0
+        self.last_batch_ms = 0.0
+        self.errors = 0
+
+        log_dir = os.path.dirname(path)
+        if log_dir and not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=f"event-log:{os.path.basename(self.path)}",
+                                            daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def write(self, event: Dict) -> bool:
+        """Queue one event; returns False if it was dropped because the queue is full."""
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                print(f"[WARN] Event log {self.path} queue full, {self.dropped} events dropped so far")
+            return False
+        self.enqueued += 1
+        depth = self._queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+        return True
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """Block until everything queued so far is written; False on timeout."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        request = _FlushRequest()
+        self._queue.put(request)
+        return request.done.wait(timeout)
+
+    def close(self):
+        """Write what is queued and stop the writer thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(None)
+        thread.join()
+
+    def stats(self) -> Dict:
+        """Counters for monitoring: throughput, drops (backpressure) and disk usage."""
+        segments = self.segments()
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batches,
+            "last_batch_ms": self.last_batch_ms,
+            "rotations": self.rotations,
+            "errors": self.errors,
+            "segments": len(segments),
+            "disk_bytes": sum(size for _, _, size in segments) + self._active_size(),
+        }
+
+    # Writer thread
+
+    def _run(self):
+        running = True
+        while running:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch, waiters = [], []
+            while True:
+                if item is None:
+                    running = False
+                elif isinstance(item, _FlushRequest):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if not running or len(batch) >= BATCH_SIZE:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write_batch(batch)
+            for waiter in waiters:
+                waiter.done.set()
+
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _write_batch(self, batch: List[Dict]):
+        start = time.perf_counter()
+        try:
+            self._maybe_rotate()
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write("".join(json.dumps(event) + "\n" for event in batch))
+            self._file.flush()
+            self.written += len(batch)
+            self.batches += 1
+        except (OSError, TypeError, ValueError) as e:
+            self.errors += 1
+            print(f"[ERROR] Event log {self.path}: could not write {len(batch)} events: {e}")
+        self.last_batch_ms = (time.perf_counter() - start) * 1000
+
+    def _active_size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def _maybe_rotate(self):
+        """Close the active file into a segment when the day changes or it is too big."""
+        today = date.today().isoformat()
+        size = self._active_size()
+        if self._segment_day is None:
+            # Resume the day of an existing active file from before a restart
+            self._segment_day = (date.fromtimestamp(os.path.getmtime(self.path)).isoformat()
+                                 if size else today)
+        if size == 0 or (self._segment_day == today and size < self.rotate_bytes):
+            self._segment_day = today
+            return
+
+        if self._file:
+            self._file.close()
+            self._file = None
+        segment = self._segment_path(self._segment_day)
+        os.replace(self.path, segment)
+        if self.compress:
+            # Compress under a temporary name so readers never see a partial .gz
+            with open(segment, "rb") as src, gzip.open(f"{segment}.gz.tmp", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(f"{segment}.gz.tmp", f"{segment}.gz")
+            os.remove(segment)
+        self.rotations += 1
+        self._segment_day = today
+        self._prune()
+
+    def _segment_path(self, day: str) -> str:
+        """First unused name of the form analytics.<day>.<n>.jsonl."""
+        n = 0
+        while True:
+            candidate = f"{self._stem}.{day}.{n}{self._ext}"
+            if not os.path.exists(candidate) and not os.path.exists(f"{candidate}.gz"):
+                return candidate
+            n += 1
+
+    def segments(self) -> List[Tuple[str, str, int]]:
+        """Closed segments, oldest first, as (path, day, size)."""
+        pattern = re.compile(re.escape(os.path.basename(self._stem)) + r"\.(\d{4}-\d{2}-\d{2})\.(\d+)"
+                             + re.escape(self._ext) + r"(\.gz)?$")
+        found = []
+        for path in glob.glob(f"{glob.escape(self._stem)}.*{self._ext}*"):
+            match = pattern.match(os.path.basename(path))
+            if match:
+                found.append(((match.group(1), int(match.group(2))), path))
+        result = []
+        for (day, _), path in sorted(found):
+            try:
+                result.append((path, day, os.path.getsize(path)))
+            except OSError:
+                continue
+        return result
+
+    def _prune(self):
+        """Delete segments past the retention period, then oldest first over the size budget."""
+        if self.on_prune:
+            try:
+                self.on_prune(self)
+            except Exception as e:
+                self.errors += 1
+                print(f"[ERROR] Event log {self.path}: prune hook failed, keeping all segments: {e}")
+                return
+        segments = self.segments()
+        if self.retention_days is not None:
+            cutoff = date.fromordinal(date.today().toordinal() - self.retention_days).isoformat()
+            for path, day, _ in segments:
+                if day < cutoff:
+                    os.remove(path)
+            segments = [s for s in segments if s[1] >= cutoff]
+        if self.max_bytes:
+            total = sum(size for _, _, size in segments) + self._active_size()
+            for path, _, size in segments:
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= size
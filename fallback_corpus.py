@@ -0,0 +1,169 @@
+"""
+Offline fallback passage corpus.
+Passages live in a JSONL file (one {"difficulty", "topic", "passage"} object
+per line). The file is memory-mapped and indexed once on first use; after
+that, passages are read straight from the mapping on demand, so the corpus
+can grow to thousands of passages without holding their text in memory.
+Topics without an exact match are served the nearest passages by TF-IDF
+cosine similarity over a precomputed per-difficulty matrix.
+"""
+import json
+import mmap
+import random
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from quality import STOPWORDS
+from config import FALLBACK_CORPUS_PATH
+
+# (byte offset, byte length) of one line in the corpus file
+Span = Tuple[int, int]
+
+_TERM = re.compile(r"[a-z]+")
+# Terms are cut to this many letters, a crude stemmer that lets "Epistemology"
+# match "epistemic" and "Cultural anthropology" match "culture"
+STEM_LENGTH = 6
+MAX_FEATURES = 4096
+TOPIC_WEIGHT = 3  # A passage's own topic label counts this many times
+NEAREST_K = 3
+# Among the top k, skip passages scoring under this fraction of the best match
+NEAREST_MIN_RATIO = 0.5
+
+
+def _stems(text: str) -> List[str]:
+    return [t[:STEM_LENGTH] for t in _TERM.findall(text.lower()) if t not in STOPWORDS and len(t) > 2]
+
+
+class FallbackCorpus:
+    """Lazily loaded, (difficulty, topic)-indexed passage store."""
+
+    def __init__(self, path: str = FALLBACK_CORPUS_PATH):
+        self.path = path
+        self._mm: Optional[mmap.mmap] = None
+        self._by_key: Dict[Tuple[str, str], List[Span]] = {}
+        self._by_difficulty: Dict[str, List[Span]] = {}
+        # TF-IDF index: stem -> column, idf per column, unit-row matrix per difficulty
+        self._vocab: Dict[str, int] = {}
+        self._idf: Optional[np.ndarray] = None
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _ensure_index(self):
+        """Map the file and index line spans by (difficulty, topic), once."""
+        if self._mm is not None:
+            return
+        with self._lock:
+            if self._mm is not None:
+                return
+
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            offset = 0
+            size = len(mm)
+            stems: Dict[str, List[List[str]]] = {}
+            while offset < size:
+                end = mm.find(b"\n", offset)
+                if end == -1:
+                    end = size
+                if end > offset:
+                    entry = json.loads(mm[offset:end])
+                    span = (offset, end - offset)
+                    self._by_key.setdefault((entry["difficulty"], entry["topic"]), []).append(span)
+                    self._by_difficulty.setdefault(entry["difficulty"], []).append(span)
+                    stems.setdefault(entry["difficulty"], []).append(
+                        _stems(entry["topic"]) * TOPIC_WEIGHT + _stems(entry["passage"])
+                    )
+                offset = end + 1
+
+            self._build_vectors(stems)
+            self._mm = mm
+            print(f"[OK] Fallback corpus indexed ({sum(map(len, self._by_difficulty.values()))} passages)")
+
+    def _build_vectors(self, stems: Dict[str, List[List[str]]]):
+        """TF-IDF matrix per difficulty (rows aligned with _by_difficulty), L2-normalised."""
+        docs = [doc for tier in stems.values() for doc in tier]
+        if not docs:
+            return
+
+        df: Dict[str, int] = {}
+        for doc in docs:
+            for stem in set(doc):
+                df[stem] = df.get(stem, 0) + 1
+        # Keep the most widespread stems if the vocabulary outgrows MAX_FEATURES
+        kept = sorted(df, key=lambda stem: (-df[stem], stem))[:MAX_FEATURES]
+        self._vocab = {stem: i for i, stem in enumerate(kept)}
+        self._idf = np.log((1 + len(docs)) / (1 + np.array([df[stem] for stem in kept], dtype=np.float32))) + 1
+
+        for difficulty, tier in stems.items():
+            counts = np.zeros((len(tier), len(kept)), dtype=np.float32)
+            for row, doc in enumerate(tier):
+                cols = [self._vocab[stem] for stem in doc if stem in self._vocab]
+                np.add.at(counts[row], cols, 1.0)
+            self._vectors[difficulty] = self._normalise(counts * self._idf)
+
+    @staticmethod
+    def _normalise(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+    def nearest(self, difficulty: str, topic: str, k: int = NEAREST_K) -> List[Tuple[float, Span]]:
+        """Up to k (cosine similarity, span) pairs most related to `topic`, best first."""
+        self._ensure_index()
+        matrix = self._vectors.get(difficulty)
+        if matrix is None or not topic:
+            return []
+
+        query = np.zeros(len(self._vocab), dtype=np.float32)
+        np.add.at(query, [self._vocab[stem] for stem in _stems(topic) if stem in self._vocab], 1.0)
+        query = self._normalise(query * self._idf)
+        if not query.any():
+            return []
+
+        scores = matrix @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        spans = self._by_difficulty[difficulty]
+        return [(float(scores[i]), spans[i]) for i in top if scores[i] > 0]
+
+    def _read(self, span: Span) -> Dict:
+        offset, length = span
+        return json.loads(self._mm[offset:offset + length])
+
+    def get(self, difficulty: str, topic: Optional[str] = None) -> Optional[Dict]:
+        """
+        Random passage entry for (difficulty, topic). Topics with no passages of
+        their own get a random pick among the nearest ones; unrelated topics
+        get any passage of that difficulty. None if the tier is empty.
+        """
+        self._ensure_index()
+        spans = self._by_key.get((difficulty, topic))
+        if not spans and topic:
+            nearest = self.nearest(difficulty, topic)
+            spans = [span for score, span in nearest if score >= nearest[0][0] * NEAREST_MIN_RATIO]
+        spans = spans or self._by_difficulty.get(difficulty)
+        if not spans:
+            return None
+        return self._read(random.choice(spans))
+
+    def topics(self, difficulty: str) -> List[str]:
+        """Topics available for a difficulty."""
+        self._ensure_index()
+        return sorted({t for d, t in self._by_key if d == difficulty})
+
+    def __len__(self) -> int:
+        self._ensure_index()
+        return sum(len(spans) for spans in self._by_difficulty.values())
+
+
+_corpus: Optional[FallbackCorpus] = None
+
+
+def get_corpus() -> FallbackCorpus:
+    """Process-wide corpus instance (indexed on first lookup)."""
+    global _corpus
+    if _corpus is None:
+        _corpus = FallbackCorpus()
+    return _corpus
@@ -0,0 +1,153 @@
+"""
+Rolling store of per-call LLM accounting: tokens, latency, outcome and target.
+Kept in a small SQLite table capped at the most recent calls, so it can be
+summarised for /llmstats or exported for tuning max_tokens and prompts.
+"""
+import csv
+import io
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Outcomes that produced an RC from the model's own text
+USABLE_OUTCOMES = ("accepted", "truncated")
+# RC served from the response cache: no tokens spent, so not in the tokens-per-RC denominator
+CACHED_OUTCOME = "cached"
+
+
+class LLMCall:
+    """One generation attempt, filled in as it moves through the pipeline."""
+
+    __slots__ = ("kind", "difficulty", "target", "prompt_tokens", "completion_tokens",
+                 "latency", "cached", "truncated", "outcome")
+
+    def __init__(self, kind: str, difficulty: str):
+        self.kind = kind
+        self.difficulty = difficulty
+        self.target: Optional[str] = None
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+        self.latency: Optional[float] = None
+        self.cached = False
+        self.truncated = False
+        self.outcome: Optional[str] = None
+
+    def record_response(self, target: str, latency: float, usage=None):
+        """Record the serving target, latency and the response's token usage (if reported)."""
+        self.target = target
+        self.latency = latency
+        if usage is not None:
+            self.prompt_tokens = getattr(usage, "prompt_tokens", None)
+            self.completion_tokens = getattr(usage, "completion_tokens", None)
+
+
+class LLMMetrics:
+    """Capped, persistent log of LLMCall records with summary and CSV export."""
+
+    COLUMNS = ("ts", "kind", "difficulty", "target", "outcome", "cached",
+               "latency", "prompt_tokens", "completion_tokens")
+
+    def __init__(self, path: str = "data/llm_metrics.sqlite3", max_rows: int = 5000):
+        self.path = path
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+
+        metrics_dir = os.path.dirname(path)
+        if metrics_dir and not os.path.exists(metrics_dir):
+            os.makedirs(metrics_dir)
+
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_calls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts REAL NOT NULL,
+                kind TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                target TEXT,
+                outcome TEXT NOT NULL,
+                cached INTEGER NOT NULL,
+                latency REAL,
+                prompt_tokens INTEGER,
+                completion_tokens INTEGER
+            )"""
+        )
+        self._conn.commit()
+
+    def start(self, kind: str, difficulty: str) -> LLMCall:
+        return LLMCall(kind, difficulty)
+
+    def finish(self, call: LLMCall, outcome: str):
+        """Record a finished call, dropping the oldest rows past max_rows."""
+        call.outcome = outcome
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO llm_calls (ts, kind, difficulty, target, outcome, cached, latency, "
+                "prompt_tokens, completion_tokens) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), call.kind, call.difficulty, call.target, outcome, int(call.cached),
+                 call.latency, call.prompt_tokens, call.completion_tokens),
+            )
+            self._conn.execute("DELETE FROM llm_calls WHERE id <= ?", (cursor.lastrowid - self.max_rows,))
+            self._conn.commit()
+
+    def _rows(self, since: Optional[float] = None) -> List[tuple]:
+        query = f"SELECT {', '.join(self.COLUMNS)} FROM llm_calls"
+        params = ()
+        if since is not None:
+            query += " WHERE ts >= ?"
+            params = (since,)
+        with self._lock:
+            return self._conn.execute(query + " ORDER BY id", params).fetchall()
+
+    def summary(self, hours: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        Per-difficulty summary (plus "all"): call and outcome counts, p50/p95
+        latency of API calls, and prompt/completion tokens per usable RC.
+        Tokens from rejected attempts count towards the RCs that got through;
+        RCs served from the cache are counted separately (`cached_rcs`).
+        """
+        import numpy as np  # Only reports need it; recording calls stays import-light
+        since = time.time() - hours * 3600 if hours else None
+        rows = self._rows(since)
+        groups: Dict[str, List[tuple]] = {"all": rows}
+        for row in rows:
+            groups.setdefault(row[2], []).append(row)
+
+        summary = {}
+        for name, group in groups.items():
+            outcomes: Dict[str, int] = {}
+            for row in group:
+                outcomes[row[4]] = outcomes.get(row[4], 0) + 1
+            latencies = np.array([row[6] for row in group if row[6] is not None and not row[5]], dtype=float)
+            prompt_tokens = sum(row[7] or 0 for row in group)
+            completion_tokens = sum(row[8] or 0 for row in group)
+            usable = sum(outcomes.get(outcome, 0) for outcome in USABLE_OUTCOMES)
+
+            summary[name] = {
+                "calls": len(group),
+                "cached": sum(1 for row in group if row[5]),
+                "cached_rcs": outcomes.get(CACHED_OUTCOME, 0),
+                "outcomes": outcomes,
+                "latency_p50": float(np.percentile(latencies, 50)) if len(latencies) else None,
+                "latency_p95": float(np.percentile(latencies, 95)) if len(latencies) else None,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "prompt_tokens_per_rc": prompt_tokens / usable if usable else None,
+                "completion_tokens_per_rc": completion_tokens / usable if usable else None,
+            }
+        return summary
+
+    def export_csv(self, hours: Optional[float] = None) -> str:
+        """Every stored call as CSV text."""
+        since = time.time() - hours * 3600 if hours else None
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(self.COLUMNS)
+        writer.writerows(self._rows(since))
+        return out.getvalue()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,188 @@
+"""
+Latency-aware routing across several (model, provider) targets.
+Each call goes to the fastest healthy target; slow calls can be hedged
+by racing a second target once the primary passes its p95 latency.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+class NoHealthyTarget(Exception):
+    """Raised when no routing target is configured."""
+
+
+class RouteTarget:
+    """One (model, provider) pair with rolling latency and error statistics."""
+
+    def __init__(self, model: str, provider: str, rank: int, alpha: float = 0.3):
+        self.model = model
+        self.provider = provider
+        self.rank = rank
+        self.alpha = alpha
+        self.ewma_latency: Optional[float] = None
+        self.ewma_error = 0.0
+        self.recent_latencies = deque(maxlen=50)
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    @property
+    def name(self) -> str:
+        """Model string as the HF router expects it."""
+        return f"{self.model}:{self.provider}"
+
+    def record(self, latency: float, ok: bool, failure_threshold: int, cooldown: float):
+        """Fold one call outcome into the EWMAs and the cooldown state."""
+        self.calls += 1
+        error = 0.0 if ok else 1.0
+        self.ewma_error = self.alpha * error + (1 - self.alpha) * self.ewma_error
+
+        if ok:
+            self.consecutive_failures = 0
+            self.recent_latencies.append(latency)
+            if self.ewma_latency is None:
+                self.ewma_latency = latency
+            else:
+                self.ewma_latency = self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= failure_threshold:
+                self.cooldown_until = time.monotonic() + cooldown
+
+    def available(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def score(self) -> float:
+        """Expected cost of a call: latency inflated by the recent error rate."""
+        if self.ewma_latency is None:
+            return float("inf")
+        return self.ewma_latency * (1 + 4 * self.ewma_error)
+
+    def p95(self) -> Optional[float]:
+        if len(self.recent_latencies) < 5:
+            return None
+        ordered = sorted(self.recent_latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def snapshot(self) -> Dict:
+        return {
+            "target": self.name,
+            "rank": self.rank,
+            "ewma_latency": self.ewma_latency,
+            "ewma_error": self.ewma_error,
+            "p95": self.p95(),
+            "calls": self.calls,
+            "failures": self.failures,
+            "cooling_down": not self.available(time.monotonic()),
+        }
+
+
+class ModelRouter:
+    """Picks a target per call and optionally hedges slow requests."""
+
+    def __init__(self, targets: List[RouteTarget], hedge_enabled: bool = False,
+                 hedge_default_delay: float = 15.0, failure_threshold: int = 3,
+                 cooldown: float = 30.0):
+        if not targets:
+            raise NoHealthyTarget("no routing targets configured")
+        self.targets = targets
+        self.hedge_enabled = hedge_enabled
+        self.hedge_default_delay = hedge_default_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @classmethod
+    def from_spec(cls, spec: str, default_provider: str, alpha: float = 0.3, **kwargs) -> "ModelRouter":
+        """
+        Build a router from a ranked, comma-separated list such as
+        "mistralai/Mistral-7B-Instruct-v0.2:featherless-ai,HuggingFaceH4/zephyr-7b-beta:hf-inference".
+        Entries without ":provider" use `default_provider`.
+        """
+        targets = []
+        for rank, entry in enumerate(e.strip() for e in spec.split(",")):
+            if not entry:
+                continue
+            model, _, provider = entry.partition(":")
+            targets.append(RouteTarget(model, provider or default_provider, rank, alpha))
+        return cls(targets, **kwargs)
+
+    @property
+    def primary(self) -> RouteTarget:
+        return self.targets[0]
+
+    def ranked(self) -> List[RouteTarget]:
+        """
+        Available targets, fastest first. Ties (e.g. targets with no successful
+        call yet) go to the lower error rate, then config order, so a failing
+        target that never answered still yields to an untried one.
+        """
+        now = time.monotonic()
+        available = [t for t in self.targets if t.available(now)]
+        if not available:
+            # Everything is cooling down: try whichever recovers first
+            available = [min(self.targets, key=lambda t: t.cooldown_until)]
+        return sorted(available, key=lambda t: (t.score(), t.ewma_error, t.rank))
+
+    async def _timed(self, target: RouteTarget, call: Callable[[RouteTarget, float], Awaitable],
+                     timeout: float):
+        start = time.monotonic()
+        try:
+            result = await call(target, timeout)
+        except asyncio.CancelledError:
+            # Lost a hedge race: not a signal about the target's health
+            raise
+        except Exception:
+            target.record(time.monotonic() - start, False, self.failure_threshold, self.cooldown)
+            raise
+        target.record(time.monotonic() - start, True, self.failure_threshold, self.cooldown)
+        return result
+
+    async def acomplete(self, call: Callable[[RouteTarget, float], Awaitable], timeout: float,
+                        hedge: bool = True):
+        """
+        Run call(target, timeout) on the best target. With hedging enabled,
+        a second target is started once the primary exceeds its p95 latency
+        and whichever succeeds first wins.
+        """
+        targets = self.ranked()
+        primary = targets[0]
+        tasks = [asyncio.create_task(self._timed(primary, call, timeout))]
+
+        try:
+            if hedge and self.hedge_enabled and len(targets) > 1:
+                delay = primary.p95() or self.hedge_default_delay
+                if delay < timeout:
+                    done, _ = await asyncio.wait(tasks, timeout=delay)
+                    if not done:
+                        self.hedges += 1
+                        print(f"[INFO] Hedging {primary.name} with {targets[1].name} after {delay:.1f}s")
+                        tasks.append(asyncio.create_task(self._timed(targets[1], call, timeout - delay)))
+
+            pending = set(tasks)
+            last_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if len(tasks) > 1 and task is tasks[1]:
+                            self.hedge_wins += 1
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def snapshot(self) -> Dict:
+        return {
+            "hedge_enabled": self.hedge_enabled,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "targets": [t.snapshot() for t in self.targets],
+        }
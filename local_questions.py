@@ -0,0 +1,237 @@
+"""
+Local, CPU-only question generation.
+Scores sentences by TF-IDF centrality (a small TextRank over the sentence
+similarity matrix) and builds extractive items whose distractors are other
+sentences or key terms from the same passage. Needs no network and runs in
+a few milliseconds, so fallback RCs get passage-specific questions.
+"""
+import hashlib
+import re
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from passage_stats import PassageStats
+from quality import STOPWORDS
+
+_TERM = re.compile(r"[a-z][a-z'-]+")
+# Options longer than this are shortened to keep Telegram messages readable
+MAX_OPTION_WORDS = 32
+MIN_SENTENCES = 6
+# Short content words ("across", "often") make give-away blanks and distractors
+MIN_TERM_LENGTH = 6
+LETTERS = "ABCD"
+
+
+def split_sentences(stats: PassageStats) -> List[str]:
+    """Sentences of an analysed passage, using its recorded boundaries."""
+    passage = stats.text
+    sentences, start = [], 0
+    for end, _ in stats.sentence_ends:
+        sentence = passage[start:end].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = end
+    tail = passage[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+class SentenceModel:
+    """TF-IDF vectors, pairwise similarity and centrality for one passage."""
+
+    def __init__(self, sentences: List[str]):
+        self.sentences = sentences
+        tokens = [[t for t in _TERM.findall(s.lower()) if t not in STOPWORDS] for s in sentences]
+        vocab = {term: i for i, term in enumerate(sorted({t for ts in tokens for t in ts}))}
+        self.terms = sorted(vocab, key=vocab.get)
+        self._long_terms = np.array([len(t) >= MIN_TERM_LENGTH for t in self.terms], dtype=bool)
+
+        rows = np.fromiter((i for i, ts in enumerate(tokens) for _ in ts), dtype=np.int64)
+        cols = np.fromiter((vocab[t] for ts in tokens for t in ts), dtype=np.int64)
+        counts = np.zeros((len(sentences), len(vocab)))
+        np.add.at(counts, (rows, cols), 1.0)
+
+        df = (counts > 0).sum(axis=0)
+        idf = np.log((1 + len(sentences)) / (1 + df)) + 1.0
+        tfidf = counts * idf
+        norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+        self.tfidf = tfidf
+        self.vectors = np.divide(tfidf, norms, out=np.zeros_like(tfidf), where=norms > 0)
+
+        self.similarity = self.vectors @ self.vectors.T
+        np.fill_diagonal(self.similarity, 0.0)
+        self.centrality = self._textrank()
+
+    def _textrank(self, damping: float = 0.85, iterations: int = 30) -> np.ndarray:
+        """Stationary scores of a random walk over the sentence similarity graph."""
+        n = len(self.sentences)
+        out_weight = self.similarity.sum(axis=1, keepdims=True)
+        transition = np.divide(self.similarity, out_weight, out=np.full_like(self.similarity, 1.0 / n),
+                               where=out_weight > 0)
+        scores = np.full(n, 1.0 / n)
+        for _ in range(iterations):
+            scores = (1 - damping) / n + damping * (transition.T @ scores)
+        return scores
+
+    def key_term(self, i: int) -> Optional[str]:
+        """Highest-weighted long content term of sentence i."""
+        row = np.where(self._long_terms, self.tfidf[i], 0.0)
+        if not row.any():
+            return None
+        return self.terms[int(row.argmax())]
+
+    def distractor_terms(self, answer: str, exclude: int, k: int) -> List[str]:
+        """
+        Heavy terms from other sentences, best first. Terms sharing the
+        answer's ending (likely the same part of speech) are preferred.
+        """
+        weights = np.delete(self.tfidf, exclude, axis=0).max(axis=0) * self._long_terms
+        weights[self.tfidf[exclude] > 0] = 0.0  # Never offer a term that also fits the blank's sentence
+        same_ending = np.array([t[-3:] == answer[-3:] for t in self.terms], dtype=float)
+        weights = weights * (1.0 + same_ending)
+        order = np.argsort(-weights)
+        return [self.terms[j] for j in order[:k] if weights[j] > 0]
+
+
+def _shorten(sentence: str) -> str:
+    words = sentence.split()
+    if len(words) <= MAX_OPTION_WORDS:
+        return sentence
+    return " ".join(words[:MAX_OPTION_WORDS]).rstrip(",;:") + "..."
+
+
+def _question(number: int, qtype: str, text: str, correct: str, distractors: List[str],
+              rng: np.random.Generator, why_correct: str, why_wrong: str) -> Dict:
+    """Shuffle options and build the RC question dict."""
+    options = [correct] + distractors[:3]
+    order = rng.permutation(len(options))
+    letter_of = {int(src): LETTERS[pos] for pos, src in enumerate(order)}
+    answer = letter_of[0]
+
+    explanation = {"correct": why_correct}
+    for src in range(1, len(options)):
+        explanation[letter_of[src]] = why_wrong
+    return {
+        "number": number,
+        "type": qtype,
+        "question": text,
+        "options": [f"{LETTERS[pos]}) {options[int(src)]}" for pos, src in enumerate(order)],
+        "correct_answer": answer,
+        "explanation": explanation,
+    }
+
+
+def _least_similar(model: SentenceModel, anchor: int, exclude: set, k: int) -> List[int]:
+    """Sentences least related to `anchor`, skipping `exclude`."""
+    candidates = [i for i in np.argsort(model.similarity[anchor]) if i != anchor and i not in exclude]
+    return [int(i) for i in candidates[:k]]
+
+
+def _main_idea(model: SentenceModel, rng: np.random.Generator) -> Tuple[Dict, int]:
+    central = int(model.centrality.argmax())
+    # Peripheral sentences: true statements, but not what the passage is about
+    peripheral = [int(i) for i in np.argsort(model.centrality) if i != central][:3]
+    question = _question(
+        1, "Main Idea",
+        "Which of the following statements from the passage best expresses its central claim?",
+        _shorten(model.sentences[central]),
+        [_shorten(model.sentences[i]) for i in peripheral],
+        rng,
+        "This sentence shares the most content with the rest of the passage; the other "
+        "paragraphs develop, qualify or support it.",
+        "This statement appears in the passage but is a supporting detail, not the idea the passage is built around.",
+    )
+    return question, central
+
+
+def _detail(model: SentenceModel, rng: np.random.Generator, used: set) -> Optional[Dict]:
+    ranked = [int(i) for i in np.argsort(-model.centrality) if int(i) not in used]
+    for i in ranked:
+        term = model.key_term(i)
+        if not term:
+            continue
+        distractors = model.distractor_terms(term, i, 3)
+        if len(distractors) < 3:
+            continue
+        blanked = re.sub(rf"\b{re.escape(term)}\b", "_____", model.sentences[i], flags=re.IGNORECASE)
+        if blanked == model.sentences[i]:
+            continue
+        used.add(i)
+        return _question(
+            2, "Detail",
+            f"According to the passage, which term correctly completes the statement: \"{_shorten(blanked)}\"",
+            term, distractors, rng,
+            f"The passage states this explicitly; \"{term}\" is the word used in the original sentence.",
+            "This term is discussed elsewhere in the passage but does not belong in this statement.",
+        )
+    return None
+
+
+def _support(model: SentenceModel, rng: np.random.Generator, used: set) -> Optional[Dict]:
+    ranked = [int(i) for i in np.argsort(-model.centrality) if int(i) not in used]
+    for claim in ranked:
+        support = [int(i) for i in np.argsort(-model.similarity[claim]) if int(i) != claim]
+        if not support or model.similarity[claim, support[0]] <= 0:
+            continue
+        evidence = support[0]
+        distractors = _least_similar(model, claim, {evidence}, 3)
+        if len(distractors) < 3:
+            continue
+        used.update((claim, evidence))
+        return _question(
+            3, "Inference",
+            f"Which statement from the passage most directly supports the claim that "
+            f"\"{_shorten(model.sentences[claim])}\"",
+            _shorten(model.sentences[evidence]),
+            [_shorten(model.sentences[i]) for i in distractors],
+            rng,
+            "This sentence develops the same ideas as the claim, so it is the strongest support the passage offers for it.",
+            "This statement addresses a different point in the passage and does not bear directly on the claim.",
+        )
+    return None
+
+
+def _logical_flow(model: SentenceModel, rng: np.random.Generator, used: set) -> Optional[Dict]:
+    n = len(model.sentences)
+    ranked = [int(i) for i in np.argsort(-model.centrality) if int(i) < n - 1 and int(i) not in used]
+    for i in ranked:
+        follower = i + 1
+        distractors = _least_similar(model, i, {follower, i - 1}, 3)
+        if len(distractors) < 3:
+            continue
+        return _question(
+            4, "Logical Flow",
+            f"In the passage, which statement immediately follows from the author's point that "
+            f"\"{_shorten(model.sentences[i])}\"",
+            _shorten(model.sentences[follower]),
+            [_shorten(model.sentences[j]) for j in distractors],
+            rng,
+            "The author's next step in the argument is this sentence, which picks up directly from the point quoted.",
+            "This statement belongs to a different stage of the argument and does not continue the quoted point.",
+        )
+    return None
+
+
+def build_questions(stats: PassageStats, count: int = 4) -> Optional[List[Dict]]:
+    """
+    Up to four extractive questions (main idea, detail, inference, logical flow)
+    for the analysed passage, or None if it is too short to support them.
+    Option order is seeded by the passage text, so the same passage always
+    gets the same answer key.
+    """
+    passage = stats.text
+    sentences = split_sentences(stats)
+    if len(sentences) < MIN_SENTENCES:
+        return None
+
+    model = SentenceModel(sentences)
+    seed = int.from_bytes(hashlib.sha256(passage.encode("utf-8")).digest()[:8], "big")
+    rng = np.random.default_rng(seed)
+
+    main_idea, central = _main_idea(model, rng)
+    used = {central}
+    questions = [main_idea, _detail(model, rng, used), _support(model, rng, used),
+                 _logical_flow(model, rng, used)]
+    if any(q is None for q in questions[:count]):
+        return None
+    return questions[:count]
@@ -1,16 +1,15 @@
 """
 Main entry point for RC Bot.
 Supports running bot only, scheduler only, or both.
+Modes import only what they use, so e.g. `test` and `pregen` never load telegram.
 """
 import asyncio
 import sys
-import os
-from bot import RCBot
-from scheduler import RCScheduler
 
 
 async def run_bot_only():
     """Run only the interactive Telegram bot."""
+    from bot import RCBot
     print("🤖 Starting RC Bot (interactive mode)...")
     print("Users can use /today and other commands manually\n")
 
@@ -20,6 +19,7 @@ async def run_bot_only():
     try:
         await app.initialize()
         await app.start()
+        await bot.startup()
         await app.updater.start_polling(allowed_updates=None)
         print("✅ Bot started. Press Ctrl+C to stop.\n")
         await asyncio.Event().wait()
@@ -27,10 +27,13 @@ async def run_bot_only():
         print("\n⛔ Bot stopped")
         await app.stop()
         await app.shutdown()
+    finally:
+        await bot.shutdown()
 
 
 async def run_scheduler_only():
     """Run only the daily scheduler (no interactive commands)."""
+    from scheduler import RCScheduler
     print("📅 Starting RC Scheduler (automated daily sends)...")
     print("RC will be sent automatically at configured time\n")
 
@@ -43,6 +46,8 @@ async def run_scheduler_only():
 
 async def run_both():
     """Run both bot and scheduler concurrently."""
+    from bot import RCBot
+    from scheduler import RCScheduler
     print("🚀 Starting RC Bot with Scheduler...")
     print("- Interactive commands enabled (/today, /answer, etc.)")
     print("- Daily RC will auto-send at configured time\n")
@@ -55,6 +60,7 @@ async def run_both():
     try:
         await app.initialize()
         await app.start()
+        await bot.startup()
 
         # Run both concurrently
         await asyncio.gather(
@@ -68,6 +74,8 @@ async def run_both():
         print("\n⛔ Bot and Scheduler stopped")
         await app.stop()
         await app.shutdown()
+    finally:
+        await bot.shutdown()
 
 
 def main():
@@ -85,24 +93,42 @@ def main():
         asyncio.run(run_both())
     elif mode == "test":
         # Test RC generation
-        from rc_generator import RCGenerator
+        from rc_generator import get_generator
+        from passage_stats import PassageStats
         print("=" * 60)
         print("🧪 Testing RC Generation...\n")
 
-        gen = RCGenerator()
-        rc = gen.generate_daily_rc()
+        gen = get_generator()
+        rc = asyncio.run(gen.agenerate_daily_rc())
 
         is_valid, msg = gen.validate_rc(rc)
         print(f"✅ Validation: {msg}\n")
 
         print(f"Topic: {rc['topic']}")
-        print(f"Passage ({len(rc['passage'].split())} words):\n")
+        print(f"Passage ({PassageStats.from_rc(rc).word_count} words):\n")
         print(rc['passage'][:200] + "...\n")
 
         for q in rc['questions']:
             print(f"Q{q['number']}: {q['question']}")
             print(f"Answer: {q['correct_answer']}\n")
 
+    elif mode == "pregen":
+        # Bulk-generate a content backlog: python main.py pregen [days] [gmat,cat,sbi]
+        from pregen import run_pregen
+        from config import PREGEN_DAYS
+        print("=" * 60)
+        days = int(sys.argv[2]) if len(sys.argv) > 2 else PREGEN_DAYS
+        difficulties = sys.argv[3].split(",") if len(sys.argv) > 3 else None
+        print(f"📦 Pre-generating {days} days of RCs...\n")
+        run_pregen(days, difficulties)
+
+    elif mode == "compact":
+        # Fold closed analytics.jsonl segments into day partitions for /adminstats history
+        from analytics_store import run_compaction
+        print("=" * 60)
+        print("🗜️ Compacting analytics logs...\n")
+        run_compaction()
+
     else:
         print(f"Unknown mode: {mode}")
         print("\nUsage:")
@@ -110,6 +136,8 @@ def main():
         print("  python main.py scheduler - Run daily auto-send scheduler only")
         print("  python main.py both      - Run both bot and scheduler")
         print("  python main.py test      - Test RC generation")
+        print("  python main.py pregen [days] [difficulties] - Pre-generate an RC archive")
+        print("  python main.py compact   - Compact analytics logs for /adminstats history")
         sys.exit(1)
 
 
@@ -0,0 +1,72 @@
+"""
+Single-pass passage analysis shared by generation, validation and formatting.
+"""
+import bisect
+import re
+from typing import Dict, List, Optional, Tuple
+
+_WORD = re.compile(r"\S+")
+# A word ends a sentence if it ends in . ! or ? (optionally followed by closing quotes/brackets)
+_SENTENCE_END = re.compile(r"[.!?][\"')\]’”]*$")
+
+
+class PassageStats:
+    """
+    Word count and sentence boundaries of a passage, from one tokenization.
+    `sentence_ends` holds (char offset just past the terminator, words so far)
+    for every sentence, which makes truncation a binary search.
+    """
+
+    __slots__ = ("text", "word_count", "sentence_ends")
+
+    def __init__(self, text: str, word_count: int, sentence_ends: List[Tuple[int, int]]):
+        self.text = text
+        self.word_count = word_count
+        self.sentence_ends = sentence_ends
+
+    @classmethod
+    def analyze(cls, text: str) -> "PassageStats":
+        """Tokenize once, recording the word count and sentence end offsets."""
+        word_count = 0
+        sentence_ends = []
+        for match in _WORD.finditer(text):
+            word_count += 1
+            if _SENTENCE_END.search(match.group()):
+                sentence_ends.append((match.end(), word_count))
+        return cls(text, word_count, sentence_ends)
+
+    @classmethod
+    def from_rc(cls, rc_data: Dict) -> "PassageStats":
+        """Reuse the stats stored on an RC dict, recomputing if missing or stale."""
+        passage = rc_data["passage"]
+        saved: Optional[Dict] = rc_data.get("stats")
+        if saved and saved.get("chars") == len(passage):
+            return cls(passage, saved["word_count"], [tuple(end) for end in saved["sentence_ends"]])
+        return cls.analyze(passage)
+
+    def to_dict(self) -> Dict:
+        """JSON-serialisable form stored on the RC dict."""
+        return {
+            "word_count": self.word_count,
+            "chars": len(self.text),
+            "sentence_ends": [list(end) for end in self.sentence_ends],
+        }
+
+    def truncate(self, max_words: int) -> "PassageStats":
+        """
+        Cut at the last sentence boundary within `max_words` words.
+        With no boundary in range, cut after the `max_words`-th word.
+        """
+        if self.word_count <= max_words:
+            return self
+
+        word_totals = [words for _, words in self.sentence_ends]
+        keep = bisect.bisect_right(word_totals, max_words)
+        if keep:
+            end, words = self.sentence_ends[keep - 1]
+            return PassageStats(self.text[:end], words, self.sentence_ends[:keep])
+
+        for i, match in enumerate(_WORD.finditer(self.text), 1):
+            if i == max_words:
+                return PassageStats(self.text[:match.end()], max_words, [])
+        return self
@@ -0,0 +1,223 @@
+"""
+Offline bulk pre-generation of RCs.
+Builds a backlog (days x difficulties) in one batch: API calls run
+concurrently on the event loop while validation, quality scoring and
+MinHash signatures run in a process pool. Each finished RC is appended
+to a checkpoint file, so an interrupted run resumes where it stopped,
+and the result is written to one gzipped archive that /today serves from.
+"""
+import asyncio
+import json
+import os
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from dedup import MinHasher
+from llm_metrics import LLMCall
+from quality import score_passages
+from passage_stats import PassageStats
+from rc_generator import RCGenerator, check_rc, get_generator
+from rc_archive import RCArchive
+from cpu_pool import CPUPool, get_cpu_pool
+from config import (
+    RC_TOPICS, DIFFICULTY_LEVELS, DEDUP_THRESHOLD, DEDUP_MAX_ATTEMPTS, RC_MAX_CONCURRENCY,
+    PREGEN_WORKERS, PREGEN_CANDIDATES, PREGEN_CHECKPOINT_PATH
+)
+
+# (ISO date, difficulty)
+SlotKey = Tuple[str, str]
+
+_hasher: Optional[MinHasher] = None
+
+
+def analyse_rc(rc: Dict) -> Tuple[bool, str, float, np.ndarray]:
+    """Worker-side checks for one RC: (valid, message, quality score, MinHash signature)."""
+    global _hasher
+    if _hasher is None:
+        _hasher = MinHasher()
+    is_valid, message = check_rc(rc)
+    score = float(score_passages([PassageStats.from_rc(rc)], rc["difficulty"])[0])
+    return is_valid, message, score, _hasher.signature(rc["passage"])
+
+
+class Pregenerator:
+    """Generates one RC per (day, difficulty) slot and archives the batch."""
+
+    def __init__(self, generator: RCGenerator, days: int, difficulties: List[str],
+                 start: Optional[date] = None, archive: Optional[RCArchive] = None,
+                 checkpoint_path: str = PREGEN_CHECKPOINT_PATH,
+                 max_concurrency: int = RC_MAX_CONCURRENCY, workers: int = PREGEN_WORKERS):
+        self.generator = generator
+        self.days = days
+        self.difficulties = difficulties
+        self.start = start or date.today()
+        self.archive = archive or RCArchive()
+        self.checkpoint_path = checkpoint_path
+        self.max_concurrency = max(1, max_concurrency)
+        self.workers = max(1, workers)
+
+    def _slots(self) -> List[Tuple[SlotKey, str]]:
+        """Every (date, difficulty) slot with its topic; topics rotate so each tier covers them all."""
+        slots = []
+        for offset in range(self.days):
+            day = (self.start + timedelta(days=offset)).isoformat()
+            for tier, difficulty in enumerate(self.difficulties):
+                topic = RC_TOPICS[(offset + tier) % len(RC_TOPICS)]
+                slots.append(((day, difficulty), topic))
+        return slots
+
+    def _load_checkpoint(self) -> Dict[SlotKey, Dict]:
+        """RCs finished by earlier (possibly interrupted) runs."""
+        done = {}
+        if not os.path.exists(self.checkpoint_path):
+            return done
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn final line from an interrupted run
+                done[(entry["date"], entry["difficulty"])] = entry["rc"]
+        return done
+
+    async def _generate_slot(self, key: SlotKey, topic: str, pool: CPUPool,
+                             semaphore: asyncio.Semaphore) -> Optional[Dict]:
+        """Generate, check and dedup one slot's RC (None if no attempt was valid)."""
+        day, difficulty = key
+        index = self.generator.passage_index
+        # Valid candidates under DEDUP_THRESHOLD, as (score, rc, signature)
+        novel: List[Tuple[float, Dict, np.ndarray]] = []
+        # Least similar valid candidate, served only if none is novel
+        closest = None
+        # Metrics outcomes are recorded once validation and dedup have picked an RC
+        candidates: List[Tuple[Dict, List[LLMCall]]] = []
+        max_attempts = DEDUP_MAX_ATTEMPTS + PREGEN_CANDIDATES - 1
+
+        async with semaphore:
+            # The latency budget covers the slot, regenerations included
+            deadline = self.generator.new_deadline()
+            best = None
+            try:
+                while True:
+                    while len(novel) < PREGEN_CANDIDATES and len(candidates) < max_attempts:
+                        if not novel and len(candidates) >= DEDUP_MAX_ATTEMPTS:
+                            break  # Out of dedup attempts; serve the least similar one
+                        attempt = len(candidates)
+                        calls: List[LLMCall] = []
+                        rc = await self.generator.agenerate_candidate(
+                            difficulty, reuse_cache=attempt == 0, topic=topic, deadline=deadline, calls=calls
+                        )
+                        candidates.append((rc, calls))
+                        is_valid, message, score, signature = await pool.run(analyse_rc, rc)
+                        if not is_valid:
+                            for call in calls:
+                                call.outcome = "rejected"
+                            print(f"[WARN] {day} {difficulty}: {message}, regenerating")
+                            continue
+
+                        similarity, _ = index.match(signature)
+                        if similarity < DEDUP_THRESHOLD:
+                            novel.append((score, rc, signature))
+                            continue
+                        if closest is None or similarity < closest[0]:
+                            closest = (similarity, score, rc, signature)
+                        print(f"[WARN] {day} {difficulty}: passage is {similarity:.0%} similar to an existing one")
+
+                    if not novel:
+                        if closest is not None:
+                            best = closest[1:]
+                            index.add_signature(best[2])
+                        break
+
+                    # Highest quality score; re-checked as it is added, since
+                    # concurrent slots may have archived a near-duplicate meanwhile
+                    pick = max(novel, key=lambda candidate: candidate[0])
+                    added, similarity = index.add_if_novel(pick[2], DEDUP_THRESHOLD)
+                    if added:
+                        best = pick
+                        break
+                    novel.remove(pick)
+                    if closest is None or similarity < closest[0]:
+                        closest = (similarity,) + pick
+                    print(f"[WARN] {day} {difficulty}: another slot took a {similarity:.0%} similar passage, "
+                          f"regenerating")
+            finally:
+                self.generator.settle_calls(candidates, best[1] if best else None)
+
+        if best is None:
+            print(f"[ERROR] {day} {difficulty}: no valid RC after {len(candidates)} attempts")
+            return None
+
+        score, rc, signature = best
+        rc["date"] = day
+        rc["quality_score"] = round(score, 3)
+        return rc
+
+    async def run(self) -> Dict[SlotKey, Dict]:
+        """Fill every missing slot, then write the archive."""
+        done = self._load_checkpoint()
+        slots = self._slots()
+        pending = [(key, topic) for key, topic in slots if key not in done]
+        print(f"[INFO] Pre-generating {len(pending)} RCs ({len(done)} already checkpointed)")
+
+        checkpoint_dir = os.path.dirname(self.checkpoint_path)
+        if checkpoint_dir and not os.path.exists(checkpoint_dir):
+            os.makedirs(checkpoint_dir)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        # The generator's own CPU stages (questions, fallback retrieval) share these workers
+        pool = get_cpu_pool()
+        await pool.start(self.workers)
+        with open(self.checkpoint_path, "a", encoding="utf-8") as checkpoint:
+
+            async def run_slot(key: SlotKey, topic: str):
+                return key, await self._generate_slot(key, topic, pool, semaphore)
+
+            tasks = [asyncio.create_task(run_slot(key, topic)) for key, topic in pending]
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    try:
+                        key, rc = await finished
+                    except Exception as e:
+                        print(f"[ERROR] Pre-generation failed: {e}")
+                        continue
+                    if rc is None:
+                        continue
+                    done[key] = rc
+                    checkpoint.write(json.dumps({"date": key[0], "difficulty": key[1], "rc": rc}) + "\n")
+                    checkpoint.flush()
+                    print(f"[OK] {key[0]} {key[1]} ({len(done)}/{len(slots)})")
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await pool.stop()
+
+        self._write_archive(done)
+        missing = len(slots) - len(done)
+        if missing:
+            print(f"[WARN] {missing} slots still missing; rerun to retry them")
+        else:
+            os.remove(self.checkpoint_path)
+        return done
+
+    def _write_archive(self, done: Dict[SlotKey, Dict]):
+        """Merge this batch into the archive, dropping days already past."""
+        today = date.today().isoformat()
+        entries = {day: tiers for day, tiers in self.archive.entries().items() if day >= today}
+        for (day, difficulty), rc in done.items():
+            entries.setdefault(day, {})[difficulty] = rc
+        self.archive.write(entries)
+        print(f"[OK] Archive written to {self.archive.path} ({sum(map(len, entries.values()))} RCs)")
+
+
+def run_pregen(days: int, difficulties: Optional[List[str]] = None) -> Dict[SlotKey, Dict]:
+    """Entry point for `python main.py pregen`."""
+    difficulties = difficulties or list(DIFFICULTY_LEVELS)
+    unknown = [d for d in difficulties if d not in DIFFICULTY_LEVELS]
+    if unknown:
+        raise ValueError(f"Unknown difficulty: {', '.join(unknown)}")
+
+    generator = get_generator()
+    if not generator.use_api:
+        raise RuntimeError("Pre-generation needs HF_API_TOKEN; fallback passages are not archived")
+    return asyncio.run(Pregenerator(generator, days, difficulties).run())
@@ -0,0 +1,92 @@
+"""
+Vectorised quality scoring for candidate passages.
+Scores how closely each candidate matches its difficulty tier's style spec
+(sentence length, lexical density, paragraph structure, word range).
+"""
+import re
+from typing import List, Optional
+import numpy as np
+from config import DIFFICULTY_LEVELS
+from passage_stats import PassageStats
+
+_WORD = re.compile(r"[A-Za-z']+")
+
+# Function words; everything else counts towards lexical density
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just me more most
+my myself no nor not now of off on once only or other our ours ourselves out over own same she should
+so some such than that the their theirs them themselves then there these they this those through to
+too under until up very was we were what when where which while who whom why will with would you your
+yours yourself yourselves may might must shall also yet thus however rather whether upon within
+""".split())
+
+# Relative importance of each feature's normalised distance from target
+_WEIGHTS = np.array([2.0, 1.0, 1.5, 1.0, 3.0])
+
+
+def passage_features(stats: PassageStats) -> np.ndarray:
+    """[mean sentence words, sentence-length std, lexical density, paragraphs, word count]."""
+    ends = np.array([words for _, words in stats.sentence_ends] or [stats.word_count], dtype=float)
+    sentence_lengths = np.diff(ends, prepend=0.0)
+    sentence_lengths = sentence_lengths[sentence_lengths > 0]
+    if not len(sentence_lengths):
+        sentence_lengths = np.array([float(stats.word_count)])
+
+    words = _WORD.findall(stats.text.lower())
+    content = sum(1 for w in words if w not in STOPWORDS)
+    density = content / len(words) if words else 0.0
+    paragraphs = sum(1 for block in re.split(r"\n\s*\n", stats.text) if block.strip())
+
+    return np.array([
+        sentence_lengths.mean(),
+        sentence_lengths.std(),
+        density,
+        paragraphs,
+        stats.word_count,
+    ])
+
+
+def score_passages(passages: List[PassageStats], difficulty: str) -> np.ndarray:
+    """Higher is better; one score per analysed passage."""
+    spec = DIFFICULTY_LEVELS[difficulty]
+    min_words, max_words = spec["word_range"]
+    short_sentence, long_sentence = spec["sentence_words"]
+
+    features = np.vstack([
+        passage_features(stats.truncate(max_words)) for stats in passages
+    ])
+    targets = np.array([
+        (short_sentence + long_sentence) / 2,
+        (long_sentence - short_sentence) / 2,
+        spec["lexical_density"],
+        spec["paragraphs"],
+        (min_words + max_words) / 2,
+    ])
+    scales = np.array([
+        max(1.0, (long_sentence - short_sentence) / 2),
+        max(1.0, (long_sentence - short_sentence) / 2),
+        0.1,
+        1.0,
+        max(1.0, (max_words - min_words) / 2),
+    ])
+
+    distances = np.abs(features - targets) / scales
+    # Inside the word range is as good as the midpoint; only penalise leaving it
+    distances[:, 4] = np.where(
+        (features[:, 4] >= min_words) & (features[:, 4] <= max_words), 0.0, distances[:, 4]
+    )
+    return -(distances @ _WEIGHTS)
+
+
+def select_best(passages: List[PassageStats], difficulty: str) -> Optional[PassageStats]:
+    """Pick the candidate that best fits the tier spec."""
+    if not passages:
+        return None
+    if len(passages) == 1:
+        return passages[0]
+    scores = score_passages(passages, difficulty)
+    best = int(scores.argmax())
+    print(f"[OK] Picked candidate {best + 1}/{len(passages)} (scores: {', '.join(f'{s:.1f}' for s in scores)})")
+    return passages[best]
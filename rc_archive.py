@@ -0,0 +1,48 @@
+"""
+Archive of pre-generated RCs (written by `python main.py pregen`).
+One gzipped JSON file mapping date -> difficulty -> RC.
+"""
+import gzip
+import json
+import os
+from typing import Dict, Optional
+from config import RC_ARCHIVE_PATH
+
+
+class RCArchive:
+    """Gzipped {date: {difficulty: rc}} archive, reloaded when the file changes."""
+
+    def __init__(self, path: str = RC_ARCHIVE_PATH):
+        self.path = path
+        self._entries: Dict[str, Dict[str, Dict]] = {}
+        self._mtime: Optional[float] = None
+
+    def _refresh(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            self._entries, self._mtime = {}, None
+            return
+        if mtime != self._mtime:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                self._entries = json.load(f).get("entries", {})
+            self._mtime = mtime
+
+    def get(self, day: str, difficulty: str) -> Optional[Dict]:
+        """Archived RC for a date and difficulty, if any."""
+        self._refresh()
+        return self._entries.get(day, {}).get(difficulty)
+
+    def entries(self) -> Dict[str, Dict[str, Dict]]:
+        self._refresh()
+        return self._entries
+
+    def write(self, entries: Dict[str, Dict[str, Dict]]):
+        """Replace the archive atomically."""
+        archive_dir = os.path.dirname(self.path)
+        if archive_dir and not os.path.exists(archive_dir):
+            os.makedirs(archive_dir)
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"entries": entries}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
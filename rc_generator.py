@@ -2,13 +2,40 @@
 RC Passage and question generation engine.
 Uses HuggingFace Inference API via OpenAI-compatible endpoint.
 """
+import asyncio
 import json
 import random
-import os
-from typing import Dict, List, Tuple, Optional
+import re
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, List, Tuple, Optional
 from datetime import datetime
-from openai import OpenAI
-from config import HF_API_TOKEN, HF_MODEL, RC_TOPICS, RC_PASSGE_WORD_COUNT, RC_NUM_QUESTIONS, DIFFICULTY_LEVELS, DEFAULT_DIFFICULTY
+from llm_cache import LLMResponseCache
+from llm_metrics import CACHED_OUTCOME, USABLE_OUTCOMES, LLMCall, LLMMetrics
+from resilience import CircuitBreaker, aretry, is_transient
+from llm_router import ModelRouter
+from passage_stats import PassageStats
+from cpu_pool import get_cpu_pool
+from config import (
+    HF_API_TOKEN, HF_PROVIDER, HF_BASE_URL, HF_TIMEOUT, RC_TOPICS, RC_PASSGE_WORD_COUNT,
+    RC_NUM_QUESTIONS, DIFFICULTY_LEVELS, DEFAULT_DIFFICULTY,
+    LLM_CACHE_POLICY, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_HOURS, RC_MAX_CONCURRENCY,
+    HF_STREAMING, HF_STREAM_UPDATE_INTERVAL, HF_STRUCTURED_OUTPUT,
+    HF_PASSAGE_MAX_TOKENS, HF_STRUCTURED_MAX_TOKENS, HF_MAX_RETRIES, HF_RETRY_BASE_DELAY,
+    HF_RETRY_MAX_DELAY, HF_LATENCY_BUDGET, HF_BREAKER_FAILURE_THRESHOLD, HF_BREAKER_RESET_SECONDS,
+    HF_TARGETS, HF_HEDGE_ENABLED, HF_HEDGE_DEFAULT_DELAY, ROUTER_EWMA_ALPHA,
+    ROUTER_FAILURE_THRESHOLD, ROUTER_COOLDOWN_SECONDS, DEDUP_THRESHOLD, DEDUP_MAX_ATTEMPTS,
+    HF_BEST_OF, LLM_METRICS_MAX_ROWS, LOCAL_QUESTIONS
+)
+
+# numpy and the modules built on it (dedup, quality, local_questions,
+# fallback_corpus) are imported where they are first used, so importing this
+# module stays cheap for callers that never score, dedup or fall back
+if TYPE_CHECKING:
+    import numpy as np
+    from dedup import PassageIndex
+
+# Async callback receiving the partial passage text while it streams in
+ProgressCallback = Callable[[str], Awaitable[None]]
 
 
 class RCGenerator:
@@ -17,46 +44,256 @@ class RCGenerator:
     def __init__(self):
         self.hf_token = HF_API_TOKEN
         self.use_api = bool(self.hf_token and self.hf_token.strip() and self.hf_token != "")
-        self.model = HF_MODEL
-        self.passage_log = []
+        # Ranked (model, provider) targets; the first one names the cache key
+        self.router = ModelRouter.from_spec(
+            HF_TARGETS,
+            default_provider=HF_PROVIDER,
+            alpha=ROUTER_EWMA_ALPHA,
+            hedge_enabled=HF_HEDGE_ENABLED,
+            hedge_default_delay=HF_HEDGE_DEFAULT_DELAY,
+            failure_threshold=ROUTER_FAILURE_THRESHOLD,
+            cooldown=ROUTER_COOLDOWN_SECONDS,
+        )
+        self.model = self.router.primary.model
+        self.provider = self.router.primary.provider
+        self.streaming = HF_STREAMING
+        self.structured_output = HF_STRUCTURED_OUTPUT
+        self.best_of = max(1, HF_BEST_OF)
+        self.breaker = CircuitBreaker(
+            "hf_router",
+            failure_threshold=HF_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=HF_BREAKER_RESET_SECONDS,
+        )
+        # Every passage handed out so far, for near-duplicate rejection (loaded on first use)
+        self._passage_index: Optional["PassageIndex"] = None
+
+        # Response cache: "reuse" reads and writes, "refresh" only writes, "off" disables
+        self.cache_policy = LLM_CACHE_POLICY
+        self.cache = None
+        if self.use_api and self.cache_policy != "off":
+            self.cache = LLMResponseCache(
+                "data/llm_cache.sqlite3",
+                max_entries=LLM_CACHE_MAX_ENTRIES,
+                ttl_seconds=LLM_CACHE_TTL_HOURS * 3600,
+            )
 
-        # Initialize OpenAI client with HuggingFace router
+        # Token, latency and outcome accounting for every generation attempt
+        self.metrics = None
         if self.use_api:
-            try:
-                self.client = OpenAI(
-                    base_url="https://router.huggingface.co/v1",
-                    api_key=self.hf_token,
-                )
-                print(f"[OK] HuggingFace OpenAI API initialized for {self.model}")
-            except Exception as e:
-                print(f"[ERROR] Failed to initialize HF client: {e}")
-                print("[ERROR] Will use fallback passages only")
-                self.use_api = False
-                self.client = None
-        else:
-            self.client = None
+            self.metrics = LLMMetrics("data/llm_metrics.sqlite3", max_rows=LLM_METRICS_MAX_ROWS)
+
+        # Async OpenAI client for the HuggingFace router, created on first use
+        # so that importing this module (and fallback-only runs) never pays for
+        # the openai import. Every caller awaits it, so a slow generation never
+        # blocks the event loop.
+        self._async_client = None
+        if not self.use_api:
             print("[INFO] No HuggingFace token configured. Using fallback passages.")
 
+    def _init_client(self):
+        """Import openai and build the client; on failure fall back for good."""
+        try:
+            from openai import AsyncOpenAI
+            self._async_client = AsyncOpenAI(
+                base_url=HF_BASE_URL,
+                api_key=self.hf_token,
+                timeout=HF_TIMEOUT,
+                max_retries=0,
+            )
+            print(f"[OK] HuggingFace OpenAI API initialized for {self.model}")
+        except Exception as e:
+            print(f"[ERROR] Failed to initialize HF client: {e}")
+            print("[ERROR] Will use fallback passages only")
+            self.use_api = False
+            self._async_client = None
+
+    @property
+    def async_client(self):
+        """Async OpenAI client (None without an API token)."""
+        if self._async_client is None and self.use_api:
+            self._init_client()
+        return self._async_client
+
+    @property
+    def passage_index(self) -> "PassageIndex":
+        """MinHash index of served passages, loaded from disk on first use."""
+        if self._passage_index is None:
+            from dedup import PassageIndex
+            self._passage_index = PassageIndex()
+        return self._passage_index
+
+    @passage_index.setter
+    def passage_index(self, index: "PassageIndex"):
+        self._passage_index = index
+
     def generate_daily_rc(self, difficulty: str = None) -> Dict:
+        """Blocking wrapper around agenerate_daily_rc for callers without an event loop."""
+        return asyncio.run(self.agenerate_daily_rc(difficulty))
+
+    async def agenerate_daily_rc(self, difficulty: str = None,
+                                 on_progress: Optional[ProgressCallback] = None) -> Dict:
         """
         Generate complete RC for the day:
         - 1 passage (420-520 words depending on difficulty)
         - 4 questions with options and answers
+        Candidates too similar to an already served passage are regenerated.
+        In streaming mode, `on_progress` receives the partial passage.
         """
-        if difficulty is None:
-            difficulty = DEFAULT_DIFFICULTY
+        difficulty = self._resolve_difficulty(difficulty)
+        # One latency budget for the whole generation, regenerations included
+        deadline = self.new_deadline()
+        best = None
+        rc = None
+        # Metrics outcomes are only final once dedup has picked a candidate
+        candidates: List[Tuple[Dict, List[LLMCall]]] = []
+        try:
+            for attempt in range(DEDUP_MAX_ATTEMPTS):
+                calls: List[LLMCall] = []
+                candidate = await self.agenerate_candidate(difficulty, on_progress, reuse_cache=attempt == 0,
+                                                           deadline=deadline, calls=calls)
+                candidates.append((candidate, calls))
+                signature = await self.asignature(candidate["passage"])
+                best, done = self._rank_candidate(best, candidate, signature)
+                if done:
+                    break
+            rc = self._accept_rc(best)
+        finally:
+            self.settle_calls(candidates, rc)
+        return rc
+
+    async def agenerate_candidate(self, difficulty: str, on_progress: Optional[ProgressCallback] = None,
+                                  reuse_cache: bool = True, topic: Optional[str] = None,
+                                  deadline: Optional[float] = None,
+                                  calls: Optional[List[LLMCall]] = None) -> Dict:
+        """
+        Generate one RC on `topic` (random by default), without duplicate checks:
+        callers such as pregen run their own validation and dedup.
+        API calls share `deadline` (see new_deadline), or a fresh budget if None.
+        Their metrics records are appended to `calls` for settle_calls, or
+        recorded at once if `calls` is None.
+        """
+        topic = topic or random.choice(RC_TOPICS)
+        if deadline is None:
+            deadline = self.new_deadline()
 
-        if difficulty not in DIFFICULTY_LEVELS:
-            difficulty = DEFAULT_DIFFICULTY
+        if self.structured_output:
+            structured = await self._agenerate_structured(topic, difficulty, reuse_cache, deadline, calls)
+            if structured:
+                stats, questions = structured
+                return self._build_rc(topic, stats, difficulty, questions)
+
+        topic, stats = await self._agenerate_passage(topic, difficulty, on_progress, reuse_cache, deadline, calls)
+        questions = await self._agenerate_questions(stats)
+        return self._build_rc(topic, stats, difficulty, questions)
 
-        topic = random.choice(RC_TOPICS)
-        passage = self._generate_passage(topic, difficulty)
-        questions = self._generate_questions(passage)
+    def settle_calls(self, candidates: List[Tuple[Dict, List[LLMCall]]], chosen: Optional[Dict]):
+        """
+        Record the metrics of every candidate's calls once dedup (and any
+        validation) has settled on `chosen`. Calls that produced a usable
+        passage for a candidate that was not chosen count as "duplicate".
+        """
+        for rc, calls in candidates:
+            for call in calls:
+                outcome = call.outcome or "rejected"
+                if rc is not chosen and outcome in USABLE_OUTCOMES + (CACHED_OUTCOME,):
+                    outcome = "duplicate"
+                self._finish_call(call, outcome)
+
+    def _rank_candidate(self, best: Optional[Tuple], rc: Dict,
+                        signature: Optional["np.ndarray"] = None) -> Tuple[Tuple, bool]:
+        """
+        Keep the least similar candidate seen so far, as (similarity, rc, signature).
+        Returns (best, done) where done means rc is novel enough to accept.
+        `signature` is the passage's MinHash signature if already computed.
+        """
+        if signature is None:
+            signature = self.passage_index.signature(rc["passage"])
+        similarity, _ = self.passage_index.match(signature)
+        if best is None or similarity < best[0]:
+            best = (similarity, rc, signature)
+        if similarity < DEDUP_THRESHOLD:
+            return best, True
+        print(f"[WARN] Passage is {similarity:.0%} similar to one already served, regenerating")
+        return best, False
+
+    async def asignature(self, passage: str) -> "np.ndarray":
+        """MinHash signature of a passage, computed in the CPU pool."""
+        return await get_cpu_pool().run(self.passage_index.hasher.signature, passage)
+
+    def _accept_rc(self, best: Tuple) -> Dict:
+        """
+        Return the chosen RC. Its passage is recorded only once it has been
+        validated and sent (see amark_served), so discarded RCs never count.
+        """
+        similarity, rc, _ = best
+        if similarity >= DEDUP_THRESHOLD:
+            print(f"[WARN] No novel passage after {DEDUP_MAX_ATTEMPTS} attempts, using closest ({similarity:.0%})")
+        return rc
 
+    async def amark_served(self, rc: Dict, signature: Optional["np.ndarray"] = None) -> bool:
+        """
+        Record a sent RC's passage for near-duplicate rejection. Invalid RCs
+        and passages already indexed are skipped; returns True if recorded.
+        `signature` is the passage's MinHash signature if already computed.
+        """
+        is_valid, _ = self.validate_rc(rc)
+        if not is_valid:
+            return False
+        if signature is None:
+            signature = await self.asignature(rc["passage"])
+        return self.passage_index.add_signature(signature)
+
+    async def agenerate_many(self, n: int, difficulty: str = None,
+                             max_concurrency: int = RC_MAX_CONCURRENCY) -> AsyncIterator[Dict]:
+        """
+        Generate `n` RCs concurrently (at most `max_concurrency` in flight)
+        and yield each one as soon as it finishes. Failed generations are
+        logged and skipped, so fewer than `n` RCs may be yielded.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def generate_one() -> Dict:
+            async with semaphore:
+                return await self.agenerate_daily_rc(difficulty)
+
+        tasks = [asyncio.create_task(generate_one()) for _ in range(n)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                try:
+                    rc = await finished
+                except Exception as e:
+                    print(f"[ERROR] RC generation failed: {e}")
+                    continue
+                yield rc
+        finally:
+            # Consumer stopped early: don't leave orphaned API calls running
+            for task in tasks:
+                task.cancel()
+
+    async def afallback_rc(self, difficulty: str = None) -> Dict:
+        """
+        RC from the offline corpus with local questions; makes no API call.
+        Used as a stand-in while the real RC is still generating.
+        """
+        difficulty = self._resolve_difficulty(difficulty)
+        fallback = await get_cpu_pool().run(fallback_passage, random.choice(RC_TOPICS), difficulty)
+        topic, stats = self._finalize_passage(None, fallback[0], difficulty, fallback=fallback)
+        questions = await self._agenerate_questions(stats)
+        return self._build_rc(topic, stats, difficulty, questions)
+
+    def _resolve_difficulty(self, difficulty: Optional[str]) -> str:
+        """Map a missing or unknown difficulty to the default level."""
+        if difficulty is None or difficulty not in DIFFICULTY_LEVELS:
+            return DEFAULT_DIFFICULTY
+        return difficulty
+
+    def _build_rc(self, topic: str, stats: PassageStats, difficulty: str, questions: List[Dict]) -> Dict:
+        """Assemble the RC dict for a finished passage."""
         rc_data = {
             "date": datetime.now().isoformat(),
             "topic": topic,
-            "passage": passage,
+            "passage": stats.text,
+            "stats": stats.to_dict(),
             "questions": questions,
             "difficulty": difficulty,
             "difficulty_name": DIFFICULTY_LEVELS[difficulty]["name"]
@@ -64,59 +301,86 @@ class RCGenerator:
 
         return rc_data
 
-    def _generate_passage(self, topic: str, difficulty: str = None) -> str:
-        """Generate a single passage on the given topic."""
+    async def _agenerate_passage(self, topic: str, difficulty: str = None,
+                                 on_progress: Optional[ProgressCallback] = None,
+                                 reuse_cache: bool = True, deadline: Optional[float] = None,
+                                 calls: Optional[List[LLMCall]] = None) -> Tuple[str, PassageStats]:
+        """
+        Generate a single passage on the given topic without blocking (see
+        agenerate_candidate for `calls`). Returns (topic, passage): a fallback
+        passage may be on the nearest corpus topic instead.
+        """
         if difficulty is None:
             difficulty = DEFAULT_DIFFICULTY
 
-        passage = None
+        passage: Optional[PassageStats] = None
+        call = None
 
         # Try API first if available
-        if self.use_api and self.client:
+        if self.use_api and self.async_client:
             prompt = self._build_passage_prompt(topic, difficulty)
-            passage = self._call_hf_api(prompt)
+            if self.streaming:
+                call = self._start_call("stream", difficulty)
+                max_words = DIFFICULTY_LEVELS[difficulty]["word_range"][1]
+                passage = await self._astream_hf_api(prompt, max_words, on_progress, reuse_cache, call, deadline)
+            else:
+                call = self._start_call("passage", difficulty)
+                passage = await self._acall_hf_api(prompt, reuse_cache, difficulty, call, deadline)
 
-        # If API failed or not available, use fallback
+        # Corpus retrieval (TF-IDF) runs in a worker that already has it indexed
+        fallback = None
         if not passage:
-            passage = self._fallback_passage_generator(topic, difficulty)
+            fallback = await get_cpu_pool().run(fallback_passage, topic, difficulty)
+        topic, stats = self._finalize_passage(passage, topic, difficulty, call, fallback)
+        self._defer_call(call, calls)
+        return topic, stats
+
+    def _finalize_passage(self, passage: Optional[PassageStats], topic: str, difficulty: str,
+                          call: Optional[LLMCall] = None,
+                          fallback: Optional[Tuple[str, str]] = None) -> Tuple[str, PassageStats]:
+        """
+        Apply fallback and word-count rules to an analysed API passage.
+        `fallback` is a (topic, passage) pair the caller already fetched, if any.
+        Returns the topic the final passage is about, and the passage.
+        The outcome is left on `call` for the caller to record.
+        """
+        # Outcome of the API attempt, for the metrics store
+        if not passage:
+            outcome = call.outcome if call and call.outcome else "fallback"
+        elif call and call.cached:
+            outcome = CACHED_OUTCOME
+        else:
+            outcome = "truncated" if call and call.truncated else "accepted"
+
+        # If API failed or not available, use fallback
+        stats = passage
+        if not stats:
+            if fallback is None:
+                fallback = self._fallback_passage_generator(topic, difficulty)
+            topic, text = fallback
+            stats = PassageStats.analyze(text.strip())
 
         # Validate and adjust word count
-        word_count = len(passage.split())
         min_words, max_words = DIFFICULTY_LEVELS[difficulty]["word_range"]
 
         # If too long, truncate at sentence boundary
-        if word_count > max_words:
-            print(f"[WARN] Passage {word_count} words, truncating to {max_words}")
-            passage = self._truncate_passage(passage, max_words)
+        if stats.word_count > max_words:
+            print(f"[WARN] Passage {stats.word_count} words, truncating to {max_words}")
+            stats = stats.truncate(max_words)
+            if outcome == "accepted":
+                outcome = "truncated"
 
         # If too short after all, use fallback
-        word_count = len(passage.split())
-        if word_count < min_words:
-            print(f"[WARN] Passage {word_count} words, using fallback")
-            passage = self._fallback_passage_generator(topic, difficulty)
-
-        return passage.strip()
-
-    def _truncate_passage(self, passage: str, max_words: int) -> str:
-        """Truncate passage at sentence boundary to fit max_words."""
-        words = passage.split()
-        if len(words) <= max_words:
-            return passage
-
-        # Take words up to max_words
-        truncated_words = words[:max_words]
-        truncated = " ".join(truncated_words)
-
-        # Find last sentence boundary (., !, ?)
-        for terminator in ['. ', '! ', '? ']:
-            if terminator in truncated:
-                # Truncate at last sentence-ending punctuation
-                last_idx = truncated.rfind(terminator)
-                if last_idx > 0:
-                    return truncated[:last_idx + 1]
-
-        # If no sentence boundary found, return as-is
-        return truncated
+        if stats.word_count < min_words:
+            print(f"[WARN] Passage {stats.word_count} words, using fallback")
+            topic, text = self._fallback_passage_generator(topic, difficulty)
+            stats = PassageStats.analyze(text.strip())
+            if outcome in USABLE_OUTCOMES + (CACHED_OUTCOME,):
+                outcome = "too_short"
+
+        if call:
+            call.outcome = outcome
+        return topic, stats
 
     def _build_passage_prompt(self, topic: str, difficulty: str = None) -> str:
         """Build prompt for passage generation based on difficulty level."""
@@ -211,102 +475,437 @@ STRICT REQUIREMENTS:
 GENERATE PASSAGE (exactly {limit[0]}-{limit[1]} words):
 """
 
-    def _call_hf_api(self, prompt: str) -> Optional[str]:
-        """Call HuggingFace API via OpenAI-compatible endpoint."""
-        if not self.use_api or not self.client:
+    def _completion_kwargs(self, prompt: str, max_tokens: int = HF_PASSAGE_MAX_TOKENS, n: int = 1) -> Dict:
+        """Chat completion request parameters."""
+        kwargs = {
+            "model": f"{self.model}:{self.provider}",
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": 0.8,
+            "top_p": 0.95,
+            "timeout": HF_TIMEOUT,
+        }
+        if n > 1:
+            kwargs["n"] = n
+        return kwargs
+
+    def _extract_choices(self, response) -> List[str]:
+        """Pull every generated text out of a chat completion response."""
+        if response and response.choices:
+            return [choice.message.content for choice in response.choices if choice.message.content]
+        else:
+            print("[WARN] HF API returned empty response")
+            return []
+
+    def _accept_passage(self, stats: PassageStats) -> Optional[PassageStats]:
+        """Return the analysed output if it is long enough to be a passage."""
+        if stats.word_count > 200:
+            print(f"[OK] HF API generated passage ({stats.word_count} words)")
+            return stats
+        else:
+            print(f"[WARN] HF API output too short ({stats.word_count} words)")
             return None
 
-        try:
-            # Use OpenAI-compatible API
-            response = self.client.chat.completions.create(
-                model=f"{self.model}:featherless-ai",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=800,
-                temperature=0.8,
-                top_p=0.95,
-            )
+    def _cache_key(self, prompt: str, max_tokens: int = HF_PASSAGE_MAX_TOKENS) -> str:
+        """Cache key over model, provider, prompt and sampling parameters."""
+        kwargs = self._completion_kwargs(prompt, max_tokens)
+        params = {k: kwargs[k] for k in ("max_tokens", "temperature", "top_p")}
+        return LLMResponseCache.make_key(self.model, self.provider, prompt, params)
 
-            if response and response.choices:
-                generated = response.choices[0].message.content.strip()
-                word_count = len(generated.split())
+    def _cache_lookup(self, prompt: str, max_tokens: int = HF_PASSAGE_MAX_TOKENS,
+                      reuse_cache: bool = True) -> Optional[str]:
+        """Return a cached response for this prompt if the policy allows reuse."""
+        if not reuse_cache or not self.cache or self.cache_policy != "reuse":
+            return None
+        cached = self.cache.get(self._cache_key(prompt, max_tokens))
+        if cached:
+            print(f"[OK] LLM cache hit ({len(cached)} chars)")
+        return cached
+
+    def _cache_store(self, prompt: str, text: Optional[str], max_tokens: int = HF_PASSAGE_MAX_TOKENS):
+        """Remember an accepted response for later identical requests."""
+        if self.cache and text:
+            self.cache.put(self._cache_key(prompt, max_tokens), text)
+
+    async def _arequest_completion(self, prompt: str, max_tokens: int = HF_PASSAGE_MAX_TOKENS,
+                                   call: Optional[LLMCall] = None,
+                                   deadline: Optional[float] = None) -> Optional[str]:
+        """Send one chat completion request and return the raw text (None on failure)."""
+        choices = await self._arequest_choices(prompt, max_tokens, call=call, deadline=deadline)
+        return choices[0] if choices else None
+
+    async def _arequest_choices(self, prompt: str, max_tokens: int = HF_PASSAGE_MAX_TOKENS,
+                                n: int = 1, call: Optional[LLMCall] = None,
+                                deadline: Optional[float] = None) -> List[str]:
+        """
+        Request `n` completions in one call and return their raw texts (empty on failure).
+        Transient errors are retried until `deadline`; while the circuit
+        breaker is open the provider is skipped and callers use the fallback.
+        Usage, latency and the serving target are recorded on `call`.
+        """
+        if self._budget_spent(deadline):
+            return []
+        if not self.breaker.allow_request():
+            print("[WARN] HF API circuit open, skipping API call")
+            return []
 
-                if word_count > 200:
-                    print(f"[OK] HF API generated passage ({word_count} words)")
-                    return generated
-                else:
-                    print(f"[WARN] HF API output too short ({word_count} words)")
-                    return None
-            else:
-                print("[WARN] HF API returned empty response")
-                return None
+        kwargs = self._completion_kwargs(prompt, max_tokens, n)
 
+        async def create_on(target, timeout: float):
+            return target.name, await self.async_client.chat.completions.create(
+                **{**kwargs, "model": target.name, "timeout": timeout}
+            )
+
+        async def create(timeout: float):
+            return await self.router.acomplete(create_on, timeout)
+
+        start = time.monotonic()
+        try:
+            target, response = await aretry(create, **self._retry_policy(deadline))
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
         except Exception as e:
+            self._record_breaker_failure(e)
+            self._record_error(call, start)
             error_msg = str(e)
             print(f"[ERROR] HF API failed: {error_msg}")
+            return []
+
+        self.breaker.record_success()
+        if call:
+            call.record_response(target, time.monotonic() - start, getattr(response, "usage", None))
+        return self._extract_choices(response)
+
+    def _retry_policy(self, deadline: Optional[float] = None) -> Dict:
+        """Backoff and latency budget settings shared by every API call."""
+        return {
+            "attempts": HF_MAX_RETRIES + 1,
+            "base_delay": HF_RETRY_BASE_DELAY,
+            "max_delay": HF_RETRY_MAX_DELAY,
+            "budget": HF_LATENCY_BUDGET,
+            "per_call_timeout": HF_TIMEOUT,
+            "deadline": deadline,
+        }
+
+    @staticmethod
+    def new_deadline() -> float:
+        """time.monotonic() value by which one generation's API calls must finish."""
+        return time.monotonic() + HF_LATENCY_BUDGET
+
+    @staticmethod
+    def _budget_spent(deadline: Optional[float]) -> bool:
+        """True (and logged) once a generation's latency budget is used up."""
+        if deadline is not None and time.monotonic() >= deadline:
+            print(f"[WARN] HF_LATENCY_BUDGET of {HF_LATENCY_BUDGET:g}s used up, skipping API call")
+            return True
+        return False
+
+    def get_api_status(self) -> Dict:
+        """Circuit breaker state and cache counters for the admin dashboard."""
+        return {
+            "use_api": self.use_api,
+            "model": f"{self.model}:{self.provider}",
+            "breaker": self.breaker.snapshot(),
+            "router": self.router.snapshot(),
+            "cache": self.cache.stats() if self.cache else None,
+        }
+
+    def _start_call(self, kind: str, difficulty: str) -> Optional[LLMCall]:
+        """New metrics record for a generation attempt (None when metrics are off)."""
+        return self.metrics.start(kind, difficulty) if self.metrics else None
+
+    def _finish_call(self, call: Optional[LLMCall], outcome: str):
+        if call and self.metrics:
+            self.metrics.finish(call, outcome)
+
+    def _defer_call(self, call: Optional[LLMCall], calls: Optional[List[LLMCall]]):
+        """Hand `call` to the candidate's collector, or record it now if there is none."""
+        if call is None:
+            return
+        if calls is None:
+            self._finish_call(call, call.outcome or "rejected")
+        else:
+            calls.append(call)
+
+    def _record_breaker_failure(self, error: Exception):
+        """Count provider failures toward the breaker; other errors only free its probe."""
+        if is_transient(error):
+            self.breaker.record_failure(error)
+        else:
+            self.breaker.release()
+
+    def _record_error(self, call: Optional[LLMCall], start: float):
+        if call:
+            call.latency = time.monotonic() - start
+            call.outcome = "error"
+
+    async def _acall_hf_api(self, prompt: str, reuse_cache: bool = True,
+                            difficulty: str = DEFAULT_DIFFICULTY,
+                            call: Optional[LLMCall] = None,
+                            deadline: Optional[float] = None) -> Optional[PassageStats]:
+        """Call HuggingFace API with the async client; returns the analysed passage."""
+        if not self.use_api or not self.async_client:
             return None
 
-    def _fallback_passage_generator(self, topic: str, difficulty: str = None) -> str:
-        """
-        Fallback passage generator with high-quality pre-crafted passages.
-        Returns passages appropriate to difficulty level.
-        """
-        if difficulty is None:
-            difficulty = DEFAULT_DIFFICULTY
+        cached = self._cache_lookup(prompt, reuse_cache=reuse_cache)
+        if cached:
+            if call:
+                call.cached = True
+            return PassageStats.analyze(cached.strip())
+
+        candidates = await self._arequest_choices(prompt, n=self.best_of, call=call, deadline=deadline)
+        passage = await self._apick_passage(candidates, difficulty)
+        if call and candidates and not passage:
+            call.outcome = "too_short"
+        self._cache_store(prompt, passage.text if passage else None)
+        return passage
+
+    async def _apick_passage(self, candidates: List[str], difficulty: str) -> Optional[PassageStats]:
+        """Accept long-enough candidates and keep the one that best fits the tier (scored in the CPU pool)."""
+        accepted = [stats for stats in (self._accept_passage(PassageStats.analyze(text.strip()))
+                                        for text in candidates) if stats]
+        if len(accepted) <= 1:
+            return accepted[0] if accepted else None
+        from quality import select_best
+        return await get_cpu_pool().run(select_best, accepted, difficulty)
+
+    def _build_structured_prompt(self, topic: str, difficulty: str) -> str:
+        """Passage prompt extended to ask for questions and explanations as JSON."""
+        passage_prompt = self._build_passage_prompt(topic, difficulty)
+        # Drop the trailing "GENERATE PASSAGE ..." line; the JSON spec replaces it
+        passage_prompt = passage_prompt.rstrip().rsplit("\n", 1)[0].rstrip()
+        limit = DIFFICULTY_LEVELS[difficulty]["word_range"]
 
-        # GMAT level passages (existing ones)
-        gmat_passages = {
-            "Philosophy": "The nature of consciousness remains one of philosophy's most intractable puzzles. While neuroscience has made considerable advances in mapping brain correlates of subjective experience, the explanatory gap between physical processes and phenomenal awareness persists. This gap highlights what philosophers term the hard problem of consciousness, the question of why and how physical processes give rise to subjective experience rather than occurring in the dark. The more straightforward easy problems of explaining cognitive functions have yielded to scientific investigation, yet consciousness itself seems to resist such reductionist approaches. Some contemporary philosophers argue that this resistance reflects a fundamental limitation in our current methodological frameworks rather than metaphysical mystery. They contend that subjective experience emerges from information integration across neural systems in ways our present vocabulary cannot adequately capture. Others maintain that consciousness genuinely transcends physicalist explanation, pointing to the seemingly unbridgeable qualitative nature of experience. The dispute between these positions hinges partly on empirical claims about neural organization but also on deeper commitments about what kinds of explanation are ultimately satisfying. What remains undisputed is that consciousness presents unique explanatory challenges. The first-person perspective from which consciousness is known cannot be exhausted by third-person scientific description. This asymmetry suggests that future progress requires not merely increased neurological sophistication but perhaps reconceptualization of what we mean by explanation itself. The puzzle endures not because neuroscience has failed but because consciousness occupies an unusual epistemic position, being simultaneously the most intimately known aspect of our experience and the least amenable to objective verification. Some philosophers now suggest that the dichotomy between subjective and objective knowledge itself requires rethinking. The history of consciousness studies demonstrates repeatedly that progress depends less on empirical discovery than on conceptual innovation. Different theoretical frameworks generate different puzzles and apparently different solutions. Recent work in neurophenomenology attempts to bridge first-person and third-person perspectives through systematic analysis of conscious experience itself. Yet fundamental questions persist about whether such bridging is genuinely possible or merely postpones deeper conceptual tensions.",
+        return f"""{passage_prompt}
+
+Then write {RC_NUM_QUESTIONS} questions on the passage: primary purpose, inference, tone/attitude and logical implication.
+Each question has exactly 4 options labelled A-D, one correct answer, and an explanation of why the
+correct option is right and why each other option fails.
+
+Respond with ONLY a JSON object, no markdown, in this exact shape:
+{{
+  "passage": "<the passage, {limit[0]}-{limit[1]} words>",
+  "questions": [
+    {{
+      "type": "Primary Purpose",
+      "question": "<question text>",
+      "options": ["A) ...", "B) ...", "C) ...", "D) ..."],
+      "correct_answer": "B",
+      "explanation": {{"correct": "<why B is right>", "A": "<why A fails>", "C": "<why C fails>", "D": "<why D fails>"}}
+    }}
+  ]
+}}
+"""
 
-            "Political theory": "Liberal democracy rests upon an assumption increasingly questioned by contemporary political theorists: that rational deliberation among equal citizens can produce legitimate collective decisions. This assumption presumes a degree of popular understanding, engagement, and mutual respect that empirical reality seems to contradict. Mass democratic electorates routinely demonstrate preference aggregation mechanisms that bear little resemblance to ideals of reasoned discourse. Yet the alternative, restricting political participation to informed elites, carries its own epistemic and moral costs. Recent scholarship suggests the paradox may be less about democracy's failure than about our misplaced expectations. Democratic procedures do not eliminate conflict or produce perfect justice. Rather, they institutionalize contestation in ways that prevent any single group from monopolizing power indefinitely. This procedural legitimacy, distinct from outcomes-based legitimacy, requires neither universal truth-seeking nor perfect rationality. Instead, it depends on citizens accepting that they may lose current battles while retaining genuine opportunity to win future ones. This acceptance becomes fragile when institutional mechanisms begin systematically favoring particular interests. The crisis of contemporary liberal democracy may thus reflect not the inherent limitations of democratic procedure but the breakdown of conditions sustaining procedural legitimacy. When electoral systems become responsive primarily to wealthy interests, when media fragmentation prevents shared deliberative space, when institutions appear incapable of addressing urgent problems, citizens rationally lose faith in procedural fairness. Reform proposals typically point toward either expanding democratic participation or improving deliberative quality. Yet these solutions often miss deeper structural issues. Material conditions enabling procedural agreement have deteriorated precisely as formal democratic institutions have expanded. The relationship between institutional form and underlying social trust proves more complicated than theories of deliberative democracy suggest. Genuine procedural legitimacy may depend less on improving argumentation than on reconstructing conditions making reasonable disagreement tolerable. This interpretation suggests solutions require not returning to impossible ideals of rational consensus but rebuilding material conditions enabling meaningful participation.",
+    def _parse_structured_rc(self, raw: Optional[str],
+                             difficulty: str) -> Optional[Tuple[PassageStats, List[Dict]]]:
+        """
+        Parse a structured JSON response into (passage stats, questions).
+        Returns None unless the result passes validate_rc.
+        """
+        if not raw:
+            return None
 
-            "Behavioral economics": "Traditional economic theory assumes human actors pursue wealth maximization through rational calculation of costs and benefits. Behavioral economics has extensively documented systematic deviations from this model. Yet the implications of these empirical findings remain contested. Critics argue that documenting irrational behavior patterns simply describes noise around a rational core, telling us little about actual decision-making in high-stakes environments where learning occurs. They note that real markets provide feedback mechanisms allowing sophisticated actors to correct systematic biases. Behavioral economists counter that documented deviations are not random but exhibit predictable structure, manifesting regularly across populations and persisting even among experts. Many biases prove difficult to eliminate through increased information or incentives. This disagreement partly reflects different conceptions of rationality itself. The traditional model defines rationality as internal consistency of preferences. Behavioral economics employs a richer concept encompassing temporal discounting, reference dependence, and distribution concerns that traditional theory treats as mere departures from true preferences. Yet this proliferation of rationality concepts threatens to render the term vacuous. If rationality encompasses actual human behavior however divergent, it loses explanatory force. Recent work attempts to navigate between extremes by identifying principles governing boundedly rational agents operating under cognitive constraints. This approach acknowledges systematic bias without abandoning explanatory rigor. The project requires resisting both the temptation to treat all deviations as equally significant and the dismissal of systematic patterns as mere noise. Understanding which biases prove susceptible to correction versus reflecting deeper cognitive constraints remains essential. The debate increasingly concerns not whether systematic deviations from rational choice occur, but what such deviations reveal about human nature and economic organization.",
+        # Models sometimes wrap JSON in prose or code fences; keep the outer object
+        start, end = raw.find("{"), raw.rfind("}")
+        if start == -1 or end <= start:
+            print("[WARN] Structured response contained no JSON object")
+            return None
+        try:
+            data = json.loads(raw[start:end + 1])
+        except ValueError as e:
+            print(f"[WARN] Structured response was not valid JSON: {e}")
+            return None
 
-            "Cognitive science": "Memory does not function as a recording device faithfully preserving past experience. Instead, remembering involves active reconstruction guided by current knowledge, expectations, and emotional states. This constructive character has profound implications for personal identity and historical knowledge. We imagine ourselves as continuing the same consciousness that experienced events we now recall. Yet the memorial process constitutes a different, constructed entity bearing only partial continuity with original experience. The constructive nature manifests in well-documented phenomena: false memories generated through suggestive questioning, childhood amnesia erasing early years despite presumed dense experience, and enhanced memory for emotionally charged events confirming existing beliefs. These phenomena suggest memory serves coherent narrative integration rather than accurate representation. The brain prioritizes maintaining unified self-narrative over faithful recording, selectively encoding and reconstructing experiences reinforcing identity continuity. This adaptive process proved evolutionarily valuable. Action depends on quickly assembled world models, and perfect accuracy matters less than useful prediction. Yet this mechanism generates systematic distortions. We cannot reliably distinguish accurate from false memories. Both feel equally certain once integrated into personal narratives. This creates asymmetry between individual certainty and actual reliability, with significant implications for eyewitness testimony and personal accountability. Individual memory depends on both neural mechanisms and social context. Family narratives, cultural frameworks, and institutional structures shape what memories form and persist. Collective forgetting occurs not through neural decay but through social practices. Historical consciousness itself undergoes constant reconstruction.",
+        try:
+            max_words = DIFFICULTY_LEVELS[difficulty]["word_range"][1]
+            stats = PassageStats.analyze(data["passage"].strip()).truncate(max_words)
+
+            questions = []
+            for number, q in enumerate(data["questions"], 1):
+                # Normalise "(a) text", "A. text" or "text" to "A) text" so buttons line up
+                options = [
+                    f"{key}) " + re.sub(r"^\(?[A-Da-d][).:]\s*", "", str(opt).strip())
+                    for key, opt in zip("ABCDEFGH", q["options"])
+                ]
+                correct = str(q["correct_answer"]).strip().upper()[:1]
+                explanation = {k: str(v) for k, v in q["explanation"].items()}
+                if correct not in "ABCD" or not correct or "correct" not in explanation:
+                    print(f"[WARN] Structured question {number} is missing an answer or explanation")
+                    return None
+                for key in "ABCD":
+                    explanation.setdefault(key, explanation["correct"] if key == correct else "")
+
+                questions.append({
+                    "number": number,
+                    "type": str(q.get("type") or "Comprehension"),
+                    "question": str(q["question"]).strip(),
+                    "options": options,
+                    "correct_answer": correct,
+                    "explanation": explanation
+                })
+        except (KeyError, TypeError, AttributeError) as e:
+            print(f"[WARN] Structured response has unexpected shape: {e}")
+            return None
 
-            "Sociology": "Contemporary urban societies exhibit paradoxical patterns of both increased social connectivity and profound isolation. Digital communication technologies promised transcending geographical constraints enabling meaningful connection across vast distances. Yet evidence suggests these technologies often reinforce existing boundaries while generating novel disconnection forms. Online communities frequently become echo chambers where like-minded individuals reinforce shared assumptions, displacing cross-cutting contact generating cosmopolitanism. Meanwhile, geographic proximity once driving social tie formation has decoupled from actual interaction patterns. Many inhabit dense urban environments while emotionally connecting to distant others. This social space reconfiguration produces distinct population consequences. Highly educated professionals benefit from globally distributed networks providing career mobility and intellectual stimulation. Less educated populations experience place-based community erosion without gaining equivalent distant network access, resulting in net isolation. Public spaces once meeting grounds for diverse groups have progressively privatized and segmented, integrative function displaced by design patterns segregating populations by purchasing power. Consequence extends beyond demographic separation to genuine mutual recognition failure. Different groups inhabit distinct informational and spatial universes, making civic cooperation progressively difficult. Understanding this complex phenomenon requires attention not merely to technology influence but to how technological adoption intersects with existing economic inequalities.",
+        is_valid, message = self.validate_rc(
+            {"passage": stats.text, "stats": stats.to_dict(), "questions": questions, "difficulty": difficulty}
+        )
+        if not is_valid:
+            print(f"[WARN] Structured RC rejected: {message}")
+            return None
 
-            "History of ideas": "The concept of progress, the belief that human knowledge and material conditions necessarily improve across historical time, came to dominance recently, achieving near-universal nineteenth-century acceptance. Earlier civilizations operated under different temporal frameworks: cyclical views imagining eternal recurrence, decline narratives tracing fall from ancient wisdom, providential models seeing time as divine instrument. The shift toward linear progress narratives coincided with unprecedented technological transformation and European global dominance, making causation difficult to untangle. Did progress beliefs drive technological advancement, or did technological success generate progress narratives justifying it retrospectively? The answer matters because progress frameworks now structure not merely historical interpretation but policy deliberation and individual aspiration. We evaluate institutions by trajectory. Societies must advance or face irrelevance. This progressive teleology carries hidden costs alongside obvious benefits. It generates impatience with untransformed institutions, leading to destructive intervention in systems requiring gradual development. It produces alienation when actual change disappoints progress expectations. Most significantly, progress narratives obscure genuine historical contingency. Our current arrangements represent particular choices rather than inevitable rational potential unfolding. Recovering contingency requires neither rejecting improvement nor halting beneficial change but developing critical distance from progress frameworks, recognizing them as historically particular rather than universal truths. The challenge lies maintaining capacity for practical improvement while acknowledging constructed historical nature.",
-        }
+        print(f"[OK] HF API generated structured RC ({stats.word_count} words, {len(questions)} questions)")
+        return stats, questions
 
-        # CAT level passages (slightly simpler)
-        cat_passages = {
-            "Philosophy": "The debate surrounding artificial intelligence centers on whether machines can genuinely understand language or merely process patterns. Critics argue that without consciousness or lived experience, AI systems cannot achieve true comprehension. Proponents counter that human understanding itself may be sophisticated pattern recognition. This dispute reflects deeper questions about the nature of cognition. Traditional philosophy viewed understanding as involving abstract concepts and intentionality. Neuroscience increasingly reveals cognition depends on embodied experience and sensorimotor interaction with the world. If understanding requires such embodiment, AI systems may never truly understand despite computational sophistication. Alternatively, if cognition is fundamentally about information processing, differences between biological and artificial systems may be less profound. Recent work bridges these perspectives, suggesting understanding operates at multiple levels. Low-level understanding involves semantic processing and pattern extraction. High-level understanding connects information to broader conceptual frameworks and goals. Advanced AI systems demonstrate some low-level understanding capabilities. Whether they can achieve higher-level understanding remains uncertain. This question matters for how we design AI systems and evaluate their abilities.",
+    async def _agenerate_structured(self, topic: str, difficulty: str,
+                                    reuse_cache: bool = True, deadline: Optional[float] = None,
+                                    calls: Optional[List[LLMCall]] = None
+                                    ) -> Optional[Tuple[PassageStats, List[Dict]]]:
+        """Generate passage and questions in a single API call (see agenerate_candidate for `calls`)."""
+        if not self.use_api or not self.async_client:
+            return None
 
-            "Business Management": "Effective leadership combines vision with practical execution. Many organizations struggle balancing long-term strategic goals with immediate operational demands. Leaders must maintain focus on core objectives while remaining flexible about implementation methods. Studies show that successful leaders establish clear communication channels with their teams. They articulate the organization's mission in ways that resonate with employees at all levels. This alignment creates shared purpose and improves decision-making throughout the organization. Leaders also recognize that different situations require different leadership styles. Autocratic approaches work during crises requiring quick decisions. Collaborative styles prove more effective for knowledge work and innovation. Successful leaders adjust their approach based on organizational context and team needs. The challenge lies recognizing when to employ each style. This requires emotional intelligence and genuine understanding of team dynamics.",
+        call = self._start_call("structured", difficulty)
+        prompt = self._build_structured_prompt(topic, difficulty)
+        raw = self._cache_lookup(prompt, HF_STRUCTURED_MAX_TOKENS, reuse_cache)
+        if raw and call:
+            call.cached = True
+        if not raw:
+            raw = await self._arequest_completion(prompt, HF_STRUCTURED_MAX_TOKENS, call, deadline)
+
+        parsed = self._parse_structured_rc(raw, difficulty)
+        if parsed:
+            self._cache_store(prompt, raw, HF_STRUCTURED_MAX_TOKENS)
+        if call:
+            if parsed:
+                call.outcome = CACHED_OUTCOME if call.cached else "accepted"
+            elif not call.outcome:
+                call.outcome = "rejected"
+        if parsed:
+            self._defer_call(call, calls)
+        else:
+            # A rejected structured call is final whatever happens to the candidate
+            self._finish_call(call, call.outcome if call else "rejected")
+        return parsed
+
+    async def _astream_hf_api(self, prompt: str, max_words: int,
+                              on_progress: Optional[ProgressCallback] = None,
+                              reuse_cache: bool = True, call: Optional[LLMCall] = None,
+                              deadline: Optional[float] = None) -> Optional[PassageStats]:
+        """
+        Stream a passage from the API, stopping as soon as it passes
+        `max_words` so we don't pay for tokens truncation would drop.
+        `on_progress` is called with the partial text at most once per
+        HF_STREAM_UPDATE_INTERVAL seconds.
+        """
+        if not self.use_api or not self.async_client:
+            return None
 
-            "Economics": "Globalization has fundamentally altered economic structures and labor markets. Manufacturing in developed nations has declined as production moved to lower-cost countries. Service sectors and technology industries have expanded to fill gaps. This transition created both opportunities and disruptions. Workers with skills relevant to new industries prospered. Those dependent on traditional manufacturing faced unemployment and reduced social mobility. Policy responses have focused on retraining programs and social safety nets. Yet evidence suggests significant adjustment costs occur before workers transition to new sectors. The debate centers on whether globalization benefits outweigh adjustment costs. Economic data shows aggregate benefits but unequal distribution. This inequality generates political tension and questions about trade policy sustainability.",
+        cached = self._cache_lookup(prompt, reuse_cache=reuse_cache)
+        if cached:
+            if call:
+                call.cached = True
+            return PassageStats.analyze(cached.strip())
 
-            "General Knowledge": "The human brain contains approximately eighty-six billion neurons, each forming thousands of connections with other neurons. These connections enable learning and memory formation. When we learn something new, the connections between neurons strengthen through repeated activation. This process called neuroplasticity allows our brains to reorganize and form new neural pathways. Understanding neuroplasticity has profound implications for education and rehabilitation. It demonstrates that intelligence is not fixed at birth but develops throughout life. People can overcome brain injuries and learn new skills at any age. This understanding encourages lifelong learning and supports individuals recovering from neurological damage. Brain imaging studies reveal specific neural patterns associated with learning, memory, and emotional processing.",
-        }
+        if self._budget_spent(deadline):
+            return None
+        if not self.breaker.allow_request():
+            print("[WARN] HF API circuit open, skipping API call")
+            return None
 
-        # SBI/IBPS PO level passages (easier, business/HR focused)
-        sbi_passages = {
-            "Human Resources": "Organizational culture significantly impacts employee performance and retention. Companies with strong, positive cultures experience lower turnover and higher productivity. Culture is shaped by organizational values, leadership behavior, and work environment. When leaders consistently demonstrate core values, employees internalize those values. This creates alignment between individual and organizational goals. Research shows that employees feeling valued and respected perform better than those feeling underappreciated. Companies investing in employee development report improved engagement and loyalty. Regular feedback, training opportunities, and career development paths make employees feel their growth matters. Organizations should assess their culture regularly through employee surveys and focus groups. Understanding how employees perceive the organization helps leaders identify gaps and make improvements.",
+        parts = []
+        word_count = 0
+        in_word = False
+        last_update = start = time.monotonic()
+        kwargs = self._completion_kwargs(prompt)
+        usage = None
 
-            "Business Strategy": "Digital transformation has become essential for modern businesses across all industries. Companies adopting digital technologies improve efficiency and reach new customers. Digital tools enable better data collection and analysis for informed decision-making. E-commerce platforms allow businesses to operate twenty-four hours daily without physical limitations. Social media provides cost-effective marketing channels to target specific audiences. Mobile applications enhance customer engagement and loyalty. However, successful digital transformation requires more than just adopting new technologies. Employees need training to use new systems effectively. Organizational processes must adapt to support digital workflows. Companies should develop comprehensive digital strategies aligned with business objectives rather than adopting technology for its own sake.",
+        async def open_stream_on(target, timeout: float):
+            return target.name, await self.async_client.chat.completions.create(
+                **{**kwargs, "model": target.name, "timeout": timeout}, stream=True
+            )
 
-            "Economics": "Economic growth measures a nation's increasing productivity and wealth creation. Several factors contribute to economic growth including technological innovation, capital investment, and workforce development. Countries with strong education systems typically achieve higher growth rates. Technology improvements increase productivity, allowing workers to produce more with same effort. Capital investment in infrastructure and equipment enables business expansion. International trade allows countries to specialize in areas where they have competitive advantages. Government policies supporting business and innovation encourage economic growth. Stable political systems and predictable regulations attract business investment. Countries must balance growth with sustainable practices to ensure long-term prosperity.",
+        async def open_stream(timeout: float):
+            # Latency is measured to the first response; hedging a stream would double-bill it
+            return await self.router.acomplete(open_stream_on, timeout, hedge=False)
 
-            "Workplace Practices": "Effective meetings save time and improve decisions when conducted well. Many organizations waste resources on unproductive meetings lacking clear objectives. Successful meetings start with defined agendas shared before the meeting begins. Participants understand what decisions need making or information needs sharing. Clear time limits keep meetings focused and productive. Leaders should encourage participation from all attendees, not just senior members. Diverse perspectives improve decision quality and increase team buy-in. Follow-up actions should be documented with assigned owners and deadlines. Poor follow-up undermines meeting effectiveness. Regular check-ins ensure action items are completed as promised. Organizations reducing meetings to only necessary ones report improved productivity and employee satisfaction.",
-        }
+        try:
+            target, stream = await aretry(open_stream, **self._retry_policy(deadline))
+            try:
+                async for chunk in stream:
+                    # Providers that report usage on streams send it on the final chunk
+                    usage = getattr(chunk, "usage", None) or usage
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if not delta:
+                        continue
+                    parts.append(delta)
+
+                    # Count words incrementally; a word may span chunk boundaries
+                    for ch in delta:
+                        if ch.isspace():
+                            in_word = False
+                        elif not in_word:
+                            in_word = True
+                            word_count += 1
+
+                    if word_count > max_words:
+                        print(f"[OK] Stream stopped early at {max_words} words")
+                        if call:
+                            call.truncated = True
+                        break
+
+                    if on_progress and time.monotonic() - last_update >= HF_STREAM_UPDATE_INTERVAL:
+                        last_update = time.monotonic()
+                        await on_progress("".join(parts))
+            finally:
+                await stream.close()
+
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self._record_breaker_failure(e)
+            self._record_error(call, start)
+            error_msg = str(e)
+            print(f"[ERROR] HF API stream failed: {error_msg}")
+            return None
 
-        # Select passages based on difficulty
-        if difficulty == "gmat":
-            passages = gmat_passages
-        elif difficulty == "cat":
-            passages = cat_passages
-        else:  # sbi
-            passages = sbi_passages
+        self.breaker.record_success()
+        if call:
+            call.record_response(target, time.monotonic() - start, usage)
+        passage = self._accept_passage(PassageStats.analyze("".join(parts).strip()).truncate(max_words))
+        if call and not passage:
+            call.outcome = "too_short"
+        self._cache_store(prompt, passage.text if passage else None)
+        return passage
 
-        # Return matching topic or random from difficulty level
-        if topic in passages:
-            return passages[topic]
-        return list(passages.values())[0]
+    def _fallback_passage_generator(self, topic: str, difficulty: str = None) -> Tuple[str, str]:
+        """
+        Fallback passage generator with high-quality pre-crafted passages.
+        Returns (topic, passage) appropriate to difficulty level, preferring the
+        requested topic and otherwise picking a passage on the nearest one.
+        """
+        return fallback_passage(topic, difficulty or DEFAULT_DIFFICULTY)
 
-    def _generate_questions(self, passage: str) -> List[Dict]:
-        """Generate 4 questions from the passage."""
+    async def _agenerate_questions(self, stats: PassageStats) -> List[Dict]:
+        """
+        Generate 4 questions from the passage: extractive questions built
+        locally (in the CPU pool) from the passage itself, or the generic
+        templates below if the passage is too short for them.
+        """
+        if LOCAL_QUESTIONS:
+            from local_questions import build_questions
+            questions = await get_cpu_pool().run(build_questions, stats, RC_NUM_QUESTIONS)
+            if questions:
+                return questions
+        return self._template_questions(stats.text)
+
+    def _template_questions(self, passage: str) -> List[Dict]:
+        """The generic primary purpose / inference / tone / implication set."""
         questions = [
             self._generate_main_idea_question(passage),
             self._generate_inference_question(passage),
@@ -401,19 +1000,56 @@ GENERATE PASSAGE (exactly {limit[0]}-{limit[1]} words):
 
     def validate_rc(self, rc_data: Dict) -> Tuple[bool, str]:
         """Validate RC quality before sending."""
-        passage = rc_data["passage"]
-        difficulty = rc_data.get("difficulty", DEFAULT_DIFFICULTY)
-        word_count = len(passage.split())
-        min_words, max_words = DIFFICULTY_LEVELS.get(difficulty, DIFFICULTY_LEVELS[DEFAULT_DIFFICULTY])["word_range"]
+        return check_rc(rc_data)
+
+
+def fallback_passage(topic: str, difficulty: str) -> Tuple[str, str]:
+    """
+    (topic, passage) from the offline corpus, where topic is the matched
+    entry's own topic (passage "" if unavailable). Module-level so it can
+    run in CPU pool workers, which keep the corpus index warm.
+    """
+    from fallback_corpus import get_corpus
+    try:
+        entry = get_corpus().get(difficulty, topic)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Fallback corpus unavailable: {e}")
+        return topic, ""
+
+    if not entry:
+        print(f"[ERROR] Fallback corpus has no passages for {difficulty}")
+        return topic, ""
+    return entry.get("topic") or topic, entry["passage"]
+
+
+def check_rc(rc_data: Dict) -> Tuple[bool, str]:
+    """
+    RC validation that needs no generator instance, so it can run in
+    worker processes (see pregen.py).
+    """
+    difficulty = rc_data.get("difficulty", DEFAULT_DIFFICULTY)
+    word_count = PassageStats.from_rc(rc_data).word_count
+    min_words, max_words = DIFFICULTY_LEVELS.get(difficulty, DIFFICULTY_LEVELS[DEFAULT_DIFFICULTY])["word_range"]
+
+    if not (min_words <= word_count <= max_words):
+        return False, f"Word count {word_count} outside range {min_words}-{max_words}"
+
+    if len(rc_data["questions"]) != RC_NUM_QUESTIONS:
+        return False, f"Expected {RC_NUM_QUESTIONS} questions, got {len(rc_data['questions'])}"
+
+    for q in rc_data["questions"]:
+        if len(q.get("options", [])) != 4:
+            return False, f"Question {q['number']} does not have 4 options"
+
+    return True, "Valid RC"
 
-        if not (min_words <= word_count <= max_words):
-            return False, f"Word count {word_count} outside range {min_words}-{max_words}"
 
-        if len(rc_data["questions"]) != RC_NUM_QUESTIONS:
-            return False, f"Expected {RC_NUM_QUESTIONS} questions, got {len(rc_data['questions'])}"
+_generator: Optional[RCGenerator] = None
 
-        for q in rc_data["questions"]:
-            if len(q.get("options", [])) != 4:
-                return False, f"Question {q['number']} does not have 4 options"
 
-        return True, "Valid RC"
+def get_generator() -> RCGenerator:
+    """Process-wide generator shared by the bot, scheduler and pool."""
+    global _generator
+    if _generator is None:
+        _generator = RCGenerator()
+    return _generator
@@ -0,0 +1,149 @@
+"""
+Background pool of pre-generated RCs for each difficulty level.
+Lets /quiz serve passages instantly while a producer task refills the pool.
+"""
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Dict, List, Optional
+from config import DIFFICULTY_LEVELS, RC_POOL_HIGH_WATERMARK, RC_POOL_LOW_WATERMARK, RC_POOL_REFILL_INTERVAL
+
+
+class RCPool:
+    """Bounded, persisted pool of validated RCs keyed by difficulty."""
+
+    def __init__(self, generator, data_dir="data",
+                 high_watermark: int = RC_POOL_HIGH_WATERMARK,
+                 low_watermark: int = RC_POOL_LOW_WATERMARK):
+        self.generator = generator
+        self.data_dir = data_dir
+        self.pool_file = f"{data_dir}/rc_pool.json"
+        self.high_watermark = max(1, high_watermark)
+        self.low_watermark = min(max(0, low_watermark), self.high_watermark)
+        self.pools: Dict[str, deque] = {d: deque() for d in DIFFICULTY_LEVELS}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ensure_data_dir()
+        self._load()
+
+    def _ensure_data_dir(self):
+        """Ensure data directory exists."""
+        if not os.path.exists(self.data_dir):
+            os.makedirs(self.data_dir)
+
+    def _load(self):
+        """Restore pooled RCs saved by a previous run."""
+        if not os.path.exists(self.pool_file):
+            return
+        try:
+            with open(self.pool_file, "r") as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Could not read RC pool, starting empty: {e}")
+            return
+
+        for difficulty, rcs in saved.items():
+            if difficulty in self.pools:
+                self.pools[difficulty].extend(rcs[:self.high_watermark])
+
+    def _save(self):
+        """Persist the pool atomically so a crash never leaves a torn file."""
+        tmp_file = f"{self.pool_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump({d: list(rcs) for d, rcs in self.pools.items()}, f)
+        os.replace(tmp_file, self.pool_file)
+
+    def size(self, difficulty: str) -> int:
+        """Number of ready RCs for a difficulty."""
+        return len(self.pools.get(difficulty, ()))
+
+    def take(self, difficulty: str, count: int = 1) -> List[Dict]:
+        """Take up to `count` ready RCs; may return fewer if the pool is short."""
+        pool = self.pools.get(difficulty)
+        if not pool:
+            return []
+
+        taken = [pool.popleft() for _ in range(min(count, len(pool)))]
+        self._save()
+
+        if len(pool) < self.low_watermark and self._wakeup:
+            self._wakeup.set()
+        return taken
+
+    def _needs_refill(self, difficulty: str) -> bool:
+        return self.size(difficulty) < self.low_watermark
+
+    async def start(self):
+        """Start the background producer."""
+        if self._task:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        print(f"[OK] RC pool producer started (low={self.low_watermark}, high={self.high_watermark})")
+
+    async def stop(self):
+        """Stop the producer and persist what is in the pool."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._save()
+
+    async def _run(self):
+        """
+        Refill any pool below the low watermark up to the high watermark.
+        Rounds that add nothing (or fail) double the wait, up to 16 intervals.
+        """
+        stalled_rounds = 0
+        offline_logged = False
+        while True:
+            stalled = False
+            try:
+                for difficulty in self.pools:
+                    if not self._needs_refill(difficulty):
+                        continue
+                    if not self.generator.use_api:
+                        # Fallback passages fail validation for every tier, so refilling would only discard them
+                        if not offline_logged:
+                            print("[INFO] RC pool refill paused: HuggingFace API unavailable")
+                            offline_logged = True
+                        break
+                    if await self._refill(difficulty) == 0:
+                        stalled = True
+            except Exception as e:
+                stalled = True
+                print(f"[ERROR] RC pool refill failed: {e}")
+
+            stalled_rounds = stalled_rounds + 1 if stalled else 0
+            delay = RC_POOL_REFILL_INTERVAL * 2 ** min(stalled_rounds, 4)
+            if stalled:
+                print(f"[WARN] RC pool refill made no progress, next attempt in {delay:.0f}s")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refill(self, difficulty: str) -> int:
+        """Generate RCs for one difficulty until the high watermark is reached; returns RCs added."""
+        missing = self.high_watermark - self.size(difficulty)
+        if missing <= 0:
+            return 0
+
+        # Invalid output is dropped; the next interval retries instead of spinning
+        added = 0
+        async for rc in self.generator.agenerate_many(missing, difficulty):
+            is_valid, message = self.generator.validate_rc(rc)
+            if not is_valid:
+                print(f"[WARN] RC pool discarded {difficulty} RC: {message}")
+                continue
+
+            self.pools[difficulty].append(rc)
+            self._save()
+            added += 1
+        return added
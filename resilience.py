@@ -0,0 +1,166 @@
+"""
+Retry with backoff and a circuit breaker for calls to the LLM provider.
+"""
+import asyncio
+import random
+import sys
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class BudgetExceeded(Exception):
+    """Raised when the overall latency budget runs out before a retry."""
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether an API error is worth retrying: openai connection errors and
+    timeouts, 408, 429 and 5xx. Other 4xx responses (bad request, auth) and
+    programming errors such as TypeError or KeyError are not.
+    """
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in (408, 429) or status >= 500
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # Only errors raised by openai can be openai errors, so never import it here
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(error, openai.APIConnectionError)
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full-jitter exponential backoff for the given attempt (0-based)."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+async def aretry(fn: Callable[[float], Awaitable[T]], attempts: int, base_delay: float,
+                 max_delay: float, budget: float, per_call_timeout: float,
+                 deadline: Optional[float] = None) -> T:
+    """
+    Await fn(timeout) until it succeeds, retrying transient errors with
+    jittered exponential backoff. Each call gets the smaller of
+    `per_call_timeout` and the time left before `deadline` (a time.monotonic()
+    value shared by every call of one generation; `budget` from now if None).
+    """
+    if deadline is None:
+        deadline = time.monotonic() + budget
+    for attempt in range(max(1, attempts)):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise BudgetExceeded(f"latency budget of {budget:.0f}s exhausted")
+        try:
+            return await fn(min(per_call_timeout, remaining))
+        except Exception as e:
+            last_attempt = attempt == attempts - 1
+            if last_attempt or not is_transient(e):
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            if time.monotonic() + delay >= deadline:
+                raise
+            print(f"[WARN] HF API attempt {attempt + 1} failed ({e}); retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+    raise BudgetExceeded("no attempts made")
+
+
+class CircuitBreaker:
+    """
+    Classic closed/open/half-open breaker.
+    After `failure_threshold` consecutive failures the breaker opens and
+    rejects calls for `reset_timeout` seconds, then lets a single probe
+    through; a successful probe closes it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.rejections = 0
+        self.times_opened = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go to the provider right now."""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+
+            if self.state == self.CLOSED:
+                allowed = True
+            elif self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                allowed = True
+            else:
+                allowed = False
+
+            if allowed:
+                self.calls += 1
+            else:
+                self.rejections += 1
+            return allowed
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            if self.state != self.CLOSED:
+                print(f"[OK] Circuit '{self.name}' closed, provider recovered")
+            self.state = self.CLOSED
+
+    def release(self):
+        """
+        An allowed call ended without an outcome (e.g. it was cancelled).
+        Frees the half-open probe slot, which would otherwise reject calls forever.
+        """
+        with self._lock:
+            self.probe_in_flight = False
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.probe_in_flight = False
+            if error is not None:
+                self.last_error = str(error)[:200]
+
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    print(f"[WARN] Circuit '{self.name}' opened after {self.consecutive_failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict:
+        """State and counters for admin display."""
+        with self._lock:
+            retry_in = 0.0
+            if self.state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+            return {
+                "name": self.name,
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "calls": self.calls,
+                "successes": self.successes,
+                "failures": self.failures,
+                "rejections": self.rejections,
+                "times_opened": self.times_opened,
+                "retry_in": retry_in,
+                "last_error": self.last_error,
+            }
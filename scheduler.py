@@ -3,12 +3,13 @@ Scheduler for daily RC sending via Telegram.
 """
 import asyncio
 import json
+import os
 from datetime import datetime, time
 from zoneinfo import ZoneInfo
-from telegram import Bot
-from telegram.error import TelegramError
-from rc_generator import RCGenerator
-from config import TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, DAILY_SEND_TIME, TIMEZONE
+from rc_generator import get_generator
+from rc_archive import RCArchive
+from passage_stats import PassageStats
+from config import TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, DAILY_SEND_TIME, TIMEZONE, DEFAULT_DIFFICULTY
 
 
 class RCScheduler:
@@ -19,10 +20,19 @@ class RCScheduler:
         self.chat_id = TELEGRAM_CHAT_ID
         self.send_time = datetime.strptime(DAILY_SEND_TIME, "%H:%M").time()
         self.timezone = ZoneInfo(TIMEZONE)
-        self.generator = RCGenerator()
-        self.bot = Bot(token=self.token)
+        self.generator = get_generator()
+        self.archive = RCArchive()
+        self._bot = None
         self.data_dir = "data"
 
+    @property
+    def bot(self):
+        """Telegram Bot client, imported and built on first send."""
+        if self._bot is None:
+            from telegram import Bot
+            self._bot = Bot(token=self.token)
+        return self._bot
+
     async def start_scheduler(self):
         """Start the daily scheduler."""
         print(f"🕐 Scheduler started. Daily RC will send at {DAILY_SEND_TIME} {TIMEZONE}")
@@ -61,11 +71,14 @@ class RCScheduler:
             print("⚠️ TELEGRAM_CHAT_ID not set. Skipping scheduled send.")
             return
 
+        from telegram.error import TelegramError
+
         try:
             print(f"📤 Sending daily RC to chat {self.chat_id}...")
 
-            # Generate RC
-            rc = self.generator.generate_daily_rc()
+            # Serve the pre-generated RC for today if there is one, else generate
+            today = datetime.now(self.timezone).date().isoformat()
+            rc = self.archive.get(today, DEFAULT_DIFFICULTY) or await self.generator.agenerate_daily_rc()
             is_valid, message = self.generator.validate_rc(rc)
 
             if not is_valid:
@@ -82,7 +95,7 @@ class RCScheduler:
 🔥 *Level:* GMAT 700+ / CAT Advanced
 
 ━━━━━━━━━━━━━━━━━━━━━
-*PASSAGE* ({len(passage.split())} words)
+*PASSAGE* ({PassageStats.from_rc(rc).word_count} words)
 ━━━━━━━━━━━━━━━━━━━━━
 
 {passage}
@@ -116,6 +129,8 @@ Try to answer before using /answer for solutions!
                     parse_mode="Markdown"
                 )
 
+            await self.generator.amark_served(rc)
+
             # Save to log
             today = datetime.now().date().isoformat()
             send_log = {
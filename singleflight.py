@@ -0,0 +1,31 @@
+"""
+Request coalescing for concurrent async work.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Runs at most one call per key; concurrent callers share its result."""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        """Await fn() for `key`, joining an in-flight call if one exists."""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+
+        # Shield so one impatient caller can't cancel the work others wait on
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    def in_flight(self, key: Hashable) -> bool:
+        """True while a call for `key` is running (e.g. for /apistatus)."""
+        return key in self._inflight
@@ -0,0 +1,57 @@
+"""
+Compaction: concurrent runs on one store, and segments pruned mid-run.
+"""
+import json
+import os
+import threading
+
+from analytics_store import AnalyticsStore
+
+
+class FakeLog:
+    """EventLogWriter.segments() over a fixed list of (path, day, size)."""
+
+    def __init__(self, segments):
+        self._segments = segments
+
+    def segments(self):
+        return list(self._segments)
+
+
+def write_segment(path, day, users):
+    with open(path, "w", encoding="utf-8") as f:
+        for i, user in enumerate(users):
+            event = {"timestamp": f"{day}T10:00:{i % 60:02d}", "user_id": user,
+                     "action": "view_rc", "difficulty": "gmat"}
+            f.write(json.dumps(event) + "\n")
+    return path, day, os.path.getsize(path)
+
+
+def test_concurrent_compaction_counts_each_segment_once(tmp_path):
+    segments = [
+        write_segment(str(tmp_path / f"analytics.2026-01-0{day}.0.jsonl"), f"2026-01-0{day}", range(50))
+        for day in (1, 2, 3)
+    ]
+    # Pruned between listing and reading
+    segments.insert(1, (str(tmp_path / "analytics.2026-01-01.1.jsonl"), "2026-01-01", 10))
+    store = AnalyticsStore(str(tmp_path / "partitions"))
+    log = FakeLog(segments)
+    errors = []
+
+    def compact():
+        try:
+            store.compact(log)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=compact) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert store.days() == ["2026-01-01", "2026-01-02", "2026-01-03"]
+    assert all(part["rows"] == 50 for part in store.manifest["partitions"].values())
+    assert "analytics.2026-01-01.1.jsonl" not in store.manifest["compacted"]
+    assert AnalyticsStore(store.root).manifest == store.manifest
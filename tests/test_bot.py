@@ -0,0 +1,200 @@
+"""
+/today deadline, provisional send and in-place upgrade, and /quiz
+delivery, driven through RCBot with fake Telegram messages and an
+offline generator.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import bot
+import rc_generator
+from config import FALLBACK_CORPUS_PATH
+from passage_stats import PassageStats
+
+TODAY_TOPIC = "Today's topic"
+
+
+class FakeMessage:
+    """A sent Telegram message that records its edits."""
+
+    def __init__(self, text: str):
+        self.original = text
+        self.text = text
+        self.edits = []
+        self.deleted = False
+
+    async def edit_text(self, text: str, **kwargs):
+        self.edits.append(text)
+        self.text = text
+
+    async def delete(self):
+        self.deleted = True
+
+
+class FakeIncoming:
+    """update.message: the user's command, which the bot replies to."""
+
+    def __init__(self):
+        self.from_user = SimpleNamespace(id=1, full_name="Test User")
+        self.sent = []
+
+    async def reply_text(self, text: str, **kwargs):
+        message = FakeMessage(text)
+        self.sent.append(message)
+        return message
+
+
+def make_update():
+    return SimpleNamespace(message=FakeIncoming())
+
+
+def passage_messages(update):
+    return [m for m in update.message.sent if "Today's RC Challenge" in m.text]
+
+
+@pytest.fixture
+def rcbot(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    generator = rc_generator.RCGenerator()
+    generator.use_api = False
+    monkeypatch.setattr(bot, "get_generator", lambda: generator)
+    instance = bot.RCBot()
+    yield instance
+    instance.analytics.close()
+
+
+def today_rc(rcbot):
+    rc = asyncio.run(rcbot.generator.afallback_rc(bot.DEFAULT_DIFFICULTY))
+    rc["topic"] = TODAY_TOPIC
+    return rc
+
+
+def slow_today_rc(rc, delay):
+    async def get_today_rc(difficulty, on_progress=None):
+        await asyncio.sleep(delay)
+        return rc, "Valid RC"
+    return get_today_rc
+
+
+def test_rc_within_deadline_is_sent_directly(monkeypatch, rcbot):
+    rc = today_rc(rcbot)
+    monkeypatch.setattr(bot, "TODAY_DEADLINE_SECONDS", 1.0)
+    monkeypatch.setattr(rcbot, "_get_today_rc", slow_today_rc(rc, 0.0))
+    update = make_update()
+
+    asyncio.run(rcbot.today(update, None))
+
+    [passage] = passage_messages(update)
+    assert "⏳" not in passage.text
+    assert rcbot.current_rc is rc
+    assert not rcbot._upgrades
+
+
+def test_missed_deadline_sends_provisional_then_upgrades_in_place(monkeypatch, rcbot):
+    rc = today_rc(rcbot)
+    monkeypatch.setattr(bot, "TODAY_DEADLINE_SECONDS", 0.05)
+    monkeypatch.setattr(bot, "TODAY_UPGRADE_EDIT", True)
+    monkeypatch.setattr(rcbot, "_get_today_rc", slow_today_rc(rc, 0.3))
+    update = make_update()
+
+    async def run():
+        await rcbot.today(update, None)
+        assert rcbot.current_rc.get("provisional")
+        await asyncio.gather(*list(rcbot._upgrades))
+
+    asyncio.run(run())
+
+    [passage] = passage_messages(update)
+    assert "⏳" in passage.original
+    assert TODAY_TOPIC in passage.text
+    assert "⏳" not in passage.text
+    edited = [m for m in update.message.sent if m.edits]
+    assert len(edited) == 1 + len(rc["questions"])
+    assert rcbot.current_rc is rc
+
+
+def test_invalid_provisional_waits_for_todays_rc(monkeypatch, rcbot):
+    rc = today_rc(rcbot)
+    monkeypatch.setattr(bot, "TODAY_DEADLINE_SECONDS", 0.05)
+    monkeypatch.setattr(rcbot, "_get_today_rc", slow_today_rc(rc, 0.2))
+
+    async def short_fallback(difficulty=None):
+        return {**rc, "topic": "Stand-in", "passage": "Far too short to be an RC.", "stats": None}
+
+    monkeypatch.setattr(rcbot.generator, "afallback_rc", short_fallback)
+    update = make_update()
+
+    asyncio.run(rcbot.today(update, None))
+
+    [passage] = passage_messages(update)
+    assert TODAY_TOPIC in passage.text
+    assert "⏳" not in passage.text
+    assert not passage.edits
+    assert rcbot.current_rc is rc
+    assert not rcbot._upgrades
+
+
+def corpus_rcs(generator, difficulty):
+    """One RC per corpus passage of `difficulty`, with template questions."""
+    with open(FALLBACK_CORPUS_PATH, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    return [
+        generator._build_rc(entry["topic"], PassageStats.analyze(entry["passage"]), difficulty,
+                            generator._template_questions(entry["passage"]))
+        for entry in entries if entry["difficulty"] == difficulty
+    ]
+
+
+def quiz_topics(update):
+    return [line.split("*Topic:* ")[1] for m in update.message.sent if "*RC " in m.text
+            for line in m.text.splitlines() if "*Topic:* " in line]
+
+
+def test_quiz_replaces_a_repeated_pooled_rc(monkeypatch, rcbot):
+    difficulty = bot.DEFAULT_DIFFICULTY
+    first, second, replacement = corpus_rcs(rcbot.generator, difficulty)[:3]
+    # A full pool, so no producer runs, with one passage repeated
+    rcbot.pool.pools[difficulty].extend([first, dict(first, topic="Repeat"), second])
+    requested = []
+
+    async def agenerate_many(n, difficulty=None, **kwargs):
+        requested.append(n)
+        yield replacement
+
+    monkeypatch.setattr(rcbot.generator, "agenerate_many", agenerate_many)
+    update = make_update()
+
+    asyncio.run(rcbot.quiz_command(update, None))
+
+    assert requested == [1]
+    assert quiz_topics(update) == [first["topic"], second["topic"], replacement["topic"]]
+    assert "Quiz Complete" in update.message.sent[-1].text
+    assert not any("Only" in m.text for m in update.message.sent)
+
+
+def test_apistatus_lists_todays_rcs_still_generating(monkeypatch, rcbot):
+    monkeypatch.setattr(rcbot, "_is_admin", lambda user_id: True)
+    rc = today_rc(rcbot)
+    release = asyncio.Event()
+
+    async def generate_today_rc(difficulty, today, on_progress=None):
+        await release.wait()
+        return rc, "Valid RC"
+
+    monkeypatch.setattr(rcbot, "_generate_today_rc", generate_today_rc)
+    update = make_update()
+
+    async def run():
+        flight = asyncio.create_task(rcbot._get_today_rc(bot.DEFAULT_DIFFICULTY))
+        await asyncio.sleep(0)
+        await rcbot.api_status(update, None)
+        release.set()
+        await flight
+
+    asyncio.run(run())
+
+    name = bot.DIFFICULTY_LEVELS[bot.DEFAULT_DIFFICULTY]["name"]
+    assert f"Generating today's RC: {name}" in update.message.sent[-1].text
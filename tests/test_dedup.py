@@ -0,0 +1,79 @@
+"""
+MinHash estimates and served-passage recording: only validated, sent RCs
+enter the index, once.
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+import rc_generator
+from dedup import _PRIME, MinHasher, PassageIndex, _mulmod, signature_similarity
+
+PASSAGE = " ".join(f"Sentence number {i} discusses a distinct idea about topic {i}." for i in range(60))
+
+
+def test_mulmod_matches_exact_arithmetic():
+    rng = np.random.default_rng(7)
+    prime = int(_PRIME)
+    a = rng.integers(0, prime, size=200, dtype=np.uint64)
+    x = rng.integers(0, prime, size=200, dtype=np.uint64)
+    a[:2], x[:2] = prime - 1, prime - 1
+
+    assert _mulmod(a, x).tolist() == [int(i) * int(j) % prime for i, j in zip(a, x)]
+
+
+@pytest.mark.parametrize("overlap", [0, 10, 20, 30, 40, 55, 60])
+def test_signature_similarity_estimates_jaccard(overlap):
+    # Enough permutations that the estimate's standard error is at most ~0.022
+    hasher = MinHasher(num_perm=512)
+    other = " ".join(
+        f"Sentence number {i} discusses a distinct idea about topic {i}." if i < overlap
+        else f"Paragraph {i} covers an unrelated claim on subject {i * 7}."
+        for i in range(60)
+    )
+    a, b = hasher.shingles(PASSAGE), hasher.shingles(other)
+    exact = len(a & b) / len(a | b)
+
+    estimate = signature_similarity(hasher.signature(PASSAGE), hasher.signature(other))
+
+    assert abs(estimate - exact) <= 0.08
+
+
+def test_index_skips_signatures_already_indexed(tmp_path):
+    index = PassageIndex(str(tmp_path / "index.bin"))
+
+    assert index.add(PASSAGE)
+    assert not index.add(PASSAGE)
+    assert len(index) == 1
+    assert len(PassageIndex(str(tmp_path / "index.bin"))) == 1
+
+
+def test_add_if_novel_rejects_near_duplicates(tmp_path):
+    index = PassageIndex(str(tmp_path / "index.bin"))
+    near_duplicate = PASSAGE.replace("topic 59.", "topic fifty-nine.")
+
+    assert index.add_if_novel(index.signature(PASSAGE), 0.5) == (True, 0.0)
+    added, similarity = index.add_if_novel(index.signature(near_duplicate), 0.5)
+    assert not added and similarity >= 0.5
+    assert len(index) == 1
+
+
+def test_generation_does_not_record_until_served(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    generator = rc_generator.RCGenerator()
+    generator.passage_index = PassageIndex(str(tmp_path / "index.bin"))
+
+    async def run():
+        rc = await generator.agenerate_daily_rc()
+        assert len(generator.passage_index) == 0
+
+        monkeypatch.setattr(generator, "validate_rc", lambda rc: (False, "too short"))
+        assert not await generator.amark_served(rc)
+
+        monkeypatch.setattr(generator, "validate_rc", lambda rc: (True, "Valid RC"))
+        assert await generator.amark_served(rc)
+        assert not await generator.amark_served(rc)
+
+    asyncio.run(run())
+    assert len(generator.passage_index) == 1
@@ -0,0 +1,126 @@
+"""
+EventLogWriter: flushes, size and day rotation, gzipped segments, drops
+under backpressure, and pruning that compacts segments before deleting them.
+"""
+import gzip
+import json
+import os
+import time
+from datetime import date, timedelta
+
+from analytics_store import AnalyticsStore
+from event_log import EventLogWriter
+
+OLD_DAY = (date.today() - timedelta(days=30)).isoformat()
+YESTERDAY = date.today() - timedelta(days=1)
+
+
+def read_events(path):
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_flush_writes_queued_events(tmp_path):
+    path = tmp_path / "analytics.jsonl"
+    log = EventLogWriter(str(path), flush_interval=60)
+
+    for i in range(5):
+        assert log.write({"n": i})
+    assert log.flush()
+
+    assert read_events(path) == [{"n": i} for i in range(5)]
+    log.close()
+    assert log.stats()["written"] == 5
+
+
+def test_size_rotation_writes_gzipped_segments(tmp_path):
+    path = tmp_path / "analytics.jsonl"
+    log = EventLogWriter(str(path), rotate_mb=100 / (1024 * 1024), retention_days=None,
+                         max_mb=None, compress=True)
+
+    for i in range(6):
+        log.write({"n": i, "padding": "x" * 40})
+        log.flush()
+    log.close()
+
+    segments = [segment for segment, _, _ in log.segments()]
+    assert segments and all(segment.endswith(".jsonl.gz") for segment in segments)
+    assert not list(tmp_path.glob("*.tmp"))
+    assert log.rotations == len(segments)
+    events = [e for segment in segments for e in read_events(segment)] + read_events(path)
+    assert [e["n"] for e in events] == list(range(6))
+
+
+def test_active_file_from_a_previous_day_is_rotated(tmp_path):
+    path = tmp_path / "analytics.jsonl"
+    path.write_text(json.dumps({"n": "old"}) + "\n", encoding="utf-8")
+    stamp = time.mktime(YESTERDAY.timetuple()) + 12 * 3600
+    os.utime(path, (stamp, stamp))
+    log = EventLogWriter(str(path), retention_days=None, compress=False)
+
+    log.write({"n": "new"})
+    log.close()
+
+    [(segment, day, _)] = log.segments()
+    assert day == YESTERDAY.isoformat()
+    assert read_events(segment) == [{"n": "old"}]
+    assert read_events(path) == [{"n": "new"}]
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path, monkeypatch):
+    log = EventLogWriter(str(tmp_path / "analytics.jsonl"), queue_size=2)
+    # No writer thread, so nothing drains the queue
+    monkeypatch.setattr(log, "_start", lambda: None)
+
+    results = [log.write({"n": i}) for i in range(5)]
+
+    assert results == [True, True, False, False, False]
+    stats = log.stats()
+    assert (stats["enqueued"], stats["dropped"], stats["queued"]) == (2, 3, 2)
+
+
+def test_prune_keeps_the_newest_segments_within_the_size_budget(tmp_path):
+    days = [(date.today() - timedelta(days=n)).isoformat() for n in (3, 2, 1)]
+    for day in days:
+        (tmp_path / f"analytics.{day}.0.jsonl").write_text("x" * 600, encoding="utf-8")
+    log = EventLogWriter(str(tmp_path / "analytics.jsonl"), retention_days=None, max_mb=1000 / (1024 * 1024))
+
+    log._prune()
+
+    assert [day for _, day, _ in log.segments()] == days[2:]
+
+
+def write_old_segment(log_dir, events=20):
+    path = log_dir / f"analytics.{OLD_DAY}.0.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(events):
+            f.write(json.dumps({"timestamp": f"{OLD_DAY}T09:00:{i:02d}", "user_id": i,
+                                "action": "view_rc", "difficulty": "gmat"}) + "\n")
+    return path
+
+
+def test_prune_compacts_before_deleting(tmp_path):
+    segment = write_old_segment(tmp_path)
+    store = AnalyticsStore(str(tmp_path / "parts"))
+    log = EventLogWriter(str(tmp_path / "analytics.jsonl"), retention_days=7, on_prune=store.compact)
+
+    log._prune()
+
+    assert not segment.exists()
+    assert store.manifest["partitions"][OLD_DAY] == {"rows": 20}
+    assert AnalyticsStore(store.root).days() == [OLD_DAY]
+
+
+def test_failed_prune_hook_keeps_segments(tmp_path):
+    segment = write_old_segment(tmp_path)
+
+    def broken(log):
+        raise OSError("disk full")
+
+    log = EventLogWriter(str(tmp_path / "analytics.jsonl"), retention_days=7, on_prune=broken)
+
+    log._prune()
+
+    assert segment.exists()
+    assert log.errors == 1
@@ -0,0 +1,61 @@
+"""
+Offline corpus: every passage makes a valid RC for its tier, and fallback
+RCs are labelled with the topic of the corpus passage they use.
+"""
+import asyncio
+import json
+
+import pytest
+
+import rc_generator
+from config import DIFFICULTY_LEVELS, FALLBACK_CORPUS_PATH
+from fallback_corpus import get_corpus
+from passage_stats import PassageStats
+
+
+def corpus_entries():
+    with open(FALLBACK_CORPUS_PATH, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_every_corpus_entry_is_a_valid_rc(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    generator = rc_generator.RCGenerator()
+    entries = corpus_entries()
+    assert {entry["difficulty"] for entry in entries} == set(DIFFICULTY_LEVELS)
+
+    async def build(entry):
+        stats = PassageStats.analyze(entry["passage"])
+        questions = await generator._agenerate_questions(stats)
+        return generator._build_rc(entry["topic"], stats, entry["difficulty"], questions)
+
+    async def run():
+        return [await build(entry) for entry in entries]
+
+    for entry, rc in zip(entries, asyncio.run(run())):
+        is_valid, message = generator.validate_rc(rc)
+        assert is_valid, f"{entry['difficulty']} {entry['topic']}: {message}"
+
+
+@pytest.mark.parametrize("difficulty", sorted(DIFFICULTY_LEVELS))
+def test_offline_rc_is_valid(monkeypatch, tmp_path, difficulty):
+    monkeypatch.chdir(tmp_path)
+    generator = rc_generator.RCGenerator()
+    generator.use_api = False
+
+    rc = asyncio.run(generator.afallback_rc(difficulty))
+
+    assert generator.validate_rc(rc) == (True, "Valid RC")
+
+
+def test_fallback_rc_uses_matched_topic(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(rc_generator, "RC_TOPICS", ["Marine biology"])
+    generator = rc_generator.RCGenerator()
+    generator.use_api = False
+
+    rc = asyncio.run(generator.agenerate_daily_rc())
+
+    corpus = get_corpus()
+    assert rc["topic"] in corpus.topics(rc["difficulty"])
+    assert rc["topic"] != "Marine biology"
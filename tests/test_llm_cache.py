@@ -0,0 +1,73 @@
+"""
+LLM response cache: TTL expiry, LRU eviction, and hits that only write
+last_access once it is stale.
+"""
+import pytest
+
+import llm_cache
+from llm_cache import LLMResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    return clock
+
+
+def make_cache(tmp_path, **kwargs):
+    return LLMResponseCache(str(tmp_path / "cache.sqlite3"), **kwargs)
+
+
+def last_access(cache, key):
+    return cache._conn.execute("SELECT last_access FROM responses WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_expired_entries_miss_and_are_deleted(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl_seconds=60)
+    cache.put("a", "response")
+
+    clock.now += 30
+    assert cache.get("a") == "response"
+    clock.now += 31
+    assert cache.get("a") is None
+
+    assert cache.stats() == {"entries": 0, "hits": 1, "misses": 1, "evictions": 1, "hit_rate": 0.5}
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = make_cache(tmp_path, max_entries=2, ttl_seconds=0, touch_seconds=60)
+    cache.put("a", "first")
+    clock.now += 1
+    cache.put("b", "second")
+
+    clock.now += 100
+    assert cache.get("a") == "first"
+    clock.now += 1
+    cache.put("c", "third")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("first", "third")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_hits_touch_last_access_only_when_stale(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl_seconds=0, touch_seconds=60)
+    cache.put("a", "response")
+    stored = clock.now
+
+    clock.now += 59
+    assert cache.get("a") == "response"
+    assert last_access(cache, "a") == stored
+
+    clock.now += 1
+    assert cache.get("a") == "response"
+    assert last_access(cache, "a") == clock.now
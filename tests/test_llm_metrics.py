@@ -0,0 +1,59 @@
+"""
+LLM metrics outcomes: recorded after dedup, with cache hits kept apart.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import rc_generator
+from dedup import PassageIndex
+from llm_cache import LLMResponseCache
+from llm_metrics import LLMMetrics
+
+PASSAGE = " ".join(
+    f"Researchers studying region {i} found that rainfall shaped how settlements grew over centuries."
+    for i in range(35)
+)
+
+
+class SamePassageCompletions:
+    """chat.completions that answers every prompt with the same passage."""
+
+    async def create(self, model: str, timeout: float, **kwargs):
+        message = SimpleNamespace(content=PASSAGE)
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=600)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=usage)
+
+
+def make_generator(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(rc_generator, "HF_TARGETS", "fast/model:a")
+    # One topic, so the second generation's first prompt hits the cache
+    monkeypatch.setattr(rc_generator, "RC_TOPICS", ["history"])
+    generator = rc_generator.RCGenerator()
+    generator.use_api = True
+    generator.structured_output = False
+    generator.passage_index = PassageIndex(str(tmp_path / "index.bin"))
+    generator.cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"))
+    generator.metrics = LLMMetrics(str(tmp_path / "metrics.sqlite3"))
+    generator._async_client = SimpleNamespace(chat=SimpleNamespace(completions=SamePassageCompletions()))
+    return generator
+
+
+def test_outcomes_recorded_after_dedup(monkeypatch, tmp_path):
+    generator = make_generator(monkeypatch, tmp_path)
+
+    async def run():
+        rc = await generator.agenerate_daily_rc()
+        assert await generator.amark_served(rc)
+        # Every candidate now repeats the served passage; the first is a cache hit
+        await generator.agenerate_daily_rc()
+
+    asyncio.run(run())
+    summary = generator.metrics.summary()["all"]
+
+    attempts = rc_generator.DEDUP_MAX_ATTEMPTS
+    assert summary["calls"] == 1 + attempts
+    assert summary["outcomes"] == {"accepted": 1, "cached": 1, "duplicate": attempts - 1}
+    assert summary["cached_rcs"] == 1
+    # Cache hits spend no tokens and are not in the tokens-per-RC denominator
+    assert summary["prompt_tokens_per_rc"] == summary["prompt_tokens"]
@@ -0,0 +1,133 @@
+"""
+ModelRouter failover, cooldown and hedging against a fake OpenAI client.
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import rc_generator
+from llm_router import ModelRouter
+from resilience import aretry
+
+SPEC = "fast/model:a,backup/model:b"
+
+
+class ProviderError(Exception):
+    """Stand-in for an openai.APIStatusError."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeCompletions:
+    """
+    chat.completions with per-target behaviour: `behaviour[model]` is a
+    (delay, error) pair, so a target can be slow, down, or both.
+    """
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.calls = []
+
+    async def create(self, model: str, timeout: float, **kwargs):
+        self.calls.append(model)
+        delay, error = self.behaviour.get(model, (0.0, None))
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        message = SimpleNamespace(content=f"passage from {model} " * 60)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def make_client(behaviour):
+    completions = FakeCompletions(behaviour)
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions)), completions
+
+
+def make_router(**kwargs) -> ModelRouter:
+    return ModelRouter.from_spec(SPEC, default_provider="a", **kwargs)
+
+
+def call_with(client):
+    async def call(target, timeout):
+        return target.name, await client.chat.completions.create(model=target.name, timeout=timeout)
+    return call
+
+
+def test_failover_to_next_target_on_retry():
+    router = make_router(failure_threshold=3, cooldown=60)
+    client, completions = make_client({"fast/model:a": (0.0, ProviderError(503))})
+
+    async def create(timeout):
+        return await router.acomplete(call_with(client), timeout)
+
+    target, _ = asyncio.run(aretry(create, attempts=2, base_delay=0, max_delay=0,
+                                   budget=5, per_call_timeout=5))
+
+    assert target == "backup/model:b"
+    assert completions.calls == ["fast/model:a", "backup/model:b"]
+    assert router.targets[0].failures == 1
+
+
+def test_cooldown_after_repeated_failures():
+    router = make_router(failure_threshold=2, cooldown=0.2)
+    client, completions = make_client({"fast/model:a": (0.0, ProviderError(500))})
+    primary = router.targets[0]
+
+    async def run():
+        # Both targets are untried; config order picks the primary first
+        for _ in range(2):
+            try:
+                await router._timed(primary, call_with(client), 5)
+            except ProviderError:
+                pass
+
+    asyncio.run(run())
+    assert not primary.available(time.monotonic())
+    assert [t.name for t in router.ranked()] == ["backup/model:b"]
+
+    time.sleep(0.25)
+    assert primary.available(time.monotonic())
+    assert primary.name in [t.name for t in router.ranked()]
+
+
+def test_everything_cooling_down_tries_first_to_recover():
+    router = make_router(failure_threshold=1, cooldown=60)
+    now = time.monotonic()
+    router.targets[0].cooldown_until = now + 30
+    router.targets[1].cooldown_until = now + 10
+
+    assert [t.name for t in router.ranked()] == ["backup/model:b"]
+
+
+def test_hedge_beats_slow_primary():
+    router = make_router(hedge_enabled=True, hedge_default_delay=0.05)
+    client, completions = make_client({"fast/model:a": (1.0, None)})
+
+    started = time.monotonic()
+    target, _ = asyncio.run(router.acomplete(call_with(client), 5))
+
+    assert target == "backup/model:b"
+    assert time.monotonic() - started < 0.5
+    assert router.hedges == 1
+    assert router.hedge_wins == 1
+    # The cancelled primary lost a race; that is not a failure
+    assert router.targets[0].failures == 0
+    assert router.targets[1].calls == 1
+
+
+def test_generator_fails_over_through_fake_client(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(rc_generator, "HF_TARGETS", SPEC)
+    monkeypatch.setattr(rc_generator, "HF_RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(rc_generator, "HF_RETRY_MAX_DELAY", 0)
+    generator = rc_generator.RCGenerator()
+    generator.use_api = True
+    generator._async_client, completions = make_client({"fast/model:a": (0.0, ProviderError(502))})
+
+    choices = asyncio.run(generator._arequest_choices("prompt"))
+
+    assert completions.calls == ["fast/model:a", "backup/model:b"]
+    assert choices and choices[0].startswith("passage from backup/model:b")
+    assert generator.breaker.state == generator.breaker.CLOSED
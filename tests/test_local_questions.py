@@ -0,0 +1,70 @@
+"""
+Local questions: four well-formed items per passage, the same answer key
+for the same passage, and None when a passage is too short.
+"""
+import json
+
+import pytest
+
+from config import FALLBACK_CORPUS_PATH
+from local_questions import LETTERS, build_questions, split_sentences
+from passage_stats import PassageStats
+
+
+def corpus_passages():
+    with open(FALLBACK_CORPUS_PATH, encoding="utf-8") as f:
+        return [json.loads(line)["passage"] for line in f if line.strip()]
+
+
+@pytest.fixture(scope="module")
+def passages():
+    return corpus_passages()
+
+
+def test_build_questions_is_deterministic(passages):
+    for passage in passages[:6]:
+        assert build_questions(PassageStats.analyze(passage)) == build_questions(PassageStats.analyze(passage))
+
+
+def test_different_passages_get_their_own_questions(passages):
+    first, second = (build_questions(PassageStats.analyze(p)) for p in passages[:2])
+
+    assert first[0]["options"] != second[0]["options"]
+
+
+def test_question_shape(passages):
+    for passage in passages:
+        stats = PassageStats.analyze(passage)
+        questions = build_questions(stats)
+
+        assert [q["type"] for q in questions] == ["Main Idea", "Detail", "Inference", "Logical Flow"]
+        assert [q["number"] for q in questions] == [1, 2, 3, 4]
+        for q in questions:
+            assert [option[:3] for option in q["options"]] == [f"{letter}) " for letter in LETTERS]
+            assert len({option[3:] for option in q["options"]}) == 4
+            assert q["correct_answer"] in LETTERS
+            assert set(q["explanation"]) == {"correct"} | set(LETTERS) - {q["correct_answer"]}
+
+
+def test_main_idea_answer_is_a_passage_sentence(passages):
+    stats = PassageStats.analyze(passages[0])
+    main_idea = build_questions(stats)[0]
+
+    answer = next(o[3:] for o in main_idea["options"] if o.startswith(main_idea["correct_answer"]))
+    sentences = split_sentences(stats)
+    if answer.endswith("..."):  # Long sentences are shortened for Telegram
+        assert any(s.startswith(answer[:-3]) for s in sentences)
+    else:
+        assert answer in sentences
+
+
+def test_short_passages_get_no_questions():
+    stats = PassageStats.analyze("One sentence. Two sentences. Three sentences.")
+
+    assert build_questions(stats) is None
+
+
+def test_count_limits_the_questions(passages):
+    questions = build_questions(PassageStats.analyze(passages[0]), count=2)
+
+    assert [q["type"] for q in questions] == ["Main Idea", "Detail"]
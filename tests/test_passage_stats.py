@@ -0,0 +1,51 @@
+"""
+PassageStats: one tokenization gives word counts and sentence boundaries,
+and truncation cuts at the last whole sentence that fits.
+"""
+from passage_stats import PassageStats
+
+TEXT = 'One two three. "Four five?" (Six seven eight!) Nine ten'
+
+
+def test_analyze_counts_words_and_sentence_ends():
+    stats = PassageStats.analyze(TEXT)
+
+    assert stats.word_count == 10
+    assert [words for _, words in stats.sentence_ends] == [3, 5, 8]
+    assert [TEXT[:end] for end, _ in stats.sentence_ends][-1] == 'One two three. "Four five?" (Six seven eight!)'
+
+
+def test_truncate_cuts_at_the_last_sentence_that_fits():
+    stats = PassageStats.analyze(TEXT)
+
+    cut = stats.truncate(7)
+
+    assert cut.text == 'One two three. "Four five?"'
+    assert cut.word_count == 5
+    assert cut.sentence_ends == stats.sentence_ends[:2]
+    assert PassageStats.analyze(cut.text).sentence_ends == cut.sentence_ends
+
+
+def test_truncate_without_a_boundary_cuts_after_the_last_word():
+    stats = PassageStats.analyze("alpha beta gamma delta epsilon.")
+
+    cut = stats.truncate(3)
+
+    assert (cut.text, cut.word_count, cut.sentence_ends) == ("alpha beta gamma", 3, [])
+
+
+def test_truncate_keeps_passages_within_the_limit():
+    stats = PassageStats.analyze(TEXT)
+
+    assert stats.truncate(10) is stats
+
+
+def test_from_rc_reuses_stats_only_while_they_match_the_passage():
+    stats = PassageStats.analyze(TEXT)
+    rc = {"passage": TEXT, "stats": stats.to_dict()}
+    rc["stats"]["word_count"] = 99  # Marker: reused stats are not recomputed
+
+    assert PassageStats.from_rc(rc).word_count == 99
+
+    rc["passage"] = TEXT + " Eleven."
+    assert PassageStats.from_rc(rc).word_count == 11
@@ -0,0 +1,108 @@
+"""
+Pregenerator slots: the highest-quality novel candidate is archived,
+duplicates of served passages are passed over, and concurrent slots never
+archive the same passage.
+"""
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+import pregen
+import rc_generator
+from config import FALLBACK_CORPUS_PATH
+from cpu_pool import CPUPool
+from dedup import PassageIndex
+from passage_stats import PassageStats
+
+DIFFICULTY = "gmat"
+
+
+@pytest.fixture
+def generator(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    generator = rc_generator.RCGenerator()
+    generator.use_api = False
+    generator.passage_index = PassageIndex(str(tmp_path / "index.bin"))
+    return generator
+
+
+def corpus_rcs(generator, n):
+    with open(FALLBACK_CORPUS_PATH, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    entries = [entry for entry in entries if entry["difficulty"] == DIFFICULTY][:n]
+    return [
+        generator._build_rc(entry["topic"], PassageStats.analyze(entry["passage"]), DIFFICULTY,
+                            generator._template_questions(entry["passage"]))
+        for entry in entries
+    ]
+
+
+def script_candidates(monkeypatch, generator, rcs, scores):
+    """agenerate_candidate yields `rcs` in order; score_passages scores them by topic."""
+    queue = list(rcs)
+
+    async def agenerate_candidate(difficulty, **kwargs):
+        await asyncio.sleep(0)  # Let concurrent slots interleave
+        return dict(queue.pop(0))
+
+    def score_passages(passages, difficulty):
+        return np.array([scores[rc["topic"]] for rc in rcs if rc["passage"] == passages[0].text])
+
+    monkeypatch.setattr(generator, "agenerate_candidate", agenerate_candidate)
+    monkeypatch.setattr(pregen, "score_passages", score_passages)
+    return queue
+
+
+def generate_slot(generator):
+    pregenerator = pregen.Pregenerator(generator, days=1, difficulties=[DIFFICULTY])
+    return asyncio.run(pregenerator._generate_slot(("2030-01-01", DIFFICULTY), "topic", CPUPool(0),
+                                                   asyncio.Semaphore(1)))
+
+
+def test_highest_quality_novel_candidate_is_kept(monkeypatch, generator):
+    monkeypatch.setattr(pregen, "PREGEN_CANDIDATES", 2)
+    low, high, unused = corpus_rcs(generator, 3)
+    queue = script_candidates(monkeypatch, generator, [low, high, unused],
+                              {low["topic"]: 0.2, high["topic"]: 0.9, unused["topic"]: 1.0})
+
+    rc = generate_slot(generator)
+
+    assert rc["topic"] == high["topic"]
+    assert rc["quality_score"] == 0.9
+    assert [r["topic"] for r in queue] == [unused["topic"]]
+
+
+def test_duplicates_are_not_candidates(monkeypatch, generator):
+    monkeypatch.setattr(pregen, "PREGEN_CANDIDATES", 2)
+    served, novel, other = corpus_rcs(generator, 3)
+    generator.passage_index.add(served["passage"])
+    script_candidates(monkeypatch, generator, [served, novel, other],
+                      {served["topic"]: 1.0, novel["topic"]: 0.4, other["topic"]: 0.3})
+
+    rc = generate_slot(generator)
+
+    assert rc["topic"] == novel["topic"]
+
+
+def test_concurrent_slots_regenerate_on_collision(monkeypatch, generator):
+    monkeypatch.setattr(pregen, "PREGEN_CANDIDATES", 2)
+    shared, *others = corpus_rcs(generator, 4)
+    # Both slots draw the shared passage first and rank it highest
+    script_candidates(monkeypatch, generator, [shared, shared] + others,
+                      {shared["topic"]: 0.9, **{rc["topic"]: 0.5 for rc in others}})
+    pregenerator = pregen.Pregenerator(generator, days=2, difficulties=[DIFFICULTY])
+    pool, semaphore = CPUPool(0), asyncio.Semaphore(2)
+
+    async def run():
+        return await asyncio.gather(*(
+            pregenerator._generate_slot((day, DIFFICULTY), "topic", pool, semaphore)
+            for day in ("2030-01-01", "2030-01-02")
+        ))
+
+    first, second = asyncio.run(run())
+
+    assert first["topic"] == shared["topic"]
+    assert second["topic"] != shared["topic"]
+    assert len(generator.passage_index) == 2
@@ -0,0 +1,59 @@
+"""
+Quality scoring: passages written for a tier score best under that tier's
+spec, scores are per passage, and over-long passages are scored as served.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from config import DIFFICULTY_LEVELS, FALLBACK_CORPUS_PATH
+from passage_stats import PassageStats
+from quality import score_passages, select_best
+
+
+def corpus_stats():
+    """Corpus passages analysed, by difficulty."""
+    by_tier = {}
+    with open(FALLBACK_CORPUS_PATH, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                by_tier.setdefault(entry["difficulty"], []).append(PassageStats.analyze(entry["passage"]))
+    return by_tier
+
+
+@pytest.mark.parametrize("difficulty", sorted(DIFFICULTY_LEVELS))
+def test_tier_passages_score_best_under_their_own_spec(difficulty):
+    by_tier = corpus_stats()
+
+    means = {tier: score_passages(passages, difficulty).mean() for tier, passages in by_tier.items()}
+
+    assert max(means, key=means.get) == difficulty
+
+
+def test_scores_are_per_passage():
+    passages = corpus_stats()["gmat"][:4]
+
+    batch = score_passages(passages, "gmat")
+
+    assert batch.shape == (4,)
+    assert np.allclose(batch, [score_passages([p], "gmat")[0] for p in passages])
+
+
+def test_over_long_passages_are_scored_as_truncated():
+    passage = corpus_stats()["sbi"][0]
+    max_words = DIFFICULTY_LEVELS["sbi"]["word_range"][1]
+    doubled = PassageStats.analyze(passage.text + "\n\n" + passage.text)
+    assert doubled.word_count > max_words
+
+    assert score_passages([doubled], "sbi")[0] == score_passages([doubled.truncate(max_words)], "sbi")[0]
+
+
+def test_select_best_prefers_the_tier_fit():
+    fit = corpus_stats()["gmat"][0]
+    stub = PassageStats.analyze("A single short paragraph that is nowhere near the word range.")
+
+    assert select_best([stub, fit], "gmat") is fit
+    assert select_best([stub], "gmat") is stub
+    assert select_best([], "gmat") is None
@@ -0,0 +1,142 @@
+"""
+aretry honours the shared deadline and only retries transient errors;
+CircuitBreaker opens, probes once half-open, and frees an abandoned probe.
+"""
+import asyncio
+import time
+
+import pytest
+
+import resilience
+from resilience import BudgetExceeded, CircuitBreaker, aretry
+
+
+class Transient(Exception):
+    status_code = 503
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+def flaky(failures, error=Transient):
+    """fn(timeout) that fails `failures` times, then returns the timeouts it was given."""
+    timeouts = []
+
+    async def fn(timeout):
+        timeouts.append(timeout)
+        if len(timeouts) <= failures:
+            raise error("provider error")
+        return timeouts
+
+    return fn
+
+
+def retry(fn, **kwargs):
+    options = dict(attempts=3, base_delay=0.001, max_delay=0.001, budget=10, per_call_timeout=5)
+    options.update(kwargs)
+    return asyncio.run(aretry(fn, **options))
+
+
+def test_transient_errors_are_retried():
+    assert len(retry(flaky(2))) == 3
+
+
+def test_other_errors_are_not_retried():
+    with pytest.raises(BadRequest):
+        retry(flaky(1, BadRequest))
+
+
+def test_last_attempt_error_is_raised():
+    with pytest.raises(Transient):
+        retry(flaky(3))
+
+
+def test_calls_get_the_time_left_before_the_deadline():
+    timeouts = retry(flaky(0), deadline=time.monotonic() + 2)
+
+    assert timeouts[0] <= 2
+
+
+def test_spent_deadline_makes_no_call():
+    calls = []
+
+    async def fn(timeout):
+        calls.append(timeout)
+
+    with pytest.raises(BudgetExceeded):
+        retry(fn, deadline=time.monotonic() - 1)
+    assert not calls
+
+
+def test_backoff_past_the_deadline_raises_instead_of_sleeping():
+    with pytest.raises(Transient):
+        retry(flaky(1), base_delay=5, max_delay=5, deadline=time.monotonic() + 0.5)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+def open_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure(RuntimeError("down"))
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = open_breaker()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    snapshot = breaker.snapshot()
+    assert (snapshot["times_opened"], snapshot["rejections"], snapshot["last_error"]) == (1, 1, "down")
+
+
+def test_half_open_allows_one_probe_and_closes_on_success(clock):
+    breaker = open_breaker()
+    clock.now += 30
+
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = open_breaker()
+    clock.now += 30
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.snapshot()["retry_in"] == 30
+    assert not breaker.allow_request()
+
+
+def test_release_frees_an_abandoned_probe(clock):
+    breaker = open_breaker()
+    clock.now += 30
+    assert breaker.allow_request()
+
+    breaker.release()
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
@@ -0,0 +1,72 @@
+"""
+SingleFlight: concurrent callers share one call, errors reach every waiter,
+and a cancelled waiter does not cancel the shared work.
+"""
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return object()
+
+    async def run():
+        waiters = [asyncio.create_task(flight.do("key", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert flight.in_flight("key")
+        results = await asyncio.gather(*waiters)
+        assert not flight.in_flight("key")
+        return results
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_exception_reaches_every_waiter_and_is_not_cached():
+    flight = SingleFlight()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("generation failed")
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("key", failing) for _ in range(3)),
+                                       return_exceptions=True)
+        assert [type(r) for r in results] == [RuntimeError] * 3
+        assert not flight.in_flight("key")
+        with pytest.raises(RuntimeError):
+            await flight.do("key", failing)
+
+    asyncio.run(run())
+
+    assert len(calls) == 2
+
+
+def test_cancelled_waiter_leaves_shared_call_running():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        impatient = asyncio.create_task(flight.do("key", work))
+        patient = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        assert await patient == "done"
+        assert impatient.cancelled()
+
+    asyncio.run(run())
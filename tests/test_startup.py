@@ -0,0 +1,20 @@
+"""
+Cold start: importing rc_generator and building the generator load neither
+numpy nor openai; both are imported on the paths that use them.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_generator_starts_without_numpy_or_openai(tmp_path):
+    code = (
+        "import sys, rc_generator; rc_generator.get_generator(); "
+        "print(sorted(m for m in ('numpy', 'openai') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True,
+                            env={"PYTHONPATH": str(ROOT), "HF_API_TOKEN": ""}, check=True)
+
+    assert result.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,64 @@
+"""
+Incremental UserAggregates match a full recomputation from the store,
+on both user store backends, over randomized activity across days.
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+import bot
+import user_store
+from user_aggregates import UserAggregates
+
+START = datetime(2026, 1, 5, 9, 0)
+
+
+class Clock(datetime):
+    """datetime whose now() is set by the test."""
+    current = START
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+@pytest.mark.parametrize("seed", range(3))
+def test_aggregates_match_recomputation(monkeypatch, tmp_path, backend, seed):
+    rng = random.Random(seed)
+    monkeypatch.setattr(bot, "datetime", Clock)
+    monkeypatch.setattr(Clock, "current", START)
+    monkeypatch.setattr(bot, "open_user_store",
+                        lambda data_dir: user_store.open_user_store(data_dir, backend))
+    data_dir = str(tmp_path / "data")
+    analytics = bot.UserAnalytics(data_dir)
+    difficulties = list(bot.DIFFICULTY_LEVELS)
+
+    def check():
+        today = Clock.current.date().isoformat()
+        expected = UserAggregates.from_users(analytics.store.items())
+        assert analytics.aggregates.snapshot(today) == expected.snapshot(today)
+        assert analytics.get_top_users(5) == analytics.store.top(5)
+
+    try:
+        for step in range(400):
+            # Mostly same-day activity, with occasional day (and gap) changes
+            if rng.random() < 0.03:
+                Clock.current += timedelta(days=rng.choice([1, 1, 2, 5]))
+            Clock.current += timedelta(seconds=rng.randint(1, 600))
+            user_id = rng.randint(1, 40)
+            analytics.track_user(user_id, f"user{user_id}", rng.choice(difficulties + [None]))
+            if step % 25 == 0:
+                check()
+        check()
+    finally:
+        analytics.close()
+
+    # Reopening recomputes from what the backend persisted
+    reopened = bot.UserAnalytics(data_dir)
+    try:
+        today = Clock.current.date().isoformat()
+        assert reopened.aggregates.snapshot(today) == analytics.aggregates.snapshot(today)
+    finally:
+        reopened.close()
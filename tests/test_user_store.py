@@ -0,0 +1,130 @@
+"""
+User stores: the abstract interface, JSON write-behind, the SQLite backend
+and the one-time users.json migration.
+"""
+import asyncio
+import json
+
+import pytest
+
+from user_store import JSONUserStore, SQLiteUserStore, UserStore, open_user_store
+
+
+def user(user_id, total_rcs=1, day="2030-01-01", first_seen="2030-01-01T09:00:00"):
+    return {"user_id": user_id, "user_name": f"User {user_id}", "first_seen": first_seen,
+            "last_seen": f"{day}T09:00:00", "total_rcs": total_rcs,
+            "difficulty_preferences": {"gmat": total_rcs}, "streak": 1, "last_activity_date": day}
+
+
+def read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_user_store_is_abstract():
+    class Partial(UserStore):
+        def get(self, user_id):
+            return None
+
+    with pytest.raises(TypeError):
+        UserStore()
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_json_store_writes_immediately_until_started(tmp_path):
+    path = tmp_path / "users.json"
+    store = JSONUserStore(str(path))
+
+    store.put("1", user(1))
+
+    assert read_json(path) == {"1": user(1)}
+    assert store.flushes == 1
+
+
+def test_json_write_behind_batches_until_interval(tmp_path):
+    path = tmp_path / "users.json"
+    store = JSONUserStore(str(path), flush_interval=0.05, flush_threshold=100)
+
+    async def run():
+        await store.start()
+        for i in range(5):
+            store.put(str(i), user(i))
+        assert not path.exists()
+        await asyncio.sleep(0.2)
+
+    asyncio.run(run())
+
+    assert read_json(path) == {str(i): user(i) for i in range(5)}
+    assert store.flushes == 1
+    store.close()
+
+
+def test_json_write_behind_flushes_early_at_threshold(tmp_path):
+    path = tmp_path / "users.json"
+    store = JSONUserStore(str(path), flush_interval=60, flush_threshold=3)
+
+    async def run():
+        await store.start()
+        for i in range(3):
+            store.put(str(i), user(i))
+        await asyncio.sleep(0.1)
+        assert len(read_json(path)) == 3
+        store.put("3", user(3))
+
+    asyncio.run(run())
+    assert len(read_json(path)) == 3
+
+    store.close()
+
+    assert read_json(path) == {str(i): user(i) for i in range(4)}
+    assert JSONUserStore(str(path)).count() == 4
+
+
+def test_sqlite_store_round_trips_and_aggregates(tmp_path):
+    path = str(tmp_path / "users.sqlite3")
+    store = SQLiteUserStore(path)
+    store.put("1", user(1, total_rcs=3, day="2030-01-02"))
+    store.put("2", user(2, total_rcs=5))
+    store.put("3", user(3, total_rcs=3, first_seen="2029-12-31T09:00:00"))
+    store.put("1", user(1, total_rcs=4, day="2030-01-02"))
+    store.close()
+
+    store = SQLiteUserStore(path)
+    assert store.get("1") == user(1, total_rcs=4, day="2030-01-02")
+    assert store.get("missing") is None
+    assert store.count() == 3
+    assert store.count_active_on("2030-01-02") == 1
+    assert store.total_rcs() == 12
+    assert [u["user_id"] for u in store.top(2)] == [2, 1]
+    assert dict(store.items()).keys() == {"1", "2", "3"}
+    store.close()
+
+
+def test_sqlite_store_migrates_users_json_once(tmp_path):
+    users = {str(i): user(i, total_rcs=i) for i in range(1, 4)}
+    (tmp_path / "users.json").write_text(json.dumps(users), encoding="utf-8")
+
+    store = open_user_store(str(tmp_path), backend="sqlite")
+
+    assert dict(store.items()) == users
+    assert not (tmp_path / "users.json").exists()
+    assert read_json(tmp_path / "users.json.migrated") == users
+    store.close()
+
+    # A users.json that reappears later is not imported over existing rows
+    (tmp_path / "users.json").write_text(json.dumps({"9": user(9)}), encoding="utf-8")
+    store = open_user_store(str(tmp_path), backend="sqlite")
+    assert store.get("9") is None
+    assert store.count() == 3
+    store.close()
+
+
+def test_corrupt_users_json_is_backed_up(tmp_path):
+    (tmp_path / "users.json").write_text("{not json", encoding="utf-8")
+
+    store = open_user_store(str(tmp_path), backend="sqlite")
+
+    assert store.count() == 0
+    assert [p.name.startswith("users.json.corrupt-") for p in tmp_path.iterdir()].count(True) == 1
+    store.close()
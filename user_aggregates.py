@@ -0,0 +1,100 @@
+"""
+Running analytics aggregates for /adminstats.
+Built once from the user store at startup, then updated by every tracked
+interaction, so the dashboard reads counters instead of rescanning users:
+user count and interaction total are O(1), daily actives are one dict
+lookup and the leaderboard is a small sorted list of the top K users.
+"""
+import bisect
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from user_store import rank_key
+
+# Leaderboard entries kept; larger requests fall back to the store
+TOP_K = 10
+# Days of per-day active counters kept
+ACTIVE_HISTORY_DAYS = 90
+
+
+class UserAggregates:
+    """
+    Counters maintained alongside the user store.
+    Exactness of the top K relies on scores only ever increasing (one RC at
+    a time): a user outside the top K can only enter by overtaking the
+    current last entry, which is then the best user outside.
+    """
+
+    def __init__(self, top_k: int = TOP_K):
+        self.top_k = top_k
+        self.total_users = 0
+        self.total_rcs = 0
+        self.active_by_day: Dict[str, int] = {}
+        # (rank_key, user_id) in rank order, with the latest record of each
+        self._top: List[Tuple[tuple, str]] = []
+        self._top_users: Dict[str, Dict] = {}
+
+    @classmethod
+    def from_users(cls, users: Iterable[Tuple[str, Dict]], top_k: int = TOP_K) -> "UserAggregates":
+        """Full recomputation from (user_id, record) pairs."""
+        aggregates = cls(top_k)
+        for user_id, user in users:
+            aggregates.total_users += 1
+            aggregates.total_rcs += user.get("total_rcs", 0)
+            day = user.get("last_activity_date")
+            if day:
+                aggregates.active_by_day[day] = aggregates.active_by_day.get(day, 0) + 1
+            aggregates._offer(user_id, user)
+        return aggregates
+
+    def record(self, user_id: str, user: Dict, is_new: bool, previous_day: Optional[str]):
+        """Account for one tracked interaction (`user` is the updated record)."""
+        if is_new:
+            self.total_users += 1
+        self.total_rcs += 1
+        day = user.get("last_activity_date")
+        if day and day != previous_day:
+            self.active_by_day[day] = self.active_by_day.get(day, 0) + 1
+            self._prune_days(day)
+        self._offer(user_id, user)
+
+    def _offer(self, user_id: str, user: Dict):
+        """Place the user in the top K if their (new) score earns it."""
+        key = (rank_key(user), user_id)
+        if user_id in self._top_users:
+            del self._top[next(i for i, entry in enumerate(self._top) if entry[1] == user_id)]
+        elif len(self._top) >= self.top_k:
+            if key >= self._top[-1]:
+                return
+            _, dropped = self._top.pop()
+            del self._top_users[dropped]
+        bisect.insort(self._top, key)
+        self._top_users[user_id] = user
+
+    def _prune_days(self, today: str):
+        if len(self.active_by_day) <= ACTIVE_HISTORY_DAYS:
+            return
+        cutoff = (date.fromisoformat(today) - timedelta(days=ACTIVE_HISTORY_DAYS)).isoformat()
+        for day in [d for d in self.active_by_day if d < cutoff]:
+            del self.active_by_day[day]
+
+    def active_on(self, day: str) -> int:
+        """
+        Users active on `day`. Exact for today; days before startup are
+        seeded from each user's latest activity only.
+        """
+        return self.active_by_day.get(day, 0)
+
+    def top(self, limit: int) -> Optional[List[Dict]]:
+        """Leaderboard in rank_key order, or None if `limit` exceeds the K kept."""
+        if limit > self.top_k:
+            return None
+        return [self._top_users[user_id] for _, user_id in self._top[:limit]]
+
+    def snapshot(self, day: str) -> Dict:
+        """Comparable summary (for checking against a recomputation)."""
+        return {
+            "total_users": self.total_users,
+            "total_rcs": self.total_rcs,
+            "active": self.active_on(day),
+            "top": [user_id for _, user_id in self._top],
+        }
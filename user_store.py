@@ -0,0 +1,350 @@
+"""
+Storage backends for per-user analytics records.
+Records are plain dicts keyed by the user id as a string. The JSON backend
+keeps users in memory and writes users.json behind the caller: changes are
+batched and flushed as one atomic snapshot per interval. The SQLite backend
+(WAL) upserts one row per interaction, so the cost of tracking a user does not
+grow with the number of users. It imports an existing users.json on first use.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from config import USER_STORE_BACKEND, USER_FLUSH_INTERVAL, USER_FLUSH_THRESHOLD
+
+
+def rank_key(user: Dict) -> tuple:
+    """Leaderboard order: most RCs first, ties to the earliest user (then by id)."""
+    return -user.get("total_rcs", 0), user.get("first_seen") or "", str(user.get("user_id"))
+
+
+class UserStore(ABC):
+    """Interface shared by the storage backends."""
+
+    @abstractmethod
+    def get(self, user_id: str) -> Optional[Dict]:
+        """One user's record, or None if the user is unknown."""
+
+    @abstractmethod
+    def put(self, user_id: str, user: Dict):
+        """Insert or replace one user's record."""
+
+    @abstractmethod
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        """Every (user_id, record) pair."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of users."""
+
+    @abstractmethod
+    def count_active_on(self, day: str) -> int:
+        """Users whose last activity date is `day` (ISO date)."""
+
+    @abstractmethod
+    def total_rcs(self) -> int:
+        """RC attempts summed over every user."""
+
+    @abstractmethod
+    def top(self, limit: int) -> List[Dict]:
+        """Users with the most RC attempts, in rank_key order."""
+
+    async def start(self):
+        """Start background work, if the backend has any. Call once the event loop is running."""
+
+    @abstractmethod
+    def close(self):
+        """Persist anything pending and release resources."""
+
+
+def _backup_corrupt(path: str, error: Exception) -> str:
+    """Move an unreadable file aside so nothing overwrites it, and say so."""
+    backup = f"{path}.corrupt-{int(time.time())}"
+    os.replace(path, backup)
+    print(f"[ERROR] Could not read {path} ({error}); moved it to {backup} and starting empty")
+    return backup
+
+
+def load_users_json(path: str) -> Dict[str, Dict]:
+    """Read a users.json file; a corrupt file is backed up rather than silently dropped."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            users = json.load(f)
+        if not isinstance(users, dict):
+            raise ValueError("expected a JSON object")
+        return users
+    except (OSError, ValueError) as e:  # JSONDecodeError is a ValueError
+        _backup_corrupt(path, e)
+        return {}
+
+
+class JSONUserStore(UserStore):
+    """
+    All users in memory, persisted as one JSON document (one user per line).
+    Once started, put() only marks the user dirty; a background task
+    re-encodes the dirty users and writes a snapshot every `flush_interval`
+    seconds, or sooner once `flush_threshold` users are dirty. Before start()
+    and after close(), every put() is written straight away.
+    """
+
+    def __init__(self, path: str, flush_interval: float = USER_FLUSH_INTERVAL,
+                 flush_threshold: int = USER_FLUSH_THRESHOLD):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_threshold = max(1, flush_threshold)
+        self.users = load_users_json(path)
+        self.flushes = 0
+
+        # Encoded record per user; a flush re-encodes only the dirty ones
+        self._encoded: Dict[str, str] = {user_id: json.dumps(user) for user_id, user in self.users.items()}
+        self._dirty: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        # Snapshots are numbered so a slow write never replaces a newer one
+        self._write_lock = threading.Lock()
+        self._snapshot_seq = 0
+        self._written_seq = 0
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        return self.users.get(user_id)
+
+    def put(self, user_id: str, user: Dict):
+        self.users[user_id] = user
+        self._dirty.add(user_id)
+        if self._task is None:
+            self.flush()
+        elif len(self._dirty) >= self.flush_threshold:
+            self._wakeup.set()
+
+    async def start(self):
+        if self._task:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        print(f"[OK] User store write-behind started (every {self.flush_interval:g}s "
+              f"or {self.flush_threshold} dirty users)")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.aflush()
+            except OSError as e:
+                print(f"[ERROR] Could not write {self.path}: {e}")
+
+    def _snapshot(self) -> Optional[tuple]:
+        """
+        Encode dirty users and capture the file contents as (seq, entries, dirty ids),
+        or None if nothing changed.
+        """
+        if not self._dirty:
+            return None
+        dirty, self._dirty = self._dirty, set()
+        for user_id in dirty:
+            self._encoded[user_id] = json.dumps(self.users[user_id])
+        self._snapshot_seq += 1
+        return self._snapshot_seq, list(self._encoded.items()), dirty
+
+    def _write(self, snapshot: tuple):
+        """Write a snapshot: temp file, fsync, atomic rename (so a crash leaves the old file intact)."""
+        seq, entries, _ = snapshot
+        with self._write_lock:
+            if seq <= self._written_seq:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write("{\n")
+                f.write(",\n".join(f"{json.dumps(user_id)}: {encoded}" for user_id, encoded in entries))
+                f.write("\n}\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._fsync_dir()
+            self._written_seq = seq
+            self.flushes += 1
+
+    def _fsync_dir(self):
+        """Persist the rename itself (POSIX only)."""
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    async def aflush(self):
+        """Write pending changes from a worker thread; the event loop only encodes dirty users."""
+        async with self._flush_lock:
+            snapshot = self._snapshot()
+            if snapshot is None:
+                return
+            try:
+                await asyncio.to_thread(self._write, snapshot)
+            except OSError:
+                self._dirty.update(snapshot[2])  # Retry on the next flush
+                raise
+
+    def flush(self):
+        """Write pending changes now, blocking the caller."""
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            self._write(snapshot)
+
+    def close(self):
+        """Stop the background flusher and write whatever is still dirty."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self.flush()
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        return iter(list(self.users.items()))
+
+    def count(self) -> int:
+        return len(self.users)
+
+    def count_active_on(self, day: str) -> int:
+        return sum(1 for user in self.users.values() if user.get("last_activity_date") == day)
+
+    def total_rcs(self) -> int:
+        return sum(user.get("total_rcs", 0) for user in self.users.values())
+
+    def top(self, limit: int) -> List[Dict]:
+        return sorted(self.users.values(), key=rank_key)[:limit]
+
+
+class SQLiteUserStore(UserStore):
+    """One row per user in a WAL-mode SQLite table."""
+
+    COLUMNS = ("user_id", "user_name", "first_seen", "last_seen", "total_rcs",
+               "difficulty_preferences", "streak", "last_activity_date")
+
+    def __init__(self, path: str, migrate_from: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+
+        store_dir = os.path.dirname(path)
+        if store_dir and not os.path.exists(store_dir):
+            os.makedirs(store_dir)
+
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: commits survive a process crash; only an OS crash can lose the last few
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS users (
+                user_id TEXT PRIMARY KEY,
+                user_name TEXT,
+                first_seen TEXT,
+                last_seen TEXT,
+                total_rcs INTEGER NOT NULL DEFAULT 0,
+                difficulty_preferences TEXT NOT NULL DEFAULT '{}',
+                streak INTEGER NOT NULL DEFAULT 0,
+                last_activity_date TEXT
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_users_activity ON users(last_activity_date)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_users_total ON users(total_rcs)")
+        self._conn.commit()
+
+        if migrate_from and os.path.exists(migrate_from) and self.count() == 0:
+            self.migrate_json(migrate_from)
+
+    def _row(self, user_id: str, user: Dict) -> tuple:
+        return (
+            user_id, user.get("user_name"), user.get("first_seen"), user.get("last_seen"),
+            user.get("total_rcs", 0), json.dumps(user.get("difficulty_preferences", {})),
+            user.get("streak", 0), user.get("last_activity_date"),
+        )
+
+    def _user(self, row: tuple) -> Dict:
+        user = dict(zip(self.COLUMNS, row))
+        user["user_id"] = int(user["user_id"]) if user["user_id"].lstrip("-").isdigit() else user["user_id"]
+        user["difficulty_preferences"] = json.loads(user["difficulty_preferences"] or "{}")
+        return user
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return self._user(row) if row else None
+
+    def put(self, user_id: str, user: Dict):
+        updates = ", ".join(f"{column} = excluded.{column}" for column in self.COLUMNS[1:])
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO users ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))}) "
+                f"ON CONFLICT(user_id) DO UPDATE SET {updates}",
+                self._row(user_id, user),
+            )
+            self._conn.commit()
+
+    def migrate_json(self, json_path: str) -> int:
+        """Import a users.json file in one transaction, then rename it to *.migrated."""
+        users = load_users_json(json_path)
+        if not users:
+            return 0
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO users ({', '.join(self.COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                    (self._row(user_id, user) for user_id, user in users.items()),
+                )
+        os.replace(json_path, f"{json_path}.migrated")
+        print(f"[OK] Migrated {len(users)} users from {json_path} to {self.path}")
+        return len(users)
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM users").fetchall()
+        return ((row[0], self._user(row)) for row in rows)
+
+    def _scalar(self, query: str, params: tuple = ()) -> int:
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()[0] or 0
+
+    def count(self) -> int:
+        return self._scalar("SELECT COUNT(*) FROM users")
+
+    def count_active_on(self, day: str) -> int:
+        return self._scalar("SELECT COUNT(*) FROM users WHERE last_activity_date = ?", (day,))
+
+    def total_rcs(self) -> int:
+        return self._scalar("SELECT SUM(total_rcs) FROM users")
+
+    def top(self, limit: int) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM users "
+                "ORDER BY total_rcs DESC, COALESCE(first_seen, ''), user_id LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._user(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_user_store(data_dir: str = "data", backend: str = USER_STORE_BACKEND) -> UserStore:
+    """The configured backend; SQLite picks up an existing users.json on first use."""
+    json_path = os.path.join(data_dir, "users.json")
+    if backend == "json":
+        return JSONUserStore(json_path)
+    if backend == "sqlite":
+        return SQLiteUserStore(os.path.join(data_dir, "users.sqlite3"), migrate_from=json_path)
+    raise ValueError(f"Unknown USER_STORE_BACKEND: {backend} (expected 'sqlite' or 'json')")